@@ -94,14 +94,14 @@ export class AgentIntelligenceAnalyzer {
       
       AUTONOMOUS WORKFLOW:
       1. Use conversation_state_search to find conversations in the specified date range
-      2. For each conversation, use conversation_state_ucid_detail to get detailed information  
-      3. Use conversation_state_transcripts to retrieve conversation transcripts
-      4. Analyze the data to calculate agent metrics including:
+      2. Use conversation_state_batch with the UCIDs from step 1 to get detailed information and transcripts for all conversations in one call
+         (conversation_state_ucid_detail and conversation_state_transcripts remain available for single conversations)
+      3. Analyze the data to calculate agent metrics including:
          - Sentiment scores (customer and agent)
          - Escalation indicators
          - Resolution rates
          - Customer satisfaction levels
-      5. Generate comprehensive insights and recommendations
+      4. Generate comprehensive insights and recommendations
       
       You should autonomously orchestrate this entire workflow. Make decisions about:
       - Which conversations to analyze in detail
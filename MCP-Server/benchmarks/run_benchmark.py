@@ -0,0 +1,366 @@
+"""
+Benchmark harness for the MCP tools against the local API stub
+
+Starts benchmarks.stub_server in a subprocess, points the server at it and drives the
+FastMCP tools at fixed concurrency, each scenario in a fresh worker process. Reports
+throughput, p50/p95/p99 latency, upstream calls per tool call and the worker's peak RSS.
+Results record the machine and command that produced them; they can be written as a
+baseline and later runs on the same machine compared against it.
+
+Usage:
+    python -m benchmarks.run_benchmark
+    python -m benchmarks.run_benchmark --scenarios ucid_detail,transcripts --concurrency 4,16
+    python -m benchmarks.run_benchmark --write-baseline baseline.local.json
+    python -m benchmarks.run_benchmark --baseline baseline.local.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import shlex
+import sys
+import time
+import urllib.request
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from src.utils.stats import percentile
+
+from .stub_server import SEARCH_DATE_FORMAT, StubConfig, SyntheticData
+
+logger = logging.getLogger(__name__)
+
+
+class Scenario(NamedTuple):
+    """One tool driven with per-call arguments"""
+    tool: str
+    calls: int
+    concurrency: int
+    arguments: Callable[[int], Dict[str, Any]]
+
+
+def build_scenarios(config: StubConfig, data: SyntheticData) -> Dict[str, Scenario]:
+    """Default scenarios; arguments vary per call so identical requests are not coalesced"""
+    start = datetime.strptime(config.start, SEARCH_DATE_FORMAT)
+    hours = max(1, int(config.days * 24))
+    day_end = (start + timedelta(days=config.days) - timedelta(minutes=1)).strftime(SEARCH_DATE_FORMAT)
+    ucids = data.ucids
+
+    def hour_window(n: int) -> Dict[str, Any]:
+        begin = start + timedelta(hours=n % hours)
+        return {
+            "startDate": begin.strftime(SEARCH_DATE_FORMAT),
+            "endDate": (begin + timedelta(minutes=59)).strftime(SEARCH_DATE_FORMAT),
+        }
+
+    def full_window(n: int) -> Dict[str, Any]:
+        return {"startDate": (start + timedelta(minutes=n)).strftime(SEARCH_DATE_FORMAT), "endDate": day_end}
+
+    cc = config.contact_center_id
+    return {
+        "search_page": Scenario("conversation_state_search", 200, 8, lambda n: {
+            "contactCenterId": cc, "limit": 50, **hour_window(n),
+        }),
+        "search_paginated": Scenario("conversation_state_search", 20, 4, lambda n: {
+            "contactCenterId": cc, "limit": 50, "autoPaginate": True, "maxResults": 100000, **full_window(n),
+        }),
+        "search_sharded": Scenario("conversation_state_search", 20, 4, lambda n: {
+            "contactCenterId": cc, "limit": 50, "sharded": True, "maxResults": 100000, **full_window(n),
+        }),
+        "ucid_detail": Scenario("conversation_state_ucid_detail", 400, 16, lambda n: {
+            "ucid": ucids[n % len(ucids)],
+        }),
+        "transcripts": Scenario("conversation_state_transcripts", 200, 16, lambda n: {
+            "ucid": ucids[n % len(ucids)],
+        }),
+        "batch": Scenario("conversation_state_batch", 20, 4, lambda n: {
+            "ucids": [ucids[(n * 10 + i) % len(ucids)] for i in range(10)],
+        }),
+        "agent_rollup": Scenario("agent_performance_rollup", 10, 2, lambda n: {
+            "contactCenterId": cc, **full_window(n),
+        }),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB
+
+    The high-water mark never goes down, so it only describes one scenario when that
+    scenario is the only one the process ran; run() gives each scenario its own worker.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return round(usage / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def stub_counts(base_url: str) -> Dict[str, int]:
+    """Upstream requests served by the stub so far, per endpoint"""
+    with urllib.request.urlopen(f"{base_url}/stub/stats") as response:
+        return json.load(response)
+
+
+async def start_stub(config: StubConfig, port: int) -> asyncio.subprocess.Process:
+    """Run the stub in its own process so it does not compete with the server's event loop"""
+    options = []
+    for key, value in asdict(config).items():
+        options += ["--" + key.replace("_", "-"), str(value)]
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "benchmarks.stub_server", "--port", str(port), *options,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        if process.returncode is not None:
+            raise RuntimeError(f"Stub server exited with code {process.returncode} (is port {port} in use?)")
+        try:
+            stub_counts(base_url)
+            return process
+        except OSError:
+            await asyncio.sleep(0.1)
+    process.kill()
+    await process.wait()
+    raise RuntimeError("Stub server did not start")
+
+
+async def run_scenario(
+    client, scenario: Scenario, concurrency: int, base_url: str, warmup: int = 0
+) -> Dict[str, Any]:
+    """Drive one scenario and return its measurements"""
+    from src.utils.response_cache import response_cache
+
+    # Warm up with arguments outside the measured range, then start from a cold response cache
+    for n in range(scenario.calls, scenario.calls + warmup):
+        await client.call_tool(scenario.tool, scenario.arguments(n), raise_on_error=False)
+    response_cache.invalidate()
+    before = stub_counts(base_url)
+    latencies: List[float] = []
+    errors = 0
+    next_call = 0
+
+    async def worker():
+        nonlocal errors, next_call
+        while next_call < scenario.calls:
+            n = next_call
+            next_call += 1
+            started = time.perf_counter()
+            result = await client.call_tool(scenario.tool, scenario.arguments(n), raise_on_error=False)
+            latencies.append(time.perf_counter() - started)
+            payload = result.structured_content or {}
+            if result.is_error or payload.get("status") == "error":
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    after = stub_counts(base_url)
+    upstream = sum(after[k] - before[k] for k in ("search", "detail", "transcripts"))
+    latencies.sort()
+    return {
+        "tool": scenario.tool,
+        "calls": scenario.calls,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(scenario.calls / elapsed, 2),
+        "p50_ms": round((percentile(latencies, 50) or 0.0) * 1000, 2),
+        "p95_ms": round((percentile(latencies, 95) or 0.0) * 1000, 2),
+        "p99_ms": round((percentile(latencies, 99) or 0.0) * 1000, 2),
+        "upstream_calls_per_call": round(upstream / scenario.calls, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List regressions of results against a baseline"""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        checks = [
+            ("p95_ms", current["p95_ms"] > base["p95_ms"] * (1 + tolerance)),
+            ("p99_ms", current["p99_ms"] > base["p99_ms"] * (1 + tolerance)),
+            ("throughput_rps", current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance)),
+            # Hedged requests add a few upstream calls that vary between runs
+            ("upstream_calls_per_call", current["upstream_calls_per_call"] > base["upstream_calls_per_call"] * 1.05 + 0.01),
+            ("peak_rss_mb", current["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance)),
+            ("errors", current["errors"] > base["errors"]),
+        ]
+        for metric, regressed in checks:
+            if regressed:
+                regressions.append(f"{key}: {metric} {base[metric]} -> {current[metric]}")
+    return regressions
+
+
+def print_table(results: Dict[str, Any]):
+    """Print results as a fixed-width table"""
+    header = f"{'scenario':<28}{'conc':>5}{'calls':>7}{'err':>5}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'up/call':>9}{'rss MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for key, r in results.items():
+        print(
+            f"{key:<28}{r['concurrency']:>5}{r['calls']:>7}{r['errors']:>5}{r['throughput_rps']:>9}"
+            f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['upstream_calls_per_call']:>9}{r['peak_rss_mb']:>8}"
+        )
+
+
+def environment() -> Dict[str, Any]:
+    """Machine and command a run was recorded with; latency only compares within one machine"""
+    return {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "command": shlex.join([os.path.basename(sys.executable), "-m", "benchmarks.run_benchmark", *sys.argv[1:]]),
+        "recorded_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+def configure_server(base_url: str):
+    """Point the server at the stub; it reads its upstream configuration from the environment on import"""
+    os.environ["CONVERSATION_API_BASE_URL"] = base_url
+    os.environ["OAUTH_TOKEN_URL"] = f"{base_url}/v2/oauth2/token"
+    os.environ.setdefault("CSS_STORE_PATH", "")
+
+
+async def run_worker(args: argparse.Namespace, config: StubConfig) -> Dict[str, Any]:
+    """Run one scenario at one concurrency level in this process against an already running stub"""
+    base_url = f"http://127.0.0.1:{args.port}"
+    configure_server(base_url)
+    from fastmcp import Client
+    import main
+
+    scenario = build_scenarios(config, SyntheticData(config))[args.worker]
+    if args.calls:
+        scenario = scenario._replace(calls=args.calls)
+    async with Client(main.mcp) as client:
+        return await run_scenario(client, scenario, int(args.concurrency), base_url, args.warmup)
+
+
+async def run(args: argparse.Namespace, config: StubConfig) -> Dict[str, Any]:
+    """Start the stub and run the selected scenarios, each in its own worker process
+
+    Returns results keyed by scenario@concurrency.
+    """
+    scenarios = build_scenarios(config, SyntheticData(config))
+    names = args.scenarios.split(",") if args.scenarios else list(scenarios)
+    unknown = [name for name in names if name not in scenarios]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)} (available: {', '.join(scenarios)})")
+
+    options = [
+        "--port", str(args.port),
+        "--warmup", str(args.warmup),
+        "--conversations", str(args.conversations),
+        "--latency-ms", str(args.latency_ms),
+        "--slow-rate", str(args.slow_rate),
+        "--error-rate", str(args.error_rate),
+        "--log-level", args.log_level,
+    ]
+    if args.calls:
+        options += ["--calls", str(args.calls)]
+
+    configure_server(f"http://127.0.0.1:{args.port}")
+    stub = await start_stub(config, args.port)
+    try:
+        results: Dict[str, Any] = {}
+        for name in names:
+            levels = [int(c) for c in args.concurrency.split(",")] if args.concurrency else [scenarios[name].concurrency]
+            for concurrency in levels:
+                key = f"{name}@{concurrency}"
+                # A fresh process per scenario keeps peak RSS from carrying over between scenarios
+                worker = await asyncio.create_subprocess_exec(
+                    sys.executable, "-m", "benchmarks.run_benchmark",
+                    "--worker", name, "--concurrency", str(concurrency), *options,
+                    cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    stdout=asyncio.subprocess.PIPE,
+                )
+                stdout, _ = await worker.communicate()
+                if worker.returncode != 0:
+                    raise RuntimeError(f"Benchmark worker for {key} exited with code {worker.returncode}")
+                # The result is the last stdout line; anything before it is server output
+                results[key] = json.loads(stdout.decode().strip().splitlines()[-1])
+                logger.info(f"{key}: {results[key]}")
+        return results
+    finally:
+        stub.terminate()
+        await stub.wait()
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the MCP tools against the local API stub")
+    parser.add_argument("--scenarios", help="Comma-separated scenario names (default: all)")
+    parser.add_argument("--concurrency", help="Comma-separated concurrency levels (default: per scenario)")
+    parser.add_argument("--calls", type=int, help="Tool calls per scenario (default: per scenario)")
+    parser.add_argument("--warmup", type=int, default=3, help="Unmeasured calls before each scenario (default: 3)")
+    parser.add_argument("--port", type=int, default=8765, help="Stub port (default: 8765)")
+    parser.add_argument("--conversations", type=int, default=1000, help="Synthetic conversations (default: 1000)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub latency per request (default: 20)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of stub requests that are slow (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stub requests that fail (default: 0)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against this baseline file and exit 1 on regressions")
+    parser.add_argument("--write-baseline", help="Write results as a new baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative regression (default: 0.3)")
+    parser.add_argument("--log-level", default="WARNING", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    # Internal: run one scenario against a running stub and print its result as JSON
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level), stream=sys.stderr)
+    config = StubConfig(
+        conversations=args.conversations,
+        latency_ms=args.latency_ms,
+        slow_rate=args.slow_rate,
+        error_rate=args.error_rate,
+    )
+    if args.worker:
+        result = asyncio.run(run_worker(args, config))
+        print(json.dumps(result), flush=True)
+        return
+
+    baseline = None
+    if args.baseline:
+        # Checked before running so a run is not wasted on a baseline that cannot be compared
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        recorded = baseline.get("environment")
+        if not recorded:
+            raise SystemExit(f"{args.baseline} does not record the machine it was measured on; record a new baseline")
+        current = environment()
+        differs = [k for k in ("host", "machine", "cpu_count", "python") if recorded.get(k) != current[k]]
+        if differs:
+            raise SystemExit(
+                f"{args.baseline} was recorded on a different machine ({', '.join(differs)} differ; "
+                f"recorded with: {recorded.get('command')}); record a baseline on this machine"
+            )
+
+    results = asyncio.run(run(args, config))
+    print_table(results)
+
+    report = {"environment": environment(), "stub": asdict(config), "results": results}
+    for path in (args.output, args.write_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+
+    if baseline is not None:
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+if __name__ == "__main__":
+    main()
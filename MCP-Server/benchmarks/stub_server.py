@@ -0,0 +1,391 @@
+"""
+Local stand-in for the OAuth token endpoint and the Conversation State Service
+
+Serves deterministic synthetic conversations and transcripts in the shape of the real
+API (see LLM-Server/gd-agent-sdk-llm/src/data/conversationState.ts and trascripts.ts),
+with configurable latency, slow-request and error rates, page sizes and lastEvaluatedKey
+behaviour.
+
+Usage:
+    python -m benchmarks.stub_server --port 8765 --conversations 2000 --latency-ms 20
+"""
+import argparse
+import asyncio
+import bisect
+import logging
+import random
+import uuid
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+AGENTS = [(f"agent{i:02d}", name) for i, name in enumerate(
+    ["Shyam", "Priya", "Marco", "Aiko", "Lena", "Omar", "Grace", "Tomas", "Nadia", "Ravi", "Chloe", "Diego"]
+)]
+QUEUES = ["GD-L1-General-English-FOS-TOP", "GD-L1-Domains-English", "GD-L2-Hosting-English", "GD-L1-Billing-English"]
+LATEST_QUEUES = ["GD-L1-Idle", "GD-L1-General", "GD-L2-Hosting"]
+CHANNELS = ["web", "messaging", "voice"]
+SUPPORT_LEVELS = ["L1", "L1", "L1", "L2"]
+DISCONNECTS = [
+    ("AGENT_DISCONNECT", "Agent explicitly disconnects or rejects a chat."),
+    ("CUSTOMER_DISCONNECT", "Customer explicitly disconnects the chat."),
+    ("IDLE_DISCONNECT", "Disconnect due to an idle participant."),
+]
+CUSTOMER_LINES = [
+    "I can't renew my domain, it says it is already taken",
+    "My website is down since this morning and I'm frustrated",
+    "Can you help me set up email for my domain?",
+    "I was charged twice for my hosting plan, please refund",
+    "Thanks, that worked great",
+    "Still not working, this is terrible",
+    "How long will the transfer take?",
+    "Perfect, thank you so much for the quick help",
+]
+AGENT_LINES = [
+    "Thanks for reaching out, I'm happy to help with that",
+    "Let me check the account details for you",
+    "I can see the issue, one moment please",
+    "I've applied the fix, can you try again now?",
+    "Sorry for the trouble, I understand this is frustrating",
+    "Is there anything else I can help you with today?",
+]
+
+
+@dataclass
+class StubConfig:
+    """Synthetic data and behaviour of the stub"""
+    conversations: int = 1000
+    start: str = "2025-10-15 00:00"
+    days: float = 1.0
+    contact_center_id: str = "gd-dev-us-001"
+    page_size: int = 50
+    transcript_messages: int = 40
+    transcript_page_size: int = 15
+    echo_final_key: bool = True
+    latency_ms: float = 20.0
+    latency_jitter_ms: float = 10.0
+    slow_rate: float = 0.0
+    slow_latency_ms: float = 1000.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    token_latency_ms: float = 50.0
+    token_expires_in: int = 3600
+    seed: int = 7
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+class SyntheticData:
+    """Deterministic conversations and transcripts generated from the config seed"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.start = datetime.strptime(config.start, SEARCH_DATE_FORMAT).replace(tzinfo=timezone.utc)
+        span = config.days * 86400
+        rng = random.Random(config.seed)
+        offsets = sorted(rng.uniform(0, span) for _ in range(config.conversations))
+        self.ucids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in offsets]
+        self.created = [self.start + timedelta(seconds=offset) for offset in offsets]
+        self.index = {ucid: i for i, ucid in enumerate(self.ucids)}
+        self._conversations: Dict[int, Dict[str, Any]] = {}
+        self._transcripts: Dict[str, List[Dict[str, Any]]] = {}
+
+    def conversation(self, i: int) -> Dict[str, Any]:
+        if i not in self._conversations:
+            self._conversations[i] = self._build_conversation(i)
+        return self._conversations[i]
+
+    def _build_conversation(self, i: int) -> Dict[str, Any]:
+        rng = random.Random(self.config.seed * 1000003 + i)
+        ucid = self.ucids[i]
+        created = self.created[i]
+        contact_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        customer = f"Customer {i}"
+
+        legs = []
+        cursor = created + timedelta(seconds=rng.uniform(10, 30))
+        bot_end = cursor + timedelta(seconds=rng.uniform(15, 60))
+        legs.append(self._leg(ucid, contact_id, "CUSTOM_BOT", "", cursor, bot_end, None, rng))
+        cursor = bot_end
+        for _ in range(rng.choice((1, 1, 1, 2))):
+            agent_id, agent_name = rng.choice(AGENTS)
+            start = cursor + timedelta(seconds=rng.uniform(5, 120))
+            end = start + timedelta(seconds=rng.uniform(120, 1500))
+            legs.append(self._leg(ucid, contact_id, agent_id, agent_name, start, end, rng.choice(QUEUES), rng))
+            cursor = end
+        legs.reverse()
+
+        # Recent conversations are still active, like the live service
+        active = i >= self.config.conversations - max(1, self.config.conversations // 50)
+        if active:
+            legs[0]["state"] = "CONNECTED"
+            legs[0].pop("conversationEndTimestamp")
+            legs[0].pop("agentLeftTimestamp")
+        info = {
+            "ucid": ucid,
+            "initialContactId": contact_id,
+            "contactCenterId": self.config.contact_center_id,
+            "connectInstanceAlias": self.config.contact_center_id,
+            "customerAuthenticated": rng.random() < 0.8,
+            "customerDisplayName": customer,
+            "brandCustomerId": str(rng.randint(1000000, 9999999)),
+            "customerId": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "visitId": contact_id,
+            "visitorId": contact_id,
+            "createdAt": _iso(created),
+            "updatedAt": _iso(cursor),
+            "platform": "amazonconnect",
+            "channel": rng.choice(CHANNELS),
+            "market": "en-US",
+            "customerJoinedTimestamp": _iso(created),
+            "plId": "1",
+            "supportLevel": rng.choice(SUPPORT_LEVELS),
+            "location": "https://topology.care.dev-godaddy.com/v1/care/web-chat/test-harness",
+            "app": "",
+            "summary": f"{customer} asked about: {rng.choice(CUSTOMER_LINES).lower()}.",
+            "interactionType": "Guide",
+            "durationSeconds": int((cursor - created).total_seconds()),
+            "latestQueueStatus": "",
+            "latestQueue": rng.choice(LATEST_QUEUES),
+            "deviceInfo": rng.choice(("desktop", "mobile")),
+            "conversations": legs,
+            "id": contact_id,
+        }
+        if not active:
+            info["conversationEndTimestamp"] = _iso(cursor + timedelta(seconds=2))
+        return {"conversationInfo": info}
+
+    @staticmethod
+    def _leg(ucid, contact_id, agent_id, agent_name, start, end, queue, rng) -> Dict[str, Any]:
+        disconnect, description = rng.choice(DISCONNECTS)
+        leg = {
+            "ucid": ucid,
+            "contactId": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "initialContactId": contact_id,
+            "state": "COMPLETED",
+            "agentId": agent_id,
+            "createdAt": _iso(start),
+            "updatedAt": _iso(end),
+            "conversationStartTimestamp": _iso(start),
+            "conversationEndTimestamp": _iso(end),
+            "durationSeconds": str(int((end - start).total_seconds())),
+            "agentDisplayName": agent_name,
+            "agentJoinedTimestamp": _iso(start),
+            "agentLeftTimestamp": _iso(end),
+        }
+        if queue:
+            leg.update({
+                "disconnectReason": disconnect,
+                "endDescription": description,
+                "routingProfileName": "Admin",
+                "queueName": queue,
+            })
+        return leg
+
+    def search(self, start: Optional[str], end: Optional[str]) -> List[int]:
+        """Indexes of conversations created in [startDate, endDate] (endDate is an inclusive minute)"""
+        low, high = 0, len(self.created)
+        if start:
+            begin = datetime.strptime(start, SEARCH_DATE_FORMAT).replace(tzinfo=timezone.utc)
+            low = bisect.bisect_left(self.created, begin)
+        if end:
+            finish = datetime.strptime(end, SEARCH_DATE_FORMAT).replace(tzinfo=timezone.utc) + timedelta(minutes=1)
+            high = bisect.bisect_left(self.created, finish)
+        return list(range(low, max(low, high)))
+
+    def transcript(self, i: int) -> List[Dict[str, Any]]:
+        ucid = self.ucids[i]
+        if ucid in self._transcripts:
+            return self._transcripts[ucid]
+        rng = random.Random(self.config.seed * 7919 + i)
+        customer_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        customer = f"Customer {i}"
+        moment = self.created[i]
+        agent_id, agent_name = rng.choice(AGENTS)
+        agent_participant = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+        def message(role, name, participant, content):
+            nonlocal moment
+            moment += timedelta(seconds=rng.uniform(2, 45))
+            return {
+                "messageId": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "participantId": participant,
+                "participantName": name,
+                "participantRole": role,
+                "content": content,
+                "source": "amazonconnect",
+                "absoluteTime": _iso(moment),
+                "attachments": {},
+            }
+
+        messages = [
+            message("CUSTOMER", customer, customer_id, f"Participant {customer} has started a conversation"),
+            message(None, None, None, "Conversation rehydrated/resumed"),
+            message("SYSTEM", "SYSTEM_MESSAGE", "system",
+                    "GoDaddy does not accept or ask for payment data over chat.  Do not include any payment card information or payment details in this chat."),
+            message("CUSTOM_BOT", "AI Assistant", "bot", "Hi, this is our virtual assistant! Tell us how we can help."),
+            message("CUSTOMER", customer, customer_id, "Please connect me to a guide"),
+            message("AGENT", agent_name, agent_participant, f"{agent_name} joined with role AGENT"),
+        ]
+        body = max(0, self.config.transcript_messages - len(messages) - 1)
+        for turn in range(body):
+            if turn % 2 == 0:
+                messages.append(message("CUSTOMER", customer, customer_id, rng.choice(CUSTOMER_LINES)))
+            else:
+                messages.append(message("AGENT", agent_name, agent_participant, rng.choice(AGENT_LINES)))
+        messages.append(message(None, None, None, "Conversation closed"))
+        self._transcripts[ucid] = messages
+        return messages
+
+
+class StubServer:
+    """aiohttp application serving the OAuth and Conversation State Service endpoints"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.data = SyntheticData(config)
+        self.rng = random.Random(config.seed)
+        self.counts = {"token": 0, "search": 0, "detail": 0, "transcripts": 0, "errors": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v2/oauth2/token", self.token)
+        app.router.add_get("/conversation-state/filters/search", self.search)
+        app.router.add_get("/conversation-state/{ucid}", self.detail)
+        app.router.add_get("/transcripts/ucid/{ucid}", self.transcripts)
+        app.router.add_get("/stub/stats", self.stats)
+        app.router.add_post("/stub/reset", self.reset)
+        return app
+
+    async def _delay(self):
+        latency = self.config.latency_ms + self.rng.uniform(-1, 1) * self.config.latency_jitter_ms
+        if self.rng.random() < self.config.slow_rate:
+            latency = self.config.slow_latency_ms
+        await asyncio.sleep(max(0.0, latency) / 1000)
+
+    def _error(self) -> Optional[web.Response]:
+        if self.rng.random() < self.config.error_rate:
+            self.counts["errors"] += 1
+            return web.json_response({"status": "error", "message": "stub error"}, status=self.config.error_status)
+        return None
+
+    async def token(self, request: web.Request) -> web.Response:
+        self.counts["token"] += 1
+        await asyncio.sleep(self.config.token_latency_ms / 1000)
+        return web.json_response({
+            "access_token": f"stub-token-{self.counts['token']}",
+            "token_type": "Bearer",
+            "expires_in": self.config.token_expires_in,
+        })
+
+    async def search(self, request: web.Request) -> web.Response:
+        self.counts["search"] += 1
+        await self._delay()
+        error = self._error()
+        if error:
+            return error
+        query = request.query
+        matches = self.data.search(query.get("startDate"), query.get("endDate"))
+        offset = int(query.get("nextToken") or 0)
+        limit = int(query.get("limit") or self.config.page_size)
+        page = matches[offset:offset + limit]
+        next_token = str(offset + limit) if offset + limit < len(matches) else None
+        return web.json_response({
+            "status": "success",
+            "message": "Conversation data retrieved successfully",
+            "data": [self.data.conversation(i) for i in page],
+            "pagination": {"nextToken": next_token, "limit": limit, "total": len(matches)},
+        })
+
+    async def detail(self, request: web.Request) -> web.Response:
+        self.counts["detail"] += 1
+        await self._delay()
+        error = self._error()
+        if error:
+            return error
+        i = self.data.index.get(request.match_info["ucid"])
+        if i is None:
+            return web.json_response({"status": "error", "message": "Conversation not found"}, status=404)
+        return web.json_response({
+            "status": "success",
+            "message": "Conversation data retrieved successfully",
+            "data": [self.data.conversation(i)],
+        })
+
+    async def transcripts(self, request: web.Request) -> web.Response:
+        self.counts["transcripts"] += 1
+        await self._delay()
+        error = self._error()
+        if error:
+            return error
+        ucid = request.match_info["ucid"]
+        i = self.data.index.get(ucid)
+        if i is None:
+            return web.json_response({"status": "error", "message": "Transcripts not found"}, status=404)
+
+        messages = self.data.transcript(i)
+        offset = 0
+        key = request.query.get("lastEvaluatedKey")
+        if key:
+            offset = int(key.rsplit("#", 1)[-1]) + 1
+        page = messages[offset:offset + self.config.transcript_page_size]
+        if page:
+            last = offset + len(page) - 1
+            last_key = f"TIME#{messages[last]['absoluteTime']}#ts#{last}"
+        else:
+            # Past the end: the real service echoes the key of the last message
+            last_key = key if self.config.echo_final_key else None
+        return web.json_response({
+            "status": "success",
+            "message": f"Transcripts fetched successfully for ucid: {ucid}",
+            "data": {
+                "id": self.data.conversation(i)["conversationInfo"]["id"],
+                "ucid": ucid,
+                "contactId": "",
+                "lastEvaluatedKey": last_key,
+                "transcripts": page,
+            },
+        })
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.counts)
+
+    async def reset(self, request: web.Request) -> web.Response:
+        for key in self.counts:
+            self.counts[key] = 0
+        return web.json_response(self.counts)
+
+
+def parse_config(argv: Optional[List[str]] = None) -> Tuple[StubConfig, str, int]:
+    """Build a StubConfig (plus host and port) from command line options"""
+    parser = argparse.ArgumentParser(description="Local stub for the OAuth and Conversation State Service APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    for field in fields(StubConfig):
+        option = "--" + field.name.replace("_", "-")
+        if field.type is bool:
+            parser.add_argument(option, type=lambda v: v.lower() in ("1", "true", "yes"), default=field.default)
+        else:
+            parser.add_argument(option, type=field.type, default=field.default)
+    args = parser.parse_args(argv)
+    config = StubConfig(**{field.name: getattr(args, field.name) for field in fields(StubConfig)})
+    return config, args.host, args.port
+
+
+def main():
+    """Run the stub until interrupted"""
+    logging.basicConfig(level=logging.WARNING)
+    config, host, port = parse_config()
+    web.run_app(StubServer(config).app(), host=host, port=port, print=lambda *_: None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
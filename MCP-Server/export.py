@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Command line export of a date range of conversations to NDJSON, Parquet or Arrow files
+
+Usage:
+    python export.py --contact-center-id liveperson:30187337 --start "2025-10-01 00:00" --end "2025-10-31 23:59"
+    python export.py --contact-center-id liveperson:30187337 --start "2025-10-15 00:00" --end "2025-10-15 23:59" \\
+        --format parquet --transcripts --output /data/exports --name october-15
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from src.tools.export_tool import ConversationExportTool
+from src.utils.conversation_store import conversation_store
+from src.utils.exporter import EXPORT_FORMATS
+from src.utils.oauth_client import oauth_client
+from src.utils.transcript_index import transcript_index
+
+
+async def run(arguments: dict) -> dict:
+    """Run one export with the pooled upstream session open"""
+    await oauth_client.start()
+    try:
+        return await ConversationExportTool().execute(arguments)
+    finally:
+        await oauth_client.close()
+        conversation_store.close()
+        transcript_index.close()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Export conversations and transcripts to local files")
+    parser.add_argument("--contact-center-id", required=True, help="Contact center ID")
+    parser.add_argument("--start", required=True, help="Start of the range (YYYY-MM-DD HH:MM)")
+    parser.add_argument("--end", required=True, help="End of the range, inclusive (YYYY-MM-DD HH:MM)")
+    parser.add_argument(
+        "--format",
+        choices=list(EXPORT_FORMATS),
+        default="ndjson",
+        help="File format; parquet and arrow need pyarrow (default: ndjson)",
+    )
+    parser.add_argument("--transcripts", action="store_true", help="Also export transcript messages")
+    parser.add_argument("--no-legs", action="store_true", help="Skip the legs table")
+    parser.add_argument("--output", help="Base output directory (default: CSS_EXPORT_DIR or ./exports)")
+    parser.add_argument("--name", help="Subdirectory for this export (default: contact center and current time)")
+    parser.add_argument("--window-minutes", type=int, help="Search window width (default: CSS_EXPORT_WINDOW_MINUTES or 60)")
+    parser.add_argument("--max-concurrency", type=int, help="Max transcript fetches in flight")
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="WARNING",
+        help="Logging level (default: WARNING)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)],
+    )
+    if args.output:
+        os.environ["CSS_EXPORT_DIR"] = args.output
+
+    result = asyncio.run(run({
+        "contactCenterId": args.contact_center_id,
+        "startDate": args.start,
+        "endDate": args.end,
+        "format": args.format,
+        "includeLegs": not args.no_legs,
+        "includeTranscripts": args.transcripts,
+        "name": args.name,
+        "windowMinutes": args.window_minutes,
+        "maxConcurrency": args.max_concurrency,
+    }))
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result.get("status") == "error" else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,25 @@
 """
 FastMCP entry point for the Conversation State Service tools
 """
+import time
+
+STARTED_AT = time.perf_counter()
+
 import argparse
 import asyncio
+import hmac
 import logging
+import multiprocessing
 import os
+import shutil
+import signal
+import socket
 import sys
+import tempfile
+import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent / "src"))
@@ -16,8 +28,29 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 from src.tools.css_search_tool import CSSSearchTool
 from src.tools.css_contact_detail_tool import CSSContactDetailTool
 from src.tools.css_transcripts_tool import CSSTranscriptsTool
+from src.tools.css_batch_tool import CSSBatchConversationTool
+from src.tools.agent_rollup_tool import AgentPerformanceRollupTool
+from src.tools.transcript_timing_tool import TranscriptTimingTool
+from src.tools.transcript_sentiment_tool import TranscriptSentimentTool
+from src.tools.hourly_rollup_tool import HourlyRollupTool, rollup_materializer
+from src.tools.transcript_search_tool import TranscriptSearchTool
+from src.tools.export_tool import ConversationExportTool
+from src.utils.conversation_store import conversation_store
+from src.utils.fair_scheduler import fair_scheduler
+from src.utils.metrics import instrumented_call, registry
+from src.utils.oauth_client import oauth_client
+from src.utils.request_policy import request_policy
+from src.utils.response_cache import response_cache
+from src.utils.rollup_store import rollup_store
+from src.utils.shared_state import shared_state
+from src.utils.startup import startup_warmup
+from src.utils.transcript_index import transcript_index
 
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+
+startup_warmup.imports_done(STARTED_AT)
 
 
 def setup_logging(level: str = "INFO"):
@@ -31,8 +64,26 @@ def setup_logging(level: str = "INFO"):
     )
 
 
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Hold the pooled upstream HTTP session open for the lifetime of the server"""
+    await oauth_client.start()
+    startup_warmup.start()
+    rollup_materializer.start()
+    try:
+        yield
+    finally:
+        await startup_warmup.close()
+        await rollup_materializer.close()
+        await oauth_client.close()
+        conversation_store.close()
+        rollup_store.close()
+        transcript_index.close()
+        shared_state.close()
+
+
 # Create FastMCP server at module level
-mcp = FastMCP("Conversation State Service MCP Server")
+mcp = FastMCP("Conversation State Service MCP Server", lifespan=lifespan)
 
 
 def register_tools() -> None:
@@ -43,46 +94,529 @@ def register_tools() -> None:
         contactCenterId: str,
         startDate: Optional[str] = None,
         endDate: Optional[str] = None,
+        autoPaginate: bool = False,
+        maxResults: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        sharded: bool = False,
+        shardMinutes: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        compact: bool = False,
+        shortKeys: bool = False,
     ) -> dict:
         """Call Conversation State Service API to retrieve conversation data based on date range and contact center ID.
         - contactCenterId: Contact center ID (e.g., "liveperson:30187337")
         - startDate, endDate: YYYY-MM-DD HH:MM
+        - autoPaginate: Follow all result pages on the server and return them in one response (default: False)
+        - maxResults: Cap on conversations returned when auto-paginating (default: CSS_SEARCH_MAX_RESULTS or 5000)
+        - cursor: Resume position returned in pagination.cursor by an earlier truncated call
+        - limit: Upstream page size
+        - sharded: Split startDate-endDate into time shards fetched concurrently; busy shards are split further (default: False)
+        - shardMinutes: Initial shard width in minutes when sharded (default: CSS_SEARCH_SHARD_MINUTES or 60)
+        - fields: Only return these dotted paths per conversation (e.g. ["conversationInfo.ucid", "conversationInfo.conversations.agentId"])
+        - compact: Drop nulls, empty values and empty attachments (default: False)
+        - shortKeys: Replace known keys with short aliases; the alias map is returned in "keys" (default: False)
         """
         tool = CSSSearchTool()
         args = {
             "contactCenterId": contactCenterId,
             "startDate": startDate,
             "endDate": endDate,
+            "autoPaginate": autoPaginate,
+            "maxResults": maxResults,
+            "cursor": cursor,
+            "limit": limit,
+            "sharded": sharded,
+            "shardMinutes": shardMinutes,
+            "fields": fields,
+            "compact": compact,
+            "shortKeys": shortKeys,
         }
-        return await tool.execute(args)
+        return await instrumented_call("conversation_state_search", tool.execute, args)
 
     @mcp.tool
     async def conversation_state_ucid_detail(
         ucid: str,
         includeConversations: bool = False,
+        contactCenterId: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        compact: bool = False,
+        shortKeys: bool = False,
     ) -> dict:
         """Fetch conversation details using the UCID from Conversation State Service API.
         - ucid: Unique Conversation ID
         - includeConversations: Include conversations for the given UCID (default: False)
+        - contactCenterId: Contact center the conversation belongs to; upstream calls are scheduled under its share (optional)
+        - fields: Only return these dotted paths (e.g. ["conversationInfo.summary", "conversationInfo.conversations.state"])
+        - compact: Drop nulls, empty values and empty attachments (default: False)
+        - shortKeys: Replace known keys with short aliases; the alias map is returned in "keys" (default: False)
         """
         tool = CSSContactDetailTool()
-        args = {"ucid": ucid, "includeConversations": includeConversations}
-        return await tool.execute(args)
+        args = {
+            "ucid": ucid,
+            "includeConversations": includeConversations,
+            "contactCenterId": contactCenterId,
+            "fields": fields,
+            "compact": compact,
+            "shortKeys": shortKeys,
+        }
+        return await instrumented_call("conversation_state_ucid_detail", tool.execute, args)
 
     @mcp.tool
     async def conversation_state_transcripts(
         ucid: str,
+        messageLimit: Optional[int] = None,
+        startTime: Optional[str] = None,
+        endTime: Optional[str] = None,
+        contactCenterId: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        compact: bool = False,
+        shortKeys: bool = False,
     ) -> dict:
-        """Retrieve transcripts for a particular conversation by UCID."""
+        """Retrieve transcripts for a particular conversation by UCID.
+        All transcript pages are followed on the server, so long conversations come back whole.
+        - messageLimit: Maximum number of messages to return
+        - startTime, endTime: Only return messages within this window (ISO-8601, e.g. 2025-10-15T12:00:00Z)
+        - contactCenterId: Contact center the conversation belongs to; upstream calls are scheduled under its share (optional)
+        - fields: Only return these keys per message (e.g. ["participantRole", "content", "absoluteTime"])
+        - compact: Also drop SYSTEM and boilerplate messages, nulls and empty attachments (default: False)
+        - shortKeys: Replace known keys with short aliases; the alias map is returned in "keys" (default: False)
+        """
         tool = CSSTranscriptsTool()
-        args = {"ucid": ucid}
-        return await tool.execute(args)
+        args = {
+            "ucid": ucid,
+            "messageLimit": messageLimit,
+            "startTime": startTime,
+            "endTime": endTime,
+            "contactCenterId": contactCenterId,
+            "fields": fields,
+            "compact": compact,
+            "shortKeys": shortKeys,
+        }
+        return await instrumented_call("conversation_state_transcripts", tool.execute, args)
+
+    @mcp.tool
+    async def conversation_state_batch(
+        ucids: List[str],
+        includeDetail: bool = True,
+        includeTranscripts: bool = True,
+        maxConcurrency: Optional[int] = None,
+        contactCenterId: Optional[str] = None,
+        detailFields: Optional[List[str]] = None,
+        transcriptFields: Optional[List[str]] = None,
+        compact: bool = False,
+        shortKeys: bool = False,
+    ) -> dict:
+        """Fetch details and transcripts for many conversations in one call.
+        - ucids: List of Unique Conversation IDs
+        - includeDetail: Include conversation details for each UCID (default: True)
+        - includeTranscripts: Include transcripts for each UCID (default: True)
+        - maxConcurrency: Max upstream calls in flight (default: CSS_BATCH_CONCURRENCY or 8)
+        - contactCenterId: Contact center the conversations belong to; upstream calls are scheduled under its share (optional)
+        - detailFields, transcriptFields: Field projections, as in the single-conversation tools
+        - compact: Drop nulls, empty values and SYSTEM/boilerplate messages (default: False)
+        - shortKeys: Replace known keys with short aliases; the alias map is returned in "keys" (default: False)
+        Each item carries its own errors, so one failed UCID does not fail the batch.
+        """
+        tool = CSSBatchConversationTool()
+        args = {
+            "ucids": ucids,
+            "includeDetail": includeDetail,
+            "includeTranscripts": includeTranscripts,
+            "maxConcurrency": maxConcurrency,
+            "contactCenterId": contactCenterId,
+            "detailFields": detailFields,
+            "transcriptFields": transcriptFields,
+            "compact": compact,
+            "shortKeys": shortKeys,
+        }
+        return await instrumented_call("conversation_state_batch", tool.execute, args)
+
+    @mcp.tool
+    async def agent_performance_rollup(
+        contactCenterId: str,
+        startDate: str,
+        endDate: str,
+        agentIds: Optional[List[str]] = None,
+        includeBots: bool = False,
+        maxConversations: Optional[int] = None,
+    ) -> dict:
+        """Compute per-agent performance aggregates over a date range on the server.
+        Returns per-agent interaction counts, total and average durationSeconds, completion rate
+        and queue / support level / channel / disconnect reason breakdowns, plus team totals.
+        Use this instead of reading raw conversations when only aggregates are needed.
+        - contactCenterId: Contact center ID
+        - startDate, endDate: YYYY-MM-DD HH:MM
+        - agentIds: Only include these agents (default: all)
+        - includeBots: Include CUSTOM_BOT legs (default: False)
+        - maxConversations: Cap on conversations scanned (default: CSS_ROLLUP_MAX_CONVERSATIONS or 100000)
+        """
+        tool = AgentPerformanceRollupTool()
+        args = {
+            "contactCenterId": contactCenterId,
+            "startDate": startDate,
+            "endDate": endDate,
+            "agentIds": agentIds,
+            "includeBots": includeBots,
+            "maxConversations": maxConversations,
+        }
+        return await instrumented_call("agent_performance_rollup", tool.execute, args)
+
+    @mcp.tool
+    async def transcript_timing_analytics(
+        ucids: Optional[List[str]] = None,
+        contactCenterId: Optional[str] = None,
+        startDate: Optional[str] = None,
+        endDate: Optional[str] = None,
+        idleGapSeconds: float = 60,
+        includePerConversation: bool = True,
+        maxConcurrency: Optional[int] = None,
+    ) -> dict:
+        """Compute response and wait time metrics from transcripts on the server; no message text is returned.
+        Reports first-response time, customer wait for an agent, agent and customer turn latency
+        percentiles, idle gaps and time spent in bot / SYSTEM / agent / customer segments.
+        - ucids: Conversations to analyze, or give contactCenterId with startDate and endDate instead
+        - startDate, endDate: YYYY-MM-DD HH:MM
+        - idleGapSeconds: Gaps between messages at least this long count as idle (default: 60)
+        - includePerConversation: Include per-UCID metrics next to the summary (default: True)
+        - maxConcurrency: Max transcript fetches in flight (default: CSS_BATCH_CONCURRENCY or 8)
+        """
+        tool = TranscriptTimingTool()
+        args = {
+            "ucids": ucids,
+            "contactCenterId": contactCenterId,
+            "startDate": startDate,
+            "endDate": endDate,
+            "idleGapSeconds": idleGapSeconds,
+            "includePerConversation": includePerConversation,
+            "maxConcurrency": maxConcurrency,
+        }
+        return await instrumented_call("transcript_timing_analytics", tool.execute, args)
+
+    @mcp.tool
+    async def transcript_sentiment(
+        ucids: Optional[List[str]] = None,
+        contactCenterId: Optional[str] = None,
+        startDate: Optional[str] = None,
+        endDate: Optional[str] = None,
+        includePerConversation: bool = True,
+        includeMessageScores: bool = False,
+        maxConcurrency: Optional[int] = None,
+    ) -> dict:
+        """Score transcript sentiment on the server with the same lexicon as the LLM server's sentiment
+        analyzer; no message text is returned. Gives per-conversation scores (mean over customer messages),
+        per-role scores and trend slopes (score change per message), escalation and resolution flags,
+        and overall and per-agent summaries.
+        - ucids: Conversations to score, or give contactCenterId with startDate and endDate instead
+        - startDate, endDate: YYYY-MM-DD HH:MM
+        - includePerConversation: Include per-UCID results next to the summary (default: True)
+        - includeMessageScores: Include a score for every message (default: False)
+        - maxConcurrency: Max transcript fetches in flight (default: CSS_BATCH_CONCURRENCY or 8)
+        """
+        tool = TranscriptSentimentTool()
+        args = {
+            "ucids": ucids,
+            "contactCenterId": contactCenterId,
+            "startDate": startDate,
+            "endDate": endDate,
+            "includePerConversation": includePerConversation,
+            "includeMessageScores": includeMessageScores,
+            "maxConcurrency": maxConcurrency,
+        }
+        return await instrumented_call("transcript_sentiment", tool.execute, args)
+
+    @mcp.tool
+    async def hourly_rollup_query(
+        contactCenterId: str,
+        startDate: str,
+        endDate: str,
+        groupBy: Optional[List[str]] = None,
+        agentIds: Optional[List[str]] = None,
+        latestQueues: Optional[List[str]] = None,
+        supportLevels: Optional[List[str]] = None,
+        channels: Optional[List[str]] = None,
+        includeBots: bool = False,
+        refresh: bool = False,
+    ) -> dict:
+        """Answer per-agent / per-queue aggregate questions over any range from pre-aggregated hourly rollups.
+        Returns interaction and conversation counts, completion rate, duration sums and averages and
+        duration histograms per group, plus team totals. Cost grows with hours in the range, not conversations.
+        - contactCenterId: Contact center ID
+        - startDate, endDate: YYYY-MM-DD HH:MM (rounded out to whole hours)
+        - groupBy: Any of "agent", "latestQueue", "supportLevel", "channel", "hour" (default: ["agent"])
+        - agentIds, latestQueues, supportLevels, channels: Only include these values (default: all)
+        - includeBots: Include CUSTOM_BOT legs (default: False)
+        - refresh: Ingest new conversations before answering (default: False; coverage is reported in the result)
+        """
+        tool = HourlyRollupTool()
+        args = {
+            "contactCenterId": contactCenterId,
+            "startDate": startDate,
+            "endDate": endDate,
+            "groupBy": groupBy,
+            "agentIds": agentIds,
+            "latestQueues": latestQueues,
+            "supportLevels": supportLevels,
+            "channels": channels,
+            "includeBots": includeBots,
+            "refresh": refresh,
+        }
+        return await instrumented_call("hourly_rollup_query", tool.execute, args)
+
+    @mcp.tool
+    async def transcript_keyword_search(
+        query: str,
+        mode: str = "all",
+        ucids: Optional[List[str]] = None,
+        contactCenterId: Optional[str] = None,
+        startDate: Optional[str] = None,
+        endDate: Optional[str] = None,
+        roles: Optional[List[str]] = None,
+        agentIds: Optional[List[str]] = None,
+        startTime: Optional[str] = None,
+        endTime: Optional[str] = None,
+        limit: int = 50,
+        snippetsPerConversation: int = 3,
+        indexMissing: bool = True,
+        maxConcurrency: Optional[int] = None,
+    ) -> dict:
+        """Find conversations whose transcripts mention keywords or a phrase (e.g. "refund", "chargeback",
+        "supervisor") using the local full-text index. Returns matching UCIDs with highlighted snippets,
+        best match first, instead of whole transcripts.
+        - query: Keywords or phrase; a trailing * matches prefixes (refund* matches "refunded")
+        - mode: "all" (every keyword), "any" (at least one) or "phrase" (exact sequence) (default: "all")
+        - ucids: Only search these conversations, or give contactCenterId with startDate and endDate instead
+          (default: everything indexed so far)
+        - startDate, endDate: YYYY-MM-DD HH:MM window used to resolve UCIDs
+        - roles: Only match messages from these participant roles, e.g. ["CUSTOMER"]
+        - agentIds: Only match messages sent while one of these agents (participantId) handled the conversation
+        - startTime, endTime: Only match messages sent in this window (ISO-8601)
+        - limit: Maximum conversations to return (default: 50)
+        - snippetsPerConversation: Maximum snippets per conversation (default: 3)
+        - indexMissing: Fetch and index transcripts of the given conversations that are not indexed yet (default: True)
+        - maxConcurrency: Max transcript fetches in flight (default: CSS_BATCH_CONCURRENCY or 8)
+        """
+        tool = TranscriptSearchTool()
+        args = {
+            "query": query,
+            "mode": mode,
+            "ucids": ucids,
+            "contactCenterId": contactCenterId,
+            "startDate": startDate,
+            "endDate": endDate,
+            "roles": roles,
+            "agentIds": agentIds,
+            "startTime": startTime,
+            "endTime": endTime,
+            "limit": limit,
+            "snippetsPerConversation": snippetsPerConversation,
+            "indexMissing": indexMissing,
+            "maxConcurrency": maxConcurrency,
+        }
+        return await instrumented_call("transcript_keyword_search", tool.execute, args)
+
+    @mcp.tool
+    async def conversation_export(
+        contactCenterId: str,
+        startDate: str,
+        endDate: str,
+        format: str = "ndjson",
+        includeLegs: bool = True,
+        includeTranscripts: bool = False,
+        name: Optional[str] = None,
+        windowMinutes: Optional[int] = None,
+        maxConcurrency: Optional[int] = None,
+    ) -> dict:
+        """Export a date range of conversations to local files for offline analysis.
+        Flattens conversationInfo, its legs (conversations[]) and transcripts[] into typed tables
+        (conversations, legs, messages) written in bounded batches. Only file paths, row counts and
+        the schema are returned, never conversation data.
+        - contactCenterId: Contact center ID
+        - startDate, endDate: YYYY-MM-DD HH:MM
+        - format: "ndjson", "parquet" or "arrow"; parquet and arrow need pyarrow installed (default: "ndjson")
+        - includeLegs: Write the legs table (default: True)
+        - includeTranscripts: Fetch transcripts and write the messages table (default: False)
+        - name: Output subdirectory under CSS_EXPORT_DIR (default: contact center and current time)
+        - windowMinutes: Width of the search windows the range is walked in (default: CSS_EXPORT_WINDOW_MINUTES or 60)
+        - maxConcurrency: Max transcript fetches in flight (default: CSS_BATCH_CONCURRENCY or 8)
+        """
+        tool = ConversationExportTool()
+        args = {
+            "contactCenterId": contactCenterId,
+            "startDate": startDate,
+            "endDate": endDate,
+            "format": format,
+            "includeLegs": includeLegs,
+            "includeTranscripts": includeTranscripts,
+            "name": name,
+            "windowMinutes": windowMinutes,
+            "maxConcurrency": maxConcurrency,
+        }
+        return await instrumented_call("conversation_export", tool.execute, args)
 
 
 # Register tools at module level
 register_tools()
 
 
+@mcp.custom_route("/ready", methods=["GET"])
+async def ready(request: Request) -> JSONResponse:
+    """Readiness probe: 200 once the OAuth token, DNS and pooled connections are warmed up, 503 before"""
+    status = startup_warmup.get_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@mcp.custom_route("/stats", methods=["GET"])
+async def stats(request: Request) -> JSONResponse:
+    """Expose internal counters for the OAuth token, upstream requests and response caches"""
+    return JSONResponse({
+        "oauth": oauth_client.get_token_stats(),
+        "upstream": oauth_client.get_request_stats(),
+        "requestPolicy": request_policy.get_stats(),
+        "scheduler": fair_scheduler.get_stats(),
+        "responseCache": response_cache.get_stats(),
+        "conversationStore": conversation_store.get_stats(),
+        "rollups": {**rollup_store.get_stats(), "materializer": rollup_materializer.get_stats()},
+        "transcriptIndex": transcript_index.get_stats(),
+        "sharedState": shared_state.get_stats(),
+        "startup": startup_warmup.get_status(),
+    })
+
+
+def collect_cache_metrics() -> List[str]:
+    """Render OAuth and response cache counters as Prometheus gauges"""
+    lines = []
+    for prefix, values in (
+        ("css_oauth", oauth_client.get_token_stats()),
+        ("css_upstream", oauth_client.get_request_stats()),
+        ("css_response_cache", response_cache.get_stats()),
+    ):
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {float(value)}")
+    return lines
+
+
+registry.register_collector(collect_cache_metrics)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Expose tool and upstream metrics in Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+# Admin routes change server state, so they only answer requests carrying this bearer token
+ADMIN_TOKEN = os.getenv("CSS_ADMIN_TOKEN", "")
+
+
+def admin_denied(request: Request) -> Optional[JSONResponse]:
+    """Return an error response unless the request carries the CSS_ADMIN_TOKEN bearer token"""
+    if not ADMIN_TOKEN:
+        return JSONResponse(
+            {"status": "error", "message": "Admin endpoints are disabled; set CSS_ADMIN_TOKEN to enable them"},
+            status_code=404,
+        )
+    supplied = request.headers.get("authorization", "")
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {ADMIN_TOKEN}".encode()):
+        return JSONResponse({"status": "error", "message": "Unauthorized"}, status_code=401)
+    return None
+
+
+@mcp.custom_route("/admin/rollups/run", methods=["POST"])
+async def run_rollups(request: Request) -> JSONResponse:
+    """Run rollup ingestion now, for the configured contact centers or ?contactCenterId=..."""
+    denied = admin_denied(request)
+    if denied:
+        return denied
+    contact_center_id = request.query_params.get("contactCenterId")
+    results = await rollup_materializer.run_once([contact_center_id] if contact_center_id else None)
+    return JSONResponse({"status": "success", "results": results})
+
+
+@mcp.custom_route("/admin/cache/flush", methods=["POST"])
+async def flush_cache(request: Request) -> JSONResponse:
+    """Flush the response cache, or only the entries for ?ucid=..."""
+    denied = admin_denied(request)
+    if denied:
+        return denied
+    removed = response_cache.invalidate(request.query_params.get("ucid"))
+    return JSONResponse({"status": "success", "removed": removed})
+
+
+def run_worker(host: str, port: int, sock: socket.socket, log_level: str):
+    """Serve MCP requests on the listening socket shared by all --workers processes"""
+    setup_logging(log_level)
+    try:
+        # Requests of one MCP session may land on any worker, so sessions are not kept in memory
+        mcp.run(transport="http", host=host, port=port, sockets=[sock], stateless_http=True, show_banner=False)
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_workers(host: str, port: int, workers: int, log_level: str):
+    """
+    Run several server processes behind one port
+
+    The supervisor binds the port and hands the listening socket to each worker, so the
+    kernel spreads connections across them. Workers share the OAuth token and the response
+    cache through CSS_SHARED_STATE_PATH (unless set, a database in a private temporary
+    directory) and are restarted if they exit.
+    """
+    logger = logging.getLogger(__name__)
+    temporary_dir = None
+    if not os.getenv("CSS_SHARED_STATE_PATH"):
+        # mkdtemp creates the directory 0700, so cached conversations are not readable by other users
+        temporary_dir = tempfile.mkdtemp(prefix="css-mcp-shared-")
+        os.environ["CSS_SHARED_STATE_PATH"] = os.path.join(temporary_dir, "shared.db")
+    if not os.getenv("CSS_STORE_PATH"):
+        logger.warning(
+            "CSS_STORE_PATH is not set: rollups and the transcript index are kept in memory per worker"
+        )
+
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+
+    # Spawned workers import this module fresh instead of inheriting the supervisor's state
+    context = multiprocessing.get_context("spawn")
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+
+    def start(index: int):
+        process = context.Process(
+            target=run_worker, args=(host, port, sock, log_level), name=f"css-mcp-worker-{index}"
+        )
+        process.start()
+        logger.info(f"Started worker {index} (pid {process.pid})")
+        return process, time.monotonic()
+
+    processes = [start(i) for i in range(workers)]
+    try:
+        while not stopping.wait(1.0):
+            for index, (process, started) in enumerate(processes):
+                if process.is_alive():
+                    continue
+                if time.monotonic() - started < 10:
+                    logger.error(f"Worker {index} exited during startup with code {process.exitcode}; stopping")
+                    return
+                logger.warning(f"Worker {index} (pid {process.pid}) exited with code {process.exitcode}; restarting")
+                processes[index] = start(index)
+    except KeyboardInterrupt:
+        logger.info("Server stopped by user")
+    finally:
+        for process, _ in processes:
+            if process.is_alive():
+                process.terminate()
+        for process, _ in processes:
+            process.join(10)
+        sock.close()
+        if temporary_dir:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+
+
 async def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description="Conversation State Service FastMCP Server (HTTP)")
@@ -109,6 +643,12 @@ async def main():
         default=8000,
         help="HTTP port to bind (default: 8000)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Server processes sharing the port, OAuth token and response cache (default: 1)",
+    )
 
     args = parser.parse_args()
 
@@ -119,9 +659,14 @@ async def main():
     logger.info(f"Starting {args.name} (FastMCP)")
     logger.info("Transport: HTTP")
 
+    if args.workers > 1:
+        logger.info(f"Workers: {args.workers}")
+        serve_workers(args.host, args.port, args.workers, args.log_level)
+        return
+
     try:
         # Always run over HTTP (streaming)
-        mcp.run(transport="http", host=args.host, port=args.port)
+        await mcp.run_async(transport="http", host=args.host, port=args.port)
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
@@ -0,0 +1,70 @@
+"""
+Agent Performance Rollup Tool for FastMCP
+"""
+import logging
+from typing import Any, Dict
+import os
+
+from .css_search_tool import CSSSearchTool
+from ..utils.fair_scheduler import BULK, scheduling
+from ..utils.rollups import flatten_legs, summarize_by_agent
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPerformanceRollupTool:
+    async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the tool under the caller's contact center and priority class for upstream scheduling"""
+        with scheduling(arguments.get("contactCenterId"), BULK):
+            return await self._execute(arguments)
+
+    async def _execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Aggregate per-agent interaction counts and durations over a date range on the server"""
+
+        try:
+            # Extract and validate required parameters
+            contact_center_id = arguments.get("contactCenterId")
+            start_date = arguments.get("startDate")
+            end_date = arguments.get("endDate")
+
+            if not contact_center_id or not start_date or not end_date:
+                return {
+                    "status": "error",
+                    "message": "Missing required parameters: contactCenterId, startDate and endDate are required",
+                    "error": "Missing required parameters: contactCenterId, startDate and endDate are required"
+                }
+
+            # Fetch every conversation in the window (served from the local store when enabled)
+            search = await CSSSearchTool().execute({
+                "contactCenterId": contact_center_id,
+                "startDate": start_date,
+                "endDate": end_date,
+                "autoPaginate": True,
+                "maxResults": arguments.get("maxConversations") or int(os.getenv("CSS_ROLLUP_MAX_CONVERSATIONS", "100000")),
+            })
+            if search.get("status") == "error":
+                return search
+
+            conversations = search.get("data", [])
+            legs = flatten_legs(conversations, include_bots=bool(arguments.get("includeBots")))
+            summary = summarize_by_agent(legs, arguments.get("agentIds"))
+
+            pagination = search.get("pagination", {})
+            return {
+                "status": "success",
+                "message": f"Aggregated {len(legs)} interactions across {len(conversations)} conversations",
+                "data": {
+                    **summary,
+                    "window": {"startDate": start_date, "endDate": end_date},
+                    "conversationsScanned": len(conversations),
+                    "truncated": bool(pagination.get("truncated")),
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Error in agent performance rollup: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Internal error: {str(e)}",
+                "error": f"Internal error: {str(e)}"
+            }
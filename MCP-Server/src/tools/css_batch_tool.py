@@ -0,0 +1,106 @@
+"""
+Conversation State Service Batch Tool for FastMCP
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List
+import os
+
+from .css_contact_detail_tool import CSSContactDetailTool
+from .css_transcripts_tool import CSSTranscriptsTool
+from ..utils.fair_scheduler import batch_priority, scheduling
+from ..utils.projection import shape_response
+
+logger = logging.getLogger(__name__)
+
+
+class CSSBatchConversationTool:
+    async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the tool under the caller's contact center and priority class for upstream scheduling"""
+        with scheduling(arguments.get("contactCenterId"), batch_priority(arguments.get("ucids"))):
+            return await self._execute(arguments)
+
+    async def _execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch details and transcripts for many UCIDs concurrently, with per-UCID errors"""
+
+        try:
+            # Extract and validate required parameters
+            ucids = arguments.get("ucids")
+
+            if not ucids or not isinstance(ucids, list):
+                return {
+                    "status": "error",
+                    "message": "Missing required parameter: ucids is required",
+                    "error": "Missing required parameter: ucids must be a non-empty list"
+                }
+
+            # Drop duplicates while keeping the caller's order
+            ucids = list(dict.fromkeys(u for u in ucids if u))
+
+            include_detail = arguments.get("includeDetail", True)
+            include_transcripts = arguments.get("includeTranscripts", True)
+            max_concurrency = arguments.get("maxConcurrency") or int(os.getenv("CSS_BATCH_CONCURRENCY", "8"))
+            semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+
+            # Projection and compact mode are applied per item; short keys across the whole batch
+            detail_args = {"fields": arguments.get("detailFields"), "compact": arguments.get("compact")}
+            transcripts_args = {"fields": arguments.get("transcriptFields"), "compact": arguments.get("compact")}
+
+            detail_tool = CSSContactDetailTool()
+            transcripts_tool = CSSTranscriptsTool()
+
+            async def run_bounded(tool, tool_args: Dict[str, Any]) -> Any:
+                async with semaphore:
+                    try:
+                        return await tool.execute(tool_args)
+                    except Exception as e:
+                        return e
+
+            async def fetch_one(ucid: str) -> Dict[str, Any]:
+                # Detail goes first so the transcripts fetch sees the COMPLETED state and updatedAt
+                # it caches; they pick the transcript TTL and whether it is persisted
+                results = {}
+                if include_detail:
+                    results["detail"] = await run_bounded(detail_tool, {"ucid": ucid, **detail_args})
+                if include_transcripts:
+                    results["transcripts"] = await run_bounded(transcripts_tool, {"ucid": ucid, **transcripts_args})
+
+                item: Dict[str, Any] = {"ucid": ucid, "errors": {}}
+                for key, result in results.items():
+                    if isinstance(result, Exception):
+                        item["errors"][key] = f"Internal error: {str(result)}"
+                    elif result.get("status") == "error":
+                        item["errors"][key] = result.get("error") or result.get("message")
+                    else:
+                        item[key] = result.get("data")
+                return item
+
+            items: List[Dict[str, Any]] = await asyncio.gather(*(fetch_one(ucid) for ucid in ucids))
+
+            failed = sum(1 for item in items if item["errors"])
+            if failed == 0:
+                status = "success"
+            elif failed < len(items):
+                status = "partial"
+            else:
+                status = "error"
+
+            return shape_response({
+                "status": status,
+                "message": f"Fetched {len(items) - failed} of {len(items)} conversations without errors",
+                "data": items,
+                "summary": {
+                    "requested": len(items),
+                    "succeeded": len(items) - failed,
+                    "failed": failed,
+                    "maxConcurrency": int(max_concurrency),
+                }
+            }, {"shortKeys": arguments.get("shortKeys")})
+
+        except Exception as e:
+            logger.error(f"Error in conversation state batch service: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Internal error: {str(e)}",
+                "error": f"Internal error: {str(e)}"
+            }
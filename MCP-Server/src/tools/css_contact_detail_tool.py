@@ -3,16 +3,27 @@ Conversation State Service Contact Detail Tool for FastMCP
 """
 import logging
 from typing import Any, Dict
-import os
 import aiohttp
 
+from ..utils.conversation_store import conversation_store
+from ..utils.endpoints import conversation_endpoints
+from ..utils.fair_scheduler import scheduling
+from ..utils.metrics import log_payload
 from ..utils.oauth_client import make_authenticated_request
+from ..utils.projection import shape_response
+from ..utils.response_cache import conversation_status, response_cache
 
 logger = logging.getLogger(__name__)
 
 
 class CSSContactDetailTool:
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the tool and apply any requested field projection or compact mode"""
+        with scheduling(arguments.get("contactCenterId")):
+            result = await self._execute(arguments)
+        return shape_response(result, arguments)
+
+    async def _execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the conversation state service API call to get conversation details by UCID"""
         
         try:
@@ -26,6 +37,18 @@ class CSSContactDetailTool:
                     "error": "Missing required parameter: ucid is required"
                 }
             
+            # Serve repeated lookups from the response cache
+            cached = await response_cache.lookup("detail", ucid)
+            if cached is not None:
+                return cached
+
+            if conversation_store.enabled:
+                stored = await conversation_store.get_detail(ucid)
+                if stored is not None:
+                    completed, updated_at = conversation_status(stored["data"])
+                    response_cache.put("detail", ucid, stored, completed=completed, updated_at=updated_at)
+                    return stored
+            
             # Build API request parameters
             api_params = {}
 
@@ -35,9 +58,7 @@ class CSSContactDetailTool:
             #     api_params["includeConversations"] = arguments["includeConversations"]
             
             # Get API configuration
-            api_base_url = os.getenv("CONVERSATION_API_BASE_URL", "https://conversation-state-service.care.dev-godaddy.com")
-            api_endpoint = os.getenv("CONVERSATION_STATE_UCID_ENDPOINT", "/conversation-state/{ucid}")
-            url = f"{api_base_url}{api_endpoint.format(ucid=ucid)}"
+            url = conversation_endpoints.detail_url(ucid)
             
             # Make authenticated API request using the common OAuth utility
             response = await make_authenticated_request("GET", url, params=api_params)
@@ -51,14 +72,21 @@ class CSSContactDetailTool:
             
             if response.status == 200:
                 data = await response.json()
-                print(f"CSS Contact Detail Tool response: {data}")
+                log_payload(logger, "CSS Contact Detail Tool response", data)
 
                 # Return the API response as-is to match the schema
-                return {
+                result = {
                     "status": data.get("status", "success"),
                     "message": data.get("message", "Conversation retrieved successfully."),
                     "data": data.get("data", [])
                 }
+                if result["status"] != "error":
+                    completed, updated_at = conversation_status(result["data"])
+                    response_cache.observe(ucid, updated_at)
+                    response_cache.put("detail", ucid, result, completed=completed, updated_at=updated_at)
+                    if completed and conversation_store.enabled:
+                        await conversation_store.put_detail(ucid, result, updated_at)
+                return result
             else:
                 error_text = await response.text()
                 return {
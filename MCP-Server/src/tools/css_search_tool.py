@@ -1,24 +1,41 @@
 """
 Conversation State Service Tools for FastMCP
 """
+import asyncio
+import base64
+import json
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 import os
 import aiohttp
 
+from ..utils.metrics import log_payload
 from ..utils.oauth_client import make_authenticated_request
+from ..utils.projection import field_tree, project, shape_response
+from ..utils.conversation_store import conversation_store, format_search_date, to_epoch
+from ..utils.endpoints import conversation_endpoints
+from ..utils.fair_scheduler import BULK, scheduling
+from ..utils.response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
 
 class CSSSearchTool:
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the tool and apply any requested field projection or compact mode"""
+        # Multi-page searches are bulk work for the contact center's share of upstream slots
+        bulk = arguments.get("autoPaginate") or arguments.get("sharded")
+        with scheduling(arguments.get("contactCenterId"), BULK if bulk else None):
+            result = await self._execute(arguments)
+        return shape_response(result, arguments)
+
+    async def _execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the conversation state service API call"""
         
         try:
             # Extract and validate required parameters
-            contact_center_id = 'gd-dev-us-001' #arguments.get("contactCenterId")
-            
+            contact_center_id = arguments.get("contactCenterId")
+
             if not contact_center_id:
                 return {
                     "status": "error",
@@ -33,7 +50,7 @@ class CSSSearchTool:
             
             # Add optional parameters
             optional_params = [
-                "startDate", "endDate"
+                "startDate", "endDate", "limit"
             ]
 
             
@@ -42,39 +59,74 @@ class CSSSearchTool:
                     api_params[param] = arguments[param]
             
             # Get API configuration
-            api_base_url = os.getenv("CONVERSATION_API_BASE_URL", "https://conversation-state-service.care.dev-godaddy.com")
-            api_endpoint = os.getenv("CONVERSATION_STATE_SEARCH_ENDPOINT", "/conversation-state/filters/search")
-            url = f"{api_base_url}{api_endpoint}"
-            
-            # Make authenticated API request using the common OAuth utility
-            print(f"CSS Search Tool API Parameters: {api_params}")
-            response = await make_authenticated_request("GET", url, params=api_params)
+            url = conversation_endpoints.search_url()
             
-            if not response:
+            # Resume from a cursor returned by an earlier call
+            skip = 0
+            next_token = None
+            if arguments.get("cursor"):
+                next_token, skip = self._decode_cursor(arguments["cursor"])
+                if next_token:
+                    api_params["nextToken"] = next_token
+
+            max_results = arguments.get("maxResults") or int(os.getenv("CSS_SEARCH_MAX_RESULTS", "5000"))
+
+            start_ts = to_epoch(api_params.get("startDate"))
+            end_ts = to_epoch(api_params.get("endDate"))
+            sharded = bool(arguments.get("sharded"))
+            shard_seconds = 60 * int(arguments.get("shardMinutes") or os.getenv("CSS_SEARCH_SHARD_MINUTES", "60"))
+
+            # Answer multi-page date-range searches from the local store, fetching only unsynced ranges
+            # upstream; single-page searches keep the upstream page and its nextToken. Store cursors
+            # carry only an offset into the window, so they resume from the store as well
+            multi_page = arguments.get("autoPaginate") or sharded
+            from_store = (
+                conversation_store.enabled and multi_page and start_ts is not None and end_ts is not None
+                and not next_token
+            )
+            if sharded and (start_ts is None or end_ts is None or (arguments.get("cursor") and not from_store)):
                 return {
                     "status": "error",
-                    "message": "Failed to make authenticated request",
-                    "error": "Failed to make authenticated request to conversation API"
+                    "message": "Sharded search requires startDate and endDate",
+                    "error": "Sharded search requires startDate and endDate (YYYY-MM-DD HH:MM) and cannot resume from a cursor"
                 }
+
+            if from_store:
+                # endDate has minute precision and is treated as inclusive
+                return await self._execute_from_store(
+                    url, api_params, contact_center_id, start_ts, end_ts + 60, int(max_results),
+                    shard_seconds if sharded else None, skip,
+                )
+
+            # Project items as each page is walked so merged results never hold every full item;
+            # the UCID and updatedAt are kept for dedupe and cache invalidation until shaping
+            item_tree = None
+            if arguments.get("fields"):
+                item_tree = field_tree(list(arguments["fields"]) + ["conversationInfo.ucid", "conversationInfo.updatedAt"])
+
+            if sharded:
+                return await self._execute_sharded(
+                    url, api_params, start_ts, end_ts + 60, int(max_results), shard_seconds, item_tree
+                )
+
+            if arguments.get("autoPaginate"):
+                return await self._execute_paginated(url, api_params, int(max_results), skip, item_tree)
+
+            # Make authenticated API request using the common OAuth utility
+            logger.debug(f"CSS Search Tool API Parameters: {api_params}")
+            data, error = await self._fetch_page(url, api_params, item_tree)
+            if error:
+                return error
+            log_payload(logger, "CSS Search Tool response", data)
+            response_cache.observe_conversations(data.get("data", []) or [])
             
-            if response.status == 200:
-                data = await response.json()
-                print(f"CSS Search Tool response: {data}")
-                
-                # Return the API response as-is to match the schema
-                return {
-                    "status": data.get("status", "success"),
-                    "message": data.get("message", "Conversation data retrieved successfully"),
-                    "data": data.get("data", []),
-                    "pagination": data.get("pagination", {})
-                }
-            else:
-                error_text = await response.text()
-                return {
-                    "status": "error",
-                    "message": f"API request failed with status {response.status}",
-                    "error": f"API request failed with status {response.status}: {error_text}"
-                }
+            # Return the API response as-is to match the schema
+            return {
+                "status": data.get("status", "success"),
+                "message": data.get("message", "Conversation data retrieved successfully"),
+                "data": data.get("data", [])[skip:],
+                "pagination": data.get("pagination", {})
+            }
                         
         except aiohttp.ClientError as e:
             return {
@@ -90,3 +142,325 @@ class CSSSearchTool:
                 "error": f"Internal error: {str(e)}"
             }
 
+
+    async def _fetch_page(
+        self, url: str, api_params: Dict[str, Any], item_tree: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Fetch and decode one search page, returning (data, error_response)
+
+        Items are projected with ``item_tree`` if given.
+        """
+        response = await make_authenticated_request("GET", url, params=api_params)
+        
+        if not response:
+            return None, {
+                "status": "error",
+                "message": "Failed to make authenticated request",
+                "error": "Failed to make authenticated request to conversation API"
+            }
+        
+        if response.status == 200:
+            document = await response.json()
+            # The decoded document is shared with coalesced callers, so the page is a shallow copy
+            data = dict(document) if isinstance(document, dict) else {}
+            data["data"] = [project(item, item_tree) for item in data.get("data") or []]
+            return data, None
+
+        error_text = await response.text()
+        return None, {
+            "status": "error",
+            "message": f"API request failed with status {response.status}",
+            "error": f"API request failed with status {response.status}: {error_text}"
+        }
+
+    async def _execute_paginated(
+        self,
+        url: str,
+        api_params: Dict[str, Any],
+        max_results: int,
+        skip: int = 0,
+        item_tree: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Follow upstream pagination on the server, prefetching the next page while the current one is processed"""
+        max_pages = int(os.getenv("CSS_SEARCH_MAX_PAGES", "200"))
+        results: List[Dict[str, Any]] = []
+        seen_ucids = set()
+        pages_fetched = 0
+        cursor = None
+        upstream_pagination: Dict[str, Any] = {}
+        page_token = api_params.get("nextToken")
+
+        next_page = asyncio.create_task(self._fetch_page(url, dict(api_params), item_tree))
+        try:
+            while next_page is not None:
+                data, error = await next_page
+                next_page = None
+
+                if error:
+                    if not results:
+                        return error
+                    # Hand back what we have and let the caller resume from the failed page
+                    logger.warning(f"Search pagination stopped after {pages_fetched} pages: {error['error']}")
+                    cursor = self._encode_cursor(page_token, skip)
+                    break
+
+                pages_fetched += 1
+                items = data.get("data", []) or []
+                response_cache.observe_conversations(items)
+                upstream_pagination = data.get("pagination", {}) or {}
+                token = self._next_token(upstream_pagination)
+
+                # Start fetching the next page before working through this one
+                remaining = max_results - len(results)
+                if token and token != page_token and len(items) - skip < remaining and pages_fetched < max_pages:
+                    next_params = dict(api_params)
+                    next_params["nextToken"] = token
+                    next_page = asyncio.create_task(self._fetch_page(url, next_params, item_tree))
+
+                for index in range(skip, len(items)):
+                    if len(results) >= max_results:
+                        cursor = self._encode_cursor(page_token, index)
+                        break
+                    item = items[index]
+                    ucid = (item.get("conversationInfo") or {}).get("ucid")
+                    if ucid:
+                        if ucid in seen_ucids:
+                            continue
+                        seen_ucids.add(ucid)
+                    results.append(item)
+
+                if cursor is None and next_page is None and token and token != page_token:
+                    # Stopped on the result or page cap with more pages upstream
+                    cursor = self._encode_cursor(token, 0)
+
+                page_token = token
+                skip = 0
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+        return {
+            "status": "success",
+            "message": f"Retrieved {len(results)} conversations across {pages_fetched} pages",
+            "data": results,
+            "pagination": {
+                "pagesFetched": pages_fetched,
+                "returned": len(results),
+                "truncated": cursor is not None,
+                "cursor": cursor,
+                "upstream": upstream_pagination,
+            }
+        }
+
+    async def _execute_from_store(
+        self,
+        url: str,
+        api_params: Dict[str, Any],
+        contact_center_id: str,
+        start_ts: float,
+        end_ts: float,
+        max_results: int,
+        shard_seconds: Optional[int] = None,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """Sync the ranges of the window the store does not cover yet or holds stale rows for, then answer from the store
+
+        Results are newest first; ``offset`` skips the ones returned by earlier calls, and a
+        truncated answer carries a cursor with the next offset.
+        """
+        gaps = await conversation_store.missing_ranges(contact_center_id, start_ts, end_ts)
+        sync_max_results = int(os.getenv("CSS_STORE_SYNC_MAX_RESULTS", "100000"))
+
+        async def sync_range(gap_start: float, gap_end: float) -> Optional[Dict[str, Any]]:
+            if shard_seconds:
+                result = await self._execute_sharded(
+                    url, api_params, gap_start, gap_end, sync_max_results, shard_seconds
+                )
+                if result.get("status") != "error" and result["pagination"]["failedShards"]:
+                    # Store what arrived, but leave the range unsynced so it is fetched again
+                    await conversation_store.upsert_conversations(contact_center_id, result["data"])
+                    return {
+                        "status": "error",
+                        "message": "Some search shards failed",
+                        "error": result["pagination"]["failedShards"][0]["error"]
+                    }
+            else:
+                gap_params = dict(api_params)
+                gap_params.pop("nextToken", None)
+                gap_params["startDate"] = format_search_date(gap_start)
+                gap_params["endDate"] = format_search_date(max(gap_start, gap_end - 60))
+                result = await self._execute_paginated(url, gap_params, sync_max_results)
+            if result.get("status") == "error":
+                return result
+            await conversation_store.upsert_conversations(contact_center_id, result["data"])
+            if not result["pagination"]["truncated"]:
+                await conversation_store.mark_synced(contact_center_id, gap_start, gap_end)
+            return None
+
+        errors = [e for e in await asyncio.gather(*(sync_range(a, b) for a, b in gaps)) if e]
+        if errors and gaps == [(start_ts, end_ts)]:
+            # Nothing for this window was stored before, so there is nothing to fall back on
+            return errors[0]
+
+        # One row past the cap tells whether the window has more
+        results = await conversation_store.query_conversations(
+            contact_center_id, start_ts, end_ts, max_results + 1, offset
+        )
+        truncated = len(results) > max_results
+        results = results[:max_results]
+        return {
+            "status": "success",
+            "message": f"Retrieved {len(results)} conversations ({len(gaps)} ranges fetched upstream)",
+            "data": results,
+            "pagination": {
+                "source": "store",
+                "returned": len(results),
+                "truncated": truncated,
+                "cursor": self._encode_cursor(None, offset + len(results)) if truncated else None,
+                "upstreamRanges": len(gaps),
+                "incomplete": bool(errors),
+            }
+        }
+
+    async def _execute_sharded(
+        self,
+        url: str,
+        api_params: Dict[str, Any],
+        start_ts: float,
+        end_ts: float,
+        max_results: int,
+        shard_seconds: int,
+        item_tree: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Search [start_ts, end_ts) as concurrent time shards and merge them deduplicated by UCID
+
+        A shard whose first page has more pages upstream (or, without pagination info, comes back
+        near the requested page size) is split in half, down to one minute; a single busy minute
+        is paginated instead.
+
+        Args:
+            url: Search endpoint URL
+            api_params: Base query parameters (startDate/endDate are replaced per shard)
+            start_ts: Window start in epoch seconds (minute aligned)
+            end_ts: Window end in epoch seconds, exclusive (minute aligned)
+            max_results: Cap on merged conversations
+            shard_seconds: Initial shard width in seconds
+            item_tree: Field selection applied to items while decoding
+
+        Returns:
+            Search response with sharding statistics in "pagination"
+        """
+        semaphore = asyncio.Semaphore(max(1, int(os.getenv("CSS_SEARCH_SHARD_CONCURRENCY", "8"))))
+        page_limit = int(api_params["limit"]) if api_params.get("limit") else None
+        shard_stats = {"shards": 0, "splits": 0, "paginatedShards": 0}
+        failed_shards: List[Dict[str, Any]] = []
+        truncated = False
+
+        async def fetch_shard(shard_start: float, shard_end: float) -> List[Dict[str, Any]]:
+            nonlocal truncated
+            params = dict(api_params)
+            params.pop("nextToken", None)
+            params["startDate"] = format_search_date(shard_start)
+            params["endDate"] = format_search_date(shard_end - 60)  # endDate is an inclusive minute
+            async with semaphore:
+                data, error = await self._fetch_page(url, params, item_tree)
+            shard_stats["shards"] += 1
+            if error:
+                failed_shards.append({"startDate": params["startDate"], "endDate": params["endDate"], "error": error["error"]})
+                return []
+
+            items = data.get("data", []) or []
+            response_cache.observe_conversations(items)
+            upstream_pagination = data.get("pagination", {}) or {}
+            token = self._next_token(upstream_pagination)
+            # Without a pagination object, a page close to the requested size is the only hint of more data
+            near_limit = not upstream_pagination and page_limit is not None and len(items) >= page_limit * 0.9
+            if not token and not near_limit:
+                return items
+
+            if shard_end - shard_start > 60:
+                # Split on a minute boundary; the items already fetched are kept and deduplicated later
+                middle = shard_start + ((shard_end - shard_start) // 120) * 60
+                shard_stats["splits"] += 1
+                left, right = await asyncio.gather(
+                    fetch_shard(shard_start, middle), fetch_shard(middle, shard_end)
+                )
+                return items + left + right
+
+            if not token:
+                return items
+            # A single busy minute cannot be split further, so follow its pages
+            shard_stats["paginatedShards"] += 1
+            params["nextToken"] = token
+            result = await self._execute_paginated(url, params, max_results, 0, item_tree)
+            if result.get("status") == "error":
+                failed_shards.append({"startDate": params["startDate"], "endDate": params["endDate"], "error": result["error"]})
+                return items
+            truncated = truncated or result["pagination"]["truncated"]
+            return items + result["data"]
+
+        bounds = []
+        shard_start = start_ts
+        while shard_start < end_ts:
+            bounds.append((shard_start, min(end_ts, shard_start + max(60, shard_seconds))))
+            shard_start = bounds[-1][1]
+        shards = await asyncio.gather(*(fetch_shard(a, b) for a, b in bounds))
+
+        if failed_shards and len(failed_shards) == shard_stats["shards"]:
+            return {
+                "status": "error",
+                "message": "All search shards failed",
+                "error": failed_shards[0]["error"]
+            }
+
+        results: List[Dict[str, Any]] = []
+        seen_ucids = set()
+        for items in shards:
+            for item in items:
+                ucid = (item.get("conversationInfo") or {}).get("ucid")
+                if ucid:
+                    if ucid in seen_ucids:
+                        continue
+                    seen_ucids.add(ucid)
+                results.append(item)
+        if len(results) > max_results:
+            results = results[:max_results]
+            truncated = True
+
+        return {
+            "status": "success",
+            "message": f"Retrieved {len(results)} conversations across {shard_stats['shards']} shards",
+            "data": results,
+            "pagination": {
+                "source": "shards",
+                "returned": len(results),
+                "truncated": truncated,
+                "incomplete": bool(failed_shards),
+                "failedShards": failed_shards,
+                **shard_stats,
+            }
+        }
+
+    @staticmethod
+    def _next_token(pagination: Dict[str, Any]) -> Optional[str]:
+        """Extract the upstream continuation token from a pagination object"""
+        token = pagination.get("nextToken") or pagination.get("lastEvaluatedKey")
+        if isinstance(token, dict):
+            return json.dumps(token)
+        return token or None
+
+    @staticmethod
+    def _encode_cursor(next_token: Optional[str], skip: int) -> str:
+        """Encode a resumable position (upstream token plus items already consumed)"""
+        raw = json.dumps({"nextToken": next_token, "skip": skip})
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+        """Decode a cursor from _encode_cursor; plain upstream tokens are accepted as-is"""
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            return position.get("nextToken"), int(position.get("skip", 0))
+        except (ValueError, AttributeError):
+            return cursor, 0
@@ -2,17 +2,38 @@
 Conversation State Service Transcripts Tool for FastMCP
 """
 import logging
-from typing import Any, Dict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 import os
 import aiohttp
 
+from ..utils.conversation_store import conversation_store
+from ..utils.endpoints import conversation_endpoints
+from ..utils.fair_scheduler import scheduling
+from ..utils.metrics import log_payload
 from ..utils.oauth_client import make_authenticated_request
+from ..utils.projection import shape_response
+from ..utils.response_cache import response_cache
+from ..utils.transcript_index import transcript_index
 
 logger = logging.getLogger(__name__)
 
 
 class CSSTranscriptsTool:
+    def __init__(self, wait_for_index: bool = False):
+        """
+        Args:
+            wait_for_index: Index fetched transcripts before returning instead of in the background
+        """
+        self.wait_for_index = wait_for_index
+
     async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the tool and apply any requested field projection or compact mode"""
+        with scheduling(arguments.get("contactCenterId")):
+            result = await self._execute(arguments)
+        return shape_response(result, arguments, transcripts=True)
+
+    async def _execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the conversation state service API call to retrieve transcripts"""
         
         try:
@@ -26,37 +47,40 @@ class CSSTranscriptsTool:
                     "error": "Missing required parameter: ucid is required"
                 }
             
-            # Get API configuration
-            api_base_url = os.getenv("CONVERSATION_API_BASE_URL", "https://conversation-state-service.care.dev-godaddy.com")
-            api_endpoint = os.getenv("CONVERSATION_STATE_TRANSCRIPTS_ENDPOINT", "/transcripts/ucid/{ucid}")
-            url = f"{api_base_url}{api_endpoint.format(ucid=ucid)}"
-            
-            # Make authenticated API request using the common OAuth utility
-            response = await make_authenticated_request("GET", url)
-            
-            if not response:
-                return {
-                    "status": "error",
-                    "message": "Failed to make authenticated request",
-                    "error": "Failed to make authenticated request to conversation API"
-                }
-            
-            if response.status == 200:
-                data = await response.json()
-                print(f"\n\n CSS Transcripts Tool response: {data}")
-                # Return the API response as-is to match the schema
-                return {
-                    "status": data.get("status", "success"),
-                    "message": data.get("message", "Transcripts fetched successfully for ucid: {ucid}".format(ucid=ucid)),
-                    "data": data.get("data", {})
-                }
-            else:
-                error_text = await response.text()
-                return {
-                    "status": "error",
-                    "message": f"API request failed with status {response.status}",
-                    "error": f"API request failed with status {response.status}: {error_text}"
-                }
+            message_limit = arguments.get("messageLimit")
+            start_time = self._parse_time(arguments.get("startTime"))
+            end_time = self._parse_time(arguments.get("endTime"))
+
+            # Serve repeated lookups from the response cache
+            cache_variant = f"{message_limit}|{arguments.get('startTime')}|{arguments.get('endTime')}"
+            cached = await response_cache.lookup("transcripts", ucid, cache_variant)
+            if cached is not None:
+                return cached
+
+            # Only complete, unfiltered transcripts are persisted
+            persistable = not (message_limit or start_time or end_time)
+            if persistable and conversation_store.enabled:
+                stored = await conversation_store.get_transcripts(ucid)
+                if stored is not None:
+                    response_cache.put("transcripts", ucid, stored, completed=True, variant=cache_variant)
+                    await self._index(ucid, (stored.get("data") or {}).get("transcripts") or [], if_missing=True)
+                    return stored
+
+            result, complete = await self.fetch_transcript(ucid, message_limit, start_time, end_time)
+            if complete and result["status"] != "error":
+                response_cache.put(
+                    "transcripts",
+                    ucid,
+                    result,
+                    completed=response_cache.is_completed(ucid),
+                    updated_at=response_cache.updated_at(ucid),
+                    variant=cache_variant,
+                )
+                if persistable and conversation_store.enabled and response_cache.is_completed(ucid):
+                    await conversation_store.put_transcripts(ucid, result, response_cache.updated_at(ucid))
+                if persistable:
+                    await self._index(ucid, result["data"]["transcripts"])
+            return result
                         
         except aiohttp.ClientError as e:
             return {
@@ -71,3 +95,150 @@ class CSSTranscriptsTool:
                 "message": f"Internal error: {str(e)}",
                 "error": f"Internal error: {str(e)}"
             }
+
+    async def fetch_transcript(
+        self,
+        ucid: str,
+        message_limit: Optional[int] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Fetch a transcript upstream, following lastEvaluatedKey pages, without caching, persisting or indexing it
+
+        Args:
+            ucid: Unique Conversation ID
+            message_limit: Stop after this many messages
+            start_time: Skip messages sent before this time
+            end_time: Stop at the first message sent after this time
+
+        Returns:
+            (response, complete); complete is False when paging stopped early on an error or the page cap
+        """
+        url = conversation_endpoints.transcripts_url(ucid)
+        max_pages = int(os.getenv("CSS_TRANSCRIPTS_MAX_PAGES", "100"))
+        # Follow lastEvaluatedKey upstream, keeping one envelope and appending messages per page
+        envelope: Dict[str, Any] = {}
+        messages = []
+        seen_message_ids = set()
+        last_key = None
+        pages_fetched = 0
+        truncated = False
+        incomplete = False
+        first_response: Dict[str, Any] = {}
+
+        while pages_fetched < max_pages:
+            api_params = {"lastEvaluatedKey": last_key} if last_key else None
+
+            # Make authenticated API request using the common OAuth utility
+            data, error = await self._fetch_page(url, api_params)
+            if error:
+                if not pages_fetched:
+                    return error, False
+                logger.warning(f"Transcript paging for {ucid} stopped after {pages_fetched} pages: {error['error']}")
+                truncated = True
+                incomplete = True
+                break
+
+            pages_fetched += 1
+            new_messages = 0
+            past_window = False
+            page = data.get("data") or {}
+            # Messages are taken one at a time so paging can stop at the limit or window end
+            for message in page.get("transcripts") or []:
+                message_id = message.get("messageId")
+                if message_id:
+                    if message_id in seen_message_ids:
+                        continue
+                    seen_message_ids.add(message_id)
+                new_messages += 1
+
+                if start_time or end_time:
+                    sent_at = self._parse_time(message.get("absoluteTime"))
+                    if sent_at and start_time and sent_at < start_time:
+                        continue
+                    if sent_at and end_time and sent_at > end_time:
+                        past_window = True
+                        continue
+
+                if message_limit and len(messages) >= message_limit:
+                    truncated = True
+                    break
+                messages.append(message)
+
+            if not first_response:
+                first_response = data
+            if not envelope:
+                envelope = {k: v for k, v in page.items() if k not in ("transcripts", "lastEvaluatedKey")}
+
+            next_key = page.get("lastEvaluatedKey")
+            # The final page echoes the key of its last message, so stop once nothing new arrives
+            if truncated or past_window or not next_key or next_key == last_key or not new_messages:
+                last_key = next_key or last_key
+                break
+            last_key = next_key
+        else:
+            truncated = True
+            incomplete = True
+
+        logger.debug(f"CSS Transcripts Tool fetched {pages_fetched} pages, {len(messages)} messages for {ucid}")
+        log_payload(logger, "CSS Transcripts Tool response", messages)
+        envelope["lastEvaluatedKey"] = last_key
+        envelope["transcripts"] = messages
+        envelope["pagesFetched"] = pages_fetched
+        envelope["truncated"] = truncated
+
+        # Return the API response as-is to match the schema
+        result = {
+            "status": first_response.get("status", "success"),
+            "message": first_response.get("message", "Transcripts fetched successfully for ucid: {ucid}".format(ucid=ucid)),
+            "data": envelope
+        }
+        return result, not incomplete
+
+    async def _index(self, ucid: str, messages: List[Dict[str, Any]], if_missing: bool = False):
+        """Add a complete transcript to the full-text index; indexing failures never fail the fetch"""
+        if not self.wait_for_index:
+            transcript_index.schedule(ucid, messages, if_missing)
+            return
+        try:
+            await transcript_index.add(ucid, messages, if_missing)
+        except Exception as e:
+            logger.warning(f"Failed to index transcript for {ucid}: {str(e)}")
+
+    async def _fetch_page(
+        self, url: str, api_params: Optional[Dict[str, Any]]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Fetch and decode one transcript page, returning (data, error_response)"""
+        response = await make_authenticated_request("GET", url, params=api_params)
+        
+        if not response:
+            return None, {
+                "status": "error",
+                "message": "Failed to make authenticated request",
+                "error": "Failed to make authenticated request to conversation API"
+            }
+        
+        if response.status == 200:
+            document = await response.json()
+            return (document if isinstance(document, dict) else {}), None
+
+        error_text = await response.text()
+        return None, {
+            "status": "error",
+            "message": f"API request failed with status {response.status}",
+            "error": f"API request failed with status {response.status}: {error_text}"
+        }
+
+    @staticmethod
+    def _parse_time(value: Optional[str]) -> Optional[datetime]:
+        """Parse an ISO-8601 timestamp such as 2025-10-15T12:14:27.937Z"""
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed
@@ -0,0 +1,203 @@
+"""
+Conversation Export Tool for FastMCP
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from .css_search_tool import CSSSearchTool
+from .css_transcripts_tool import CSSTranscriptsTool
+from ..utils.conversation_store import format_search_date, to_epoch
+from ..utils.exporter import EXPORT_FORMATS, ExportWriter, conversation_row, leg_rows, message_rows, schema_description
+from ..utils.fair_scheduler import BULK, scheduling
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class ConversationExportTool:
+    async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Stream a date range of conversations to local files; only paths, row counts and the schema are returned"""
+
+        try:
+            # Extract and validate required parameters
+            contact_center_id = arguments.get("contactCenterId")
+            start_ts = to_epoch(arguments.get("startDate"))
+            end_ts = to_epoch(arguments.get("endDate"))
+            file_format = (arguments.get("format") or "ndjson").lower()
+
+            if not contact_center_id or start_ts is None or end_ts is None:
+                return {
+                    "status": "error",
+                    "message": "Missing required parameter: contactCenterId, startDate and endDate are required",
+                    "error": "Missing required parameter: contactCenterId, startDate and endDate (YYYY-MM-DD HH:MM) are required"
+                }
+            if end_ts < start_ts:
+                return {
+                    "status": "error",
+                    "message": "endDate is before startDate",
+                    "error": "endDate is before startDate"
+                }
+            if file_format not in EXPORT_FORMATS:
+                return {
+                    "status": "error",
+                    "message": f"Unknown format: {file_format}",
+                    "error": f"Unknown format: {file_format} (available: {', '.join(EXPORT_FORMATS)})"
+                }
+
+            # Exports always land under CSS_EXPORT_DIR; the name only picks a subdirectory
+            name = arguments.get("name") or (
+                f"{contact_center_id}_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}"
+            )
+            name = _UNSAFE_NAME.sub("_", name).strip("._") or "export"
+            directory = os.path.join(os.path.abspath(os.getenv("CSS_EXPORT_DIR", "exports")), name)
+
+            tables = ["conversations"]
+            if arguments.get("includeLegs", True):
+                tables.append("legs")
+            if arguments.get("includeTranscripts", False):
+                tables.append("messages")
+
+            try:
+                writer = ExportWriter(
+                    directory, file_format, int(os.getenv("CSS_EXPORT_BATCH_ROWS", "5000")), tuple(tables)
+                )
+            except ValueError as e:
+                return {
+                    "status": "error",
+                    "message": str(e),
+                    "error": str(e)
+                }
+
+            with scheduling(contact_center_id, BULK):
+                try:
+                    summary = await self._export(writer, contact_center_id, start_ts, end_ts, arguments)
+                finally:
+                    files = await asyncio.to_thread(writer.close)
+
+            errors = summary.pop("errors")
+            return {
+                "status": "success" if not errors and not summary["truncatedWindows"] else "partial",
+                "message": f"Exported {files['conversations']['rows']} conversations to {directory}",
+                "data": {
+                    "directory": directory,
+                    "format": file_format,
+                    "files": files,
+                    "schema": {table: columns for table, columns in schema_description().items() if table in files},
+                    **summary,
+                    # Only the first few failures are listed so the response stays small
+                    "errors": dict(list(errors.items())[:20]),
+                    "errorCount": len(errors),
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Error in conversation export: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Internal error: {str(e)}",
+                "error": f"Internal error: {str(e)}"
+            }
+
+    async def _export(
+        self,
+        writer: ExportWriter,
+        contact_center_id: str,
+        start_ts: float,
+        end_ts: float,
+        arguments: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Walk the range one window at a time so only one window of conversations is held in memory"""
+        started = time.perf_counter()
+        window_seconds = 60 * max(1, int(arguments.get("windowMinutes") or os.getenv("CSS_EXPORT_WINDOW_MINUTES", "60")))
+        max_concurrency = arguments.get("maxConcurrency") or int(os.getenv("CSS_BATCH_CONCURRENCY", "8"))
+        semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+        transcripts_tool = CSSTranscriptsTool()
+        include_transcripts = "messages" in writer.writers
+        # File writes run off the event loop, one at a time since the writers are not thread-safe
+        write_lock = asyncio.Lock()
+
+        seen_ucids = set()
+        errors: Dict[str, str] = {}
+        truncated_windows: List[Dict[str, str]] = []
+        windows = 0
+
+        async def write(fn, *args):
+            async with write_lock:
+                await asyncio.to_thread(fn, *args)
+
+        def write_conversations(infos: List[Dict[str, Any]]):
+            writer.write("conversations", [conversation_row(info) for info in infos])
+            for info in infos:
+                writer.write("legs", leg_rows(info))
+
+        def write_messages(ucid: str, messages: List[Dict[str, Any]]):
+            writer.write("messages", message_rows(ucid, messages))
+
+        async def export_transcript(ucid: str):
+            # Fetched straight from upstream: a bulk export must not fill the response cache,
+            # the conversation store or the transcript index. The write stays inside the
+            # semaphore so at most maxConcurrency transcripts are held at once.
+            async with semaphore:
+                try:
+                    result, _ = await transcripts_tool.fetch_transcript(ucid)
+                except Exception as e:
+                    errors[ucid] = f"Internal error: {str(e)}"
+                    return
+                if result.get("status") == "error":
+                    errors[ucid] = result.get("error") or result.get("message")
+                    return
+                await write(write_messages, ucid, (result.get("data") or {}).get("transcripts") or [])
+
+        # endDate has minute precision and is inclusive, so each window ends one minute before the next starts
+        window_start = start_ts
+        while window_start <= end_ts:
+            window_end = min(window_start + window_seconds - 60, end_ts)
+            window = {"startDate": format_search_date(window_start), "endDate": format_search_date(window_end)}
+            search = await CSSSearchTool().execute({
+                "contactCenterId": contact_center_id,
+                **window,
+                "autoPaginate": True,
+            })
+            windows += 1
+            if search.get("status") == "error":
+                errors[f"{window['startDate']} - {window['endDate']}"] = search.get("error") or search.get("message")
+            else:
+                if search.get("pagination", {}).get("truncated"):
+                    truncated_windows.append(window)
+
+                ucids = []
+                infos = []
+                for item in search.get("data", []) or []:
+                    info = item.get("conversationInfo") or {}
+                    ucid = info.get("ucid")
+                    # Windows are contiguous, but a conversation returned twice is only exported once
+                    if not ucid or ucid in seen_ucids:
+                        continue
+                    seen_ucids.add(ucid)
+                    ucids.append(ucid)
+                    infos.append(info)
+                del search
+                await write(write_conversations, infos)
+                del infos
+
+                if include_transcripts and ucids:
+                    await asyncio.gather(*(export_transcript(ucid) for ucid in ucids))
+            window_start = window_end + 60
+
+        if truncated_windows:
+            logger.warning(
+                f"Export for {contact_center_id} hit the search result cap in {len(truncated_windows)} windows; "
+                "use a smaller windowMinutes"
+            )
+        return {
+            "windows": windows,
+            "truncatedWindows": truncated_windows,
+            "errors": errors,
+            "elapsedSeconds": round(time.perf_counter() - started, 3),
+        }
@@ -0,0 +1,257 @@
+"""
+Materialized hourly rollups: background ingestion and a range query tool for FastMCP
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import os
+
+from .css_search_tool import CSSSearchTool
+from ..utils.conversation_store import format_search_date, to_epoch
+from ..utils.rollup_store import DIMENSIONS, rollup_store
+from ..utils.shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+
+class RollupMaterializer:
+    """Periodically ingests new conversations into the hourly rollups
+
+    Each run searches from the end of the previous run minus CSS_ROLLUP_REFRESH_HOURS,
+    so recent conversations that are still changing are picked up again; conversations
+    whose updatedAt did not move are skipped by the rollup store. The first run backfills
+    CSS_ROLLUP_BACKFILL_HOURS.
+
+    The range is searched in CSS_ROLLUP_WINDOW_MINUTES windows and the watermark moves
+    after each one, so a run that fails part-way keeps its progress. A window whose search
+    hits CSS_ROLLUP_MAX_CONVERSATIONS is split in half until it fits or is one minute long.
+    """
+
+    def __init__(self):
+        self.contact_center_ids = [
+            c.strip() for c in os.getenv("CSS_ROLLUP_CONTACT_CENTERS", "").split(",") if c.strip()
+        ]
+        self.enabled = bool(self.contact_center_ids)
+        self.interval = float(os.getenv("CSS_ROLLUP_INTERVAL_SECONDS", "300"))
+        self.backfill_seconds = float(os.getenv("CSS_ROLLUP_BACKFILL_HOURS", "24")) * 3600
+        self.refresh_seconds = float(os.getenv("CSS_ROLLUP_REFRESH_HOURS", "6")) * 3600
+        self.window_seconds = 60 * max(1, int(os.getenv("CSS_ROLLUP_WINDOW_MINUTES", "60")))
+        self.max_conversations = int(os.getenv("CSS_ROLLUP_MAX_CONVERSATIONS", "100000"))
+        self._task: Optional[asyncio.Task] = None
+        self._run_lock = asyncio.Lock()
+        # contact center -> (time of the failed run, error)
+        self._failures: Dict[str, Tuple[float, str]] = {}
+        self._stats = {"runs": 0, "run_failures": 0, "truncated_windows": 0, "last_run_seconds": 0.0}
+
+    def start(self):
+        """Start the background loop if any contact centers are configured"""
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"Rollup materializer started for {', '.join(self.contact_center_ids)}")
+
+    async def close(self):
+        """Stop the background loop"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            # With several worker processes only the holder of the lease ingests
+            if not shared_state.enabled or await shared_state.try_lease("rollup-materializer", 2 * self.interval):
+                await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self, contact_center_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Ingest new and updated conversations for the configured (or given) contact centers
+
+        Returns:
+            Per contact center ingestion counts, or an error message
+        """
+        async with self._run_lock:
+            started = time.perf_counter()
+            results: Dict[str, Any] = {}
+            for contact_center_id in contact_center_ids or self.contact_center_ids:
+                try:
+                    results[contact_center_id] = await self._ingest(contact_center_id)
+                    self._failures.pop(contact_center_id, None)
+                except Exception as e:
+                    logger.error(f"Rollup ingestion failed for {contact_center_id}: {str(e)}")
+                    self._stats["run_failures"] += 1
+                    self._failures[contact_center_id] = (time.time(), str(e))
+                    results[contact_center_id] = {"error": str(e)}
+            self._stats["runs"] += 1
+            self._stats["last_run_seconds"] = round(time.perf_counter() - started, 3)
+            return results
+
+    def recent_failure(self, contact_center_id: str) -> Optional[str]:
+        """Error of the last run for a contact center if it failed less than one interval ago"""
+        failure = self._failures.get(contact_center_id)
+        if failure is None or time.time() - failure[0] >= self.interval:
+            return None
+        return failure[1]
+
+    async def _ingest(self, contact_center_id: str) -> Dict[str, Any]:
+        end_ts = time.time()
+        end_ts -= end_ts % 60
+        state = await rollup_store.get_state(contact_center_id)
+        if state and state["ingestedUntil"]:
+            start_ts = min(state["ingestedUntil"], end_ts) - self.refresh_seconds
+        else:
+            start_ts = end_ts - self.backfill_seconds
+        start_ts -= start_ts % 60
+
+        totals = {"ingested": 0, "updated": 0, "unchanged": 0}
+        windows = truncated_windows = 0
+        span = self.window_seconds
+        window_start = start_ts
+        while window_start < end_ts:
+            window_end = min(window_start + span, end_ts)
+            # endDate has minute precision and is inclusive, so each window ends one minute before the next starts
+            search = await CSSSearchTool().execute({
+                "contactCenterId": contact_center_id,
+                "startDate": format_search_date(window_start),
+                "endDate": format_search_date(window_end - 60),
+                "autoPaginate": True,
+                "maxResults": self.max_conversations,
+            })
+            if search.get("status") == "error":
+                raise RuntimeError(search.get("error") or search.get("message"))
+
+            truncated = search.get("pagination", {}).get("truncated")
+            if truncated and window_end - window_start > 60:
+                # Too many conversations for one search: retry the first half of the window
+                half = (window_end - window_start) / 2
+                span = max(60, half - half % 60)
+                continue
+
+            counts = await rollup_store.ingest(contact_center_id, search.get("data", []))
+            for key, value in counts.items():
+                totals[key] += value
+            if truncated:
+                truncated_windows += 1
+                self._stats["truncated_windows"] += 1
+                logger.warning(
+                    f"Rollup ingestion for {contact_center_id} kept only {self.max_conversations} conversations "
+                    f"created at {format_search_date(window_start)}"
+                )
+            await rollup_store.mark_ingested(contact_center_id, window_start, window_end)
+            windows += 1
+            window_start = window_end
+            span = self.window_seconds
+
+        return {
+            "window": [format_search_date(start_ts), format_search_date(end_ts)],
+            "windows": windows,
+            "truncatedWindows": truncated_windows,
+            **totals,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return scheduler counters"""
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["enabled"] = self.enabled
+        stats["contactCenters"] = self.contact_center_ids
+        return stats
+
+
+class HourlyRollupTool:
+    async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a range query by combining pre-aggregated hourly rollup buckets"""
+
+        try:
+            # Extract and validate required parameters
+            contact_center_id = arguments.get("contactCenterId")
+            start_ts = to_epoch(arguments.get("startDate"))
+            end_ts = to_epoch(arguments.get("endDate"))
+
+            if not contact_center_id or start_ts is None or end_ts is None:
+                return {
+                    "status": "error",
+                    "message": "Missing required parameters: contactCenterId, startDate and endDate are required",
+                    "error": "Missing required parameters: contactCenterId, startDate and endDate (YYYY-MM-DD HH:MM) are required"
+                }
+
+            group_by = arguments.get("groupBy") or ["agent"]
+            unknown = [d for d in group_by if d not in DIMENSIONS]
+            if unknown:
+                return {
+                    "status": "error",
+                    "message": f"Unknown groupBy dimensions: {', '.join(unknown)}",
+                    "error": f"Unknown groupBy dimensions: {', '.join(unknown)} (available: {', '.join(DIMENSIONS)})"
+                }
+
+            # Refresh the rollups first when asked to, or when nothing has been ingested yet and
+            # the backfill has not just failed (the background loop retries it)
+            state = await rollup_store.get_state(contact_center_id)
+            failure = rollup_materializer.recent_failure(contact_center_id)
+            if state is None and failure and not arguments.get("refresh"):
+                return {
+                    "status": "error",
+                    "message": "Rollup ingestion failed",
+                    "error": f"Rollup backfill failed recently: {failure}"
+                }
+            if arguments.get("refresh") or state is None:
+                ingestion = (await rollup_materializer.run_once([contact_center_id]))[contact_center_id]
+                if "error" in ingestion and state is None:
+                    return {
+                        "status": "error",
+                        "message": "Rollup ingestion failed",
+                        "error": ingestion["error"]
+                    }
+                state = await rollup_store.get_state(contact_center_id)
+
+            # endDate has minute precision and is treated as inclusive
+            result = await rollup_store.query(
+                contact_center_id,
+                start_ts,
+                end_ts + 60,
+                group_by,
+                {
+                    "agent": arguments.get("agentIds"),
+                    "latestQueue": arguments.get("latestQueues"),
+                    "supportLevel": arguments.get("supportLevels"),
+                    "channel": arguments.get("channels"),
+                },
+                include_bots=bool(arguments.get("includeBots")),
+            )
+            for group in result["groups"]:
+                if "hour" in group:
+                    group["hour"] = format_search_date(group["hour"])
+
+            coverage = None
+            if state:
+                coverage = {
+                    "ingestedFrom": format_search_date(state["ingestedFrom"]),
+                    "ingestedUntil": format_search_date(state["ingestedUntil"]),
+                    "lastRunAt": format_search_date(state["lastRunAt"]),
+                    "complete": state["ingestedFrom"] <= start_ts and state["ingestedUntil"] >= end_ts,
+                }
+            return {
+                "status": "success",
+                "message": f"Combined {result['bucketsScanned']} hourly buckets into {len(result['groups'])} groups",
+                "data": {
+                    **result,
+                    "groupBy": group_by,
+                    "window": {"startDate": arguments.get("startDate"), "endDate": arguments.get("endDate")},
+                    "coverage": coverage,
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Error in hourly rollup query: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Internal error: {str(e)}",
+                "error": f"Internal error: {str(e)}"
+            }
+
+
+# Global rollup materializer instance
+rollup_materializer = RollupMaterializer()
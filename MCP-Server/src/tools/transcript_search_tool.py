@@ -0,0 +1,121 @@
+"""
+Transcript Keyword Search Tool for FastMCP
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+import os
+
+from .css_search_tool import CSSSearchTool
+from .css_transcripts_tool import CSSTranscriptsTool
+from ..utils.conversation_store import to_epoch
+from ..utils.fair_scheduler import batch_priority, scheduling
+from ..utils.transcript_index import SEARCH_MODES, build_match_query, transcript_index
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptSearchTool:
+    async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the tool under the caller's contact center and priority class for upstream scheduling"""
+        with scheduling(arguments.get("contactCenterId"), batch_priority(arguments.get("ucids"))):
+            return await self._execute(arguments)
+
+    async def _execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Search the local full-text index of transcripts for keywords or a phrase"""
+
+        try:
+            # Extract and validate required parameters
+            query = arguments.get("query")
+            mode = arguments.get("mode") or "all"
+
+            if not transcript_index.enabled:
+                return {
+                    "status": "error",
+                    "message": "Transcript index is disabled",
+                    "error": "Transcript index is disabled (set CSS_TRANSCRIPT_INDEX_PATH or CSS_STORE_PATH to enable it)"
+                }
+            if mode not in SEARCH_MODES:
+                return {
+                    "status": "error",
+                    "message": f"Unknown mode: {mode}",
+                    "error": f"Unknown mode: {mode} (available: {', '.join(SEARCH_MODES)})"
+                }
+            match = build_match_query(query, mode)
+            if not match:
+                return {
+                    "status": "error",
+                    "message": "Missing required parameter: query is required",
+                    "error": "Missing required parameter: query must contain at least one keyword"
+                }
+
+            started = time.perf_counter()
+            ucids = arguments.get("ucids") or []
+
+            # Resolve UCIDs from a date range when none are given
+            if not ucids and arguments.get("contactCenterId") and arguments.get("startDate") and arguments.get("endDate"):
+                search = await CSSSearchTool().execute({
+                    "contactCenterId": arguments["contactCenterId"],
+                    "startDate": arguments["startDate"],
+                    "endDate": arguments["endDate"],
+                    "autoPaginate": True,
+                    "fields": ["conversationInfo.ucid"],
+                })
+                if search.get("status") == "error":
+                    return search
+                ucids = [(item.get("conversationInfo") or {}).get("ucid") for item in search.get("data", [])]
+                if not ucids:
+                    return {
+                        "status": "success",
+                        "message": "No conversations in the requested window",
+                        "data": {"conversations": [], "matchedMessages": 0, "truncated": False, "fetched": 0}
+                    }
+            ucids = list(dict.fromkeys(u for u in ucids if u))
+
+            # Fetch transcripts that are not indexed yet and index them before searching
+            fetched = 0
+            errors: Dict[str, str] = {}
+            if ucids and arguments.get("indexMissing", True):
+                missing = set(ucids) - set(await transcript_index.indexed_ucids(ucids))
+                if missing:
+                    max_concurrency = arguments.get("maxConcurrency") or int(os.getenv("CSS_BATCH_CONCURRENCY", "8"))
+                    semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+                    transcripts_tool = CSSTranscriptsTool(wait_for_index=True)
+
+                    async def fetch(ucid: str):
+                        async with semaphore:
+                            result = await transcripts_tool.execute({"ucid": ucid, "fields": ["messageId"]})
+                        if result.get("status") == "error":
+                            errors[ucid] = result.get("error") or result.get("message")
+
+                    await asyncio.gather(*(fetch(ucid) for ucid in missing))
+                    fetched = len(missing) - len(errors)
+
+            result = await transcript_index.search(
+                match,
+                ucids=ucids,
+                roles=arguments.get("roles"),
+                agent_ids=arguments.get("agentIds"),
+                start_ts=to_epoch(arguments.get("startTime")),
+                end_ts=to_epoch(arguments.get("endTime")),
+                limit=int(arguments.get("limit") or 50),
+                snippets_per_conversation=int(arguments.get("snippetsPerConversation") or 3),
+            )
+            result["fetched"] = fetched
+            result["errors"] = errors
+            result["tookMs"] = round((time.perf_counter() - started) * 1000, 2)
+
+            return {
+                "status": "success" if not errors else "partial",
+                "message": f"Found {len(result['conversations'])} conversations with {result['matchedMessages']} matching messages",
+                "data": result
+            }
+
+        except Exception as e:
+            logger.error(f"Error in transcript search: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Internal error: {str(e)}",
+                "error": f"Internal error: {str(e)}"
+            }
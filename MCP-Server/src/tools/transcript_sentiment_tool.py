@@ -0,0 +1,117 @@
+"""
+Transcript Sentiment Tool for FastMCP
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List
+import os
+
+from .css_search_tool import CSSSearchTool
+from .css_transcripts_tool import CSSTranscriptsTool
+from ..utils.fair_scheduler import batch_priority, scheduling
+from ..utils.sentiment import SENTIMENT_BACKEND, SentimentBatch, lexicon_scorer, summarize
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptSentimentTool:
+    async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the tool under the caller's contact center and priority class for upstream scheduling"""
+        with scheduling(arguments.get("contactCenterId"), batch_priority(arguments.get("ucids"))):
+            return await self._execute(arguments)
+
+    async def _execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Score transcript sentiment on the server in batches; only numbers are returned"""
+
+        try:
+            ucids = arguments.get("ucids") or []
+
+            # Resolve UCIDs from a date range when none are given
+            if not ucids and arguments.get("contactCenterId") and arguments.get("startDate") and arguments.get("endDate"):
+                search = await CSSSearchTool().execute({
+                    "contactCenterId": arguments["contactCenterId"],
+                    "startDate": arguments["startDate"],
+                    "endDate": arguments["endDate"],
+                    "autoPaginate": True,
+                    "fields": ["conversationInfo.ucid"],
+                })
+                if search.get("status") == "error":
+                    return search
+                ucids = [(item.get("conversationInfo") or {}).get("ucid") for item in search.get("data", [])]
+
+            ucids = list(dict.fromkeys(u for u in ucids if u))
+            if not ucids:
+                return {
+                    "status": "error",
+                    "message": "Missing required parameter: ucids or contactCenterId/startDate/endDate is required",
+                    "error": "Missing required parameter: ucids or contactCenterId/startDate/endDate is required"
+                }
+
+            include_per_conversation = arguments.get("includePerConversation", True)
+            include_messages = bool(arguments.get("includeMessageScores"))
+            batch_messages = int(os.getenv("CSS_SENTIMENT_BATCH_MESSAGES", "20000"))
+            max_concurrency = arguments.get("maxConcurrency") or int(os.getenv("CSS_BATCH_CONCURRENCY", "8"))
+            transcripts_tool = CSSTranscriptsTool()
+
+            # Transcripts are queued as they arrive and scored together once enough messages are pending
+            batch = SentimentBatch(lexicon_scorer, include_messages)
+            conversations: List[Dict[str, Any]] = []
+            errors: Dict[str, str] = {}
+            batches = 0
+
+            async def flush():
+                nonlocal batch, batches
+                pending, batch = batch, SentimentBatch(lexicon_scorer, include_messages)
+                batches += 1
+                conversations.extend(await asyncio.to_thread(pending.flush))
+
+            async def fetch(ucid: str):
+                # Fetched straight from upstream so a bulk run does not fill the cache, store or index
+                try:
+                    result, _ = await transcripts_tool.fetch_transcript(ucid)
+                except Exception as e:
+                    errors[ucid] = f"Internal error: {str(e)}"
+                    return
+                if result.get("status") == "error":
+                    errors[ucid] = result.get("error") or result.get("message")
+                    return
+                batch.add(ucid, (result.get("data") or {}).get("transcripts") or [])
+                if batch.pending_messages >= batch_messages:
+                    await flush()
+
+            # A fixed pool of workers takes UCIDs from one iterator, so only maxConcurrency
+            # transcripts are in flight at a time
+            pending = iter(ucids)
+
+            async def worker():
+                for ucid in pending:
+                    await fetch(ucid)
+
+            await asyncio.gather(*(worker() for _ in range(min(max(1, int(max_concurrency)), len(ucids)))))
+            if len(batch):
+                await flush()
+            # Batches finish in arrival order; report conversations in the order they were asked for
+            position = {ucid: index for index, ucid in enumerate(ucids)}
+            conversations.sort(key=lambda conversation: position[conversation["ucid"]])
+
+            data: Dict[str, Any] = {
+                "summary": summarize(conversations),
+                "errors": errors,
+                "scoring": {"backend": SENTIMENT_BACKEND, "batches": batches},
+            }
+            if include_per_conversation:
+                data["conversations"] = conversations
+
+            return {
+                "status": "success" if not errors else ("partial" if len(errors) < len(ucids) else "error"),
+                "message": f"Scored sentiment for {len(ucids) - len(errors)} of {len(ucids)} conversations",
+                "data": data
+            }
+
+        except Exception as e:
+            logger.error(f"Error in transcript sentiment analysis: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Internal error: {str(e)}",
+                "error": f"Internal error: {str(e)}"
+            }
@@ -0,0 +1,129 @@
+"""
+Transcript Timing Analytics Tool for FastMCP
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Tuple
+import os
+
+from .css_search_tool import CSSSearchTool
+from .css_transcripts_tool import CSSTranscriptsTool
+from ..utils.fair_scheduler import batch_priority, scheduling
+from ..utils.transcript_timing import ConversationTimer, latency_summary
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptTimingTool:
+    async def execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the tool under the caller's contact center and priority class for upstream scheduling"""
+        with scheduling(arguments.get("contactCenterId"), batch_priority(arguments.get("ucids"))):
+            return await self._execute(arguments)
+
+    async def _execute(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Compute response and wait time metrics from transcripts without returning message bodies"""
+
+        try:
+            ucids = arguments.get("ucids") or []
+
+            # Resolve UCIDs from a date range when none are given
+            if not ucids and arguments.get("contactCenterId") and arguments.get("startDate") and arguments.get("endDate"):
+                search = await CSSSearchTool().execute({
+                    "contactCenterId": arguments["contactCenterId"],
+                    "startDate": arguments["startDate"],
+                    "endDate": arguments["endDate"],
+                    "autoPaginate": True,
+                    "fields": ["conversationInfo.ucid"],
+                })
+                if search.get("status") == "error":
+                    return search
+                ucids = [(item.get("conversationInfo") or {}).get("ucid") for item in search.get("data", [])]
+
+            ucids = list(dict.fromkeys(u for u in ucids if u))
+            if not ucids:
+                return {
+                    "status": "error",
+                    "message": "Missing required parameter: ucids or contactCenterId/startDate/endDate is required",
+                    "error": "Missing required parameter: ucids or contactCenterId/startDate/endDate is required"
+                }
+
+            idle_gap_seconds = float(arguments.get("idleGapSeconds") or 60)
+            include_per_conversation = arguments.get("includePerConversation", True)
+            max_concurrency = arguments.get("maxConcurrency") or int(os.getenv("CSS_BATCH_CONCURRENCY", "8"))
+            transcripts_tool = CSSTranscriptsTool()
+
+            # Running aggregates; each transcript is reduced to numbers as soon as it arrives
+            agent_latencies: List[float] = []
+            customer_latencies: List[float] = []
+            first_responses: List[float] = []
+            customer_waits: List[float] = []
+            by_agent: Dict[str, List[float]] = {}
+            per_conversation: List[Tuple[int, Dict[str, Any]]] = []
+            errors: Dict[str, str] = {}
+
+            async def measure(index: int, ucid: str):
+                # Fetched straight from upstream so a bulk run does not fill the cache, store or index
+                try:
+                    result, _ = await transcripts_tool.fetch_transcript(ucid)
+                except Exception as e:
+                    errors[ucid] = f"Internal error: {str(e)}"
+                    return
+                if result.get("status") == "error":
+                    errors[ucid] = result.get("error") or result.get("message")
+                    return
+
+                timer = ConversationTimer(idle_gap_seconds)
+                for message in (result.get("data") or {}).get("transcripts") or []:
+                    sent_at = CSSTranscriptsTool._parse_time(message.get("absoluteTime"))
+                    if sent_at is not None:
+                        timer.add(message, sent_at.timestamp())
+                stats = timer.result()
+
+                agent_latencies.extend(timer.agent_latencies)
+                customer_latencies.extend(timer.customer_latencies)
+                for agent_id, values in timer.agent_latencies_by_agent.items():
+                    by_agent.setdefault(agent_id, []).extend(values)
+                if stats["firstResponseSeconds"] is not None:
+                    first_responses.append(stats["firstResponseSeconds"])
+                if stats["customerWaitSeconds"] is not None:
+                    customer_waits.append(stats["customerWaitSeconds"])
+                if include_per_conversation:
+                    per_conversation.append((index, {"ucid": ucid, **stats}))
+
+            # A fixed pool of workers takes UCIDs from one iterator, so only maxConcurrency
+            # transcripts are in flight or in memory at a time
+            pending = iter(enumerate(ucids))
+
+            async def worker():
+                for index, ucid in pending:
+                    await measure(index, ucid)
+
+            await asyncio.gather(*(worker() for _ in range(min(max(1, int(max_concurrency)), len(ucids)))))
+
+            data: Dict[str, Any] = {
+                "summary": {
+                    "conversations": len(ucids) - len(errors),
+                    "firstResponseSeconds": latency_summary(first_responses),
+                    "customerWaitSeconds": latency_summary(customer_waits),
+                    "agentLatency": latency_summary(agent_latencies),
+                    "customerLatency": latency_summary(customer_latencies),
+                    "agentLatencyByAgent": {agent: latency_summary(values) for agent, values in by_agent.items()},
+                },
+                "errors": errors,
+            }
+            if include_per_conversation:
+                data["conversations"] = [stats for _, stats in sorted(per_conversation, key=lambda entry: entry[0])]
+
+            return {
+                "status": "success" if not errors else ("partial" if len(errors) < len(ucids) else "error"),
+                "message": f"Computed timings for {len(ucids) - len(errors)} of {len(ucids)} conversations",
+                "data": data
+            }
+
+        except Exception as e:
+            logger.error(f"Error in transcript timing analytics: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Internal error: {str(e)}",
+                "error": f"Internal error: {str(e)}"
+            }
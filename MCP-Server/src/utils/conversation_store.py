@@ -0,0 +1,346 @@
+"""
+Local persistent store for Conversation State Service data with incremental sync
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .fast_json import dumps, loads
+from .response_cache import conversation_status
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+# Columns added to conversations after the first release, with their definitions
+CONVERSATION_COLUMNS = {
+    "updated_ts": "REAL",
+    "completed": "INTEGER NOT NULL DEFAULT 0",
+    "synced_at": "REAL NOT NULL DEFAULT 0",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    ucid TEXT PRIMARY KEY,
+    contact_center_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at TEXT,
+    payload TEXT NOT NULL,
+    updated_ts REAL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    synced_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS conversations_by_center_created
+    ON conversations (contact_center_id, created_at);
+CREATE TABLE IF NOT EXISTS details (
+    ucid TEXT PRIMARY KEY,
+    updated_at TEXT,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transcripts (
+    ucid TEXT PRIMARY KEY,
+    updated_at TEXT,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_ranges (
+    contact_center_id TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sync_ranges_by_center ON sync_ranges (contact_center_id, start_ts);
+"""
+
+
+def to_epoch(value: Optional[str]) -> Optional[float]:
+    """Parse a search date (YYYY-MM-DD HH:MM) or ISO-8601 timestamp into UTC epoch seconds"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def format_search_date(ts: float) -> str:
+    """Format UTC epoch seconds as a search date (YYYY-MM-DD HH:MM)"""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime(SEARCH_DATE_FORMAT)
+
+
+def merge_ranges(ranges: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Sort ranges and merge the ones that overlap or touch"""
+    merged: List[Tuple[float, float]] = []
+    for start_ts, end_ts in sorted(ranges):
+        if merged and start_ts <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end_ts))
+        else:
+            merged.append((start_ts, end_ts))
+    return merged
+
+
+class ConversationStore:
+    """SQLite (WAL) store for search results, details and transcripts
+
+    Each contact center keeps a set of synced ``createdAt`` ranges. A range is
+    only recorded as covered up to ``now - CSS_STORE_SETTLE_SECONDS``, so the
+    recent edge where conversations may still change is always re-fetched,
+    while older data is served locally. Search windows only go upstream for
+    the parts not yet covered.
+
+    Conversations can change long after they were created. A stored row that
+    is not COMPLETED, or whose updatedAt is within the settle period, is only
+    trusted for CSS_STORE_ACTIVE_TTL seconds after it was fetched; after that
+    the minute it was created in is searched upstream again.
+    """
+
+    def __init__(self):
+        self.path = os.getenv("CSS_STORE_PATH", "")
+        self.enabled = bool(self.path)
+        self.settle_seconds = float(os.getenv("CSS_STORE_SETTLE_SECONDS", "3600"))
+        self.active_ttl = float(os.getenv("CSS_STORE_ACTIVE_TTL", "60"))
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "search_windows": 0,
+            "search_windows_covered": 0,
+            "upstream_ranges_fetched": 0,
+            "stale_ranges": 0,
+            "detail_hits": 0,
+            "transcript_hits": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            # Stores created before the freshness columns existed get them added; their rows count as stale
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(conversations)")}
+            for column, definition in CONVERSATION_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE conversations ADD COLUMN {column} {definition}")
+            self._conn = conn
+            logger.info(f"Conversation store opened at {self.path}")
+        return self._conn
+
+    def _run(self, fn, *args):
+        with self._lock:
+            conn = self._connect()
+            return fn(conn, *args)
+
+    async def _call(self, fn, *args):
+        return await asyncio.to_thread(self._run, fn, *args)
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # Search windows
+
+    async def missing_ranges(
+        self, contact_center_id: str, start_ts: float, end_ts: float
+    ) -> List[Tuple[float, float]]:
+        """Return the parts of [start_ts, end_ts) that are not yet synced or hold stale conversations"""
+        self._stats["search_windows"] += 1
+        now = time.time()
+        gaps = await self._call(self._missing_ranges, contact_center_id, start_ts, end_ts)
+        stale = await self._call(
+            self._stale_ranges, contact_center_id, start_ts, end_ts, now - self.active_ttl, now - self.settle_seconds
+        )
+        self._stats["stale_ranges"] += len(stale)
+        gaps = merge_ranges(gaps + stale)
+        if not gaps:
+            self._stats["search_windows_covered"] += 1
+        return gaps
+
+    @staticmethod
+    def _missing_ranges(conn, contact_center_id, start_ts, end_ts):
+        rows = conn.execute(
+            "SELECT start_ts, end_ts FROM sync_ranges "
+            "WHERE contact_center_id = ? AND end_ts > ? AND start_ts < ? ORDER BY start_ts",
+            (contact_center_id, start_ts, end_ts),
+        ).fetchall()
+        gaps = []
+        cursor = start_ts
+        for range_start, range_end in rows:
+            if range_start > cursor:
+                gaps.append((cursor, min(range_start, end_ts)))
+            cursor = max(cursor, range_end)
+            if cursor >= end_ts:
+                break
+        if cursor < end_ts:
+            gaps.append((cursor, end_ts))
+        return gaps
+
+    @staticmethod
+    def _stale_ranges(conn, contact_center_id, start_ts, end_ts, synced_before, updated_after):
+        rows = conn.execute(
+            "SELECT DISTINCT CAST(created_at / 60 AS INTEGER) * 60 FROM conversations "
+            "WHERE contact_center_id = ? AND created_at >= ? AND created_at < ? AND synced_at < ? "
+            "AND (completed = 0 OR updated_ts >= ?)",
+            (contact_center_id, start_ts, end_ts, synced_before, updated_after),
+        ).fetchall()
+        return [(max(start_ts, minute), min(end_ts, minute + 60)) for (minute,) in rows]
+
+    async def mark_synced(self, contact_center_id: str, start_ts: float, end_ts: float):
+        """Record [start_ts, end_ts) as synced, up to the settle horizon; conversations stored in it are fresh"""
+        self._stats["upstream_ranges_fetched"] += 1
+        now = time.time()
+        await self._call(self._touch, contact_center_id, start_ts, end_ts, now)
+        settled_end = min(end_ts, now - self.settle_seconds)
+        if settled_end <= start_ts:
+            return
+        await self._call(self._mark_synced, contact_center_id, start_ts, settled_end)
+
+    @staticmethod
+    def _touch(conn, contact_center_id, start_ts, end_ts, now):
+        # Rows the search no longer returned would otherwise be re-fetched on every query
+        conn.execute(
+            "UPDATE conversations SET synced_at = ? WHERE contact_center_id = ? AND created_at >= ? AND created_at < ?",
+            (now, contact_center_id, start_ts, end_ts),
+        )
+
+    @staticmethod
+    def _mark_synced(conn, contact_center_id, start_ts, end_ts):
+        # Merge with overlapping or adjacent ranges so the table stays small
+        rows = conn.execute(
+            "SELECT rowid, start_ts, end_ts FROM sync_ranges "
+            "WHERE contact_center_id = ? AND end_ts >= ? AND start_ts <= ?",
+            (contact_center_id, start_ts, end_ts),
+        ).fetchall()
+        for _, range_start, range_end in rows:
+            start_ts = min(start_ts, range_start)
+            end_ts = max(end_ts, range_end)
+        conn.execute("BEGIN")
+        conn.executemany("DELETE FROM sync_ranges WHERE rowid = ?", [(row[0],) for row in rows])
+        conn.execute(
+            "INSERT INTO sync_ranges (contact_center_id, start_ts, end_ts) VALUES (?, ?, ?)",
+            (contact_center_id, start_ts, end_ts),
+        )
+        conn.execute("COMMIT")
+
+    async def upsert_conversations(self, contact_center_id: str, items: List[Dict[str, Any]]):
+        """Store search result items, keyed by conversationInfo.ucid"""
+        rows = []
+        now = time.time()
+        for item in items:
+            info = item.get("conversationInfo") or {}
+            created_at = to_epoch(info.get("createdAt"))
+            if not info.get("ucid") or created_at is None:
+                continue
+            completed, updated_at = conversation_status(item)
+            rows.append((
+                info["ucid"], contact_center_id, created_at, updated_at, dumps(item),
+                to_epoch(updated_at), int(completed), now,
+            ))
+        if rows:
+            await self._call(self._upsert_conversations, contact_center_id, rows)
+
+    @staticmethod
+    def _upsert_conversations(conn, contact_center_id, rows):
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO conversations "
+            "(ucid, contact_center_id, created_at, updated_at, payload, updated_ts, completed, synced_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(ucid) DO UPDATE SET "
+            "contact_center_id = excluded.contact_center_id, created_at = excluded.created_at, "
+            "updated_at = excluded.updated_at, payload = excluded.payload, updated_ts = excluded.updated_ts, "
+            "completed = excluded.completed, synced_at = excluded.synced_at",
+            rows,
+        )
+        conn.execute("COMMIT")
+
+    async def query_conversations(
+        self, contact_center_id: str, start_ts: float, end_ts: float, limit: int, offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Return stored conversations created in [start_ts, end_ts), newest first, skipping ``offset``"""
+        payloads = await self._call(self._query_conversations, contact_center_id, start_ts, end_ts, limit, offset)
+        return [loads(payload) for payload in payloads]
+
+    @staticmethod
+    def _query_conversations(conn, contact_center_id, start_ts, end_ts, limit, offset):
+        rows = conn.execute(
+            "SELECT payload FROM conversations WHERE contact_center_id = ? AND created_at >= ? AND created_at < ? "
+            "ORDER BY created_at DESC, ucid LIMIT ? OFFSET ?",
+            (contact_center_id, start_ts, end_ts, limit, offset),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    # Details and transcripts
+
+    async def get_detail(self, ucid: str) -> Optional[Dict[str, Any]]:
+        """Return a stored detail response unless the conversation has since been updated"""
+        result = await self._call(self._get_document, "details", ucid)
+        if result is not None:
+            self._stats["detail_hits"] += 1
+        return result
+
+    async def get_transcripts(self, ucid: str) -> Optional[Dict[str, Any]]:
+        """Return a stored transcripts response unless the conversation has since been updated"""
+        result = await self._call(self._get_document, "transcripts", ucid)
+        if result is not None:
+            self._stats["transcript_hits"] += 1
+        return result
+
+    @staticmethod
+    def _get_document(conn, table, ucid):
+        row = conn.execute(
+            f"SELECT d.payload, d.updated_at, c.updated_at FROM {table} d "
+            "LEFT JOIN conversations c ON c.ucid = d.ucid WHERE d.ucid = ?",
+            (ucid,),
+        ).fetchone()
+        if row is None:
+            return None
+        payload, stored_updated_at, latest_updated_at = row
+        if latest_updated_at and stored_updated_at != latest_updated_at:
+            return None
+        return loads(payload)
+
+    async def put_detail(self, ucid: str, result: Dict[str, Any], updated_at: Optional[str]):
+        """Persist a detail response for a COMPLETED conversation"""
+        await self._call(self._put_document, "details", ucid, updated_at, dumps(result))
+
+    async def put_transcripts(self, ucid: str, result: Dict[str, Any], updated_at: Optional[str]):
+        """Persist a transcripts response for a COMPLETED conversation"""
+        await self._call(self._put_document, "transcripts", ucid, updated_at, dumps(result))
+
+    @staticmethod
+    def _put_document(conn, table, ucid, updated_at, payload):
+        conn.execute(
+            f"INSERT INTO {table} (ucid, updated_at, payload) VALUES (?, ?, ?) "
+            "ON CONFLICT(ucid) DO UPDATE SET updated_at = excluded.updated_at, payload = excluded.payload",
+            (ucid, updated_at, payload),
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return store counters and the synced ranges per contact center"""
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["enabled"] = self.enabled
+        if self.enabled:
+            stats["syncedRanges"] = {
+                row[0]: {"ranges": row[1], "oldest": format_search_date(row[2]), "newest": format_search_date(row[3])}
+                for row in self._run(
+                    lambda conn: conn.execute(
+                        "SELECT contact_center_id, COUNT(*), MIN(start_ts), MAX(end_ts) FROM sync_ranges "
+                        "GROUP BY contact_center_id"
+                    ).fetchall()
+                )
+            }
+        return stats
+
+
+# Global conversation store instance
+conversation_store = ConversationStore()
@@ -0,0 +1,48 @@
+"""
+Conversation State Service endpoint configuration, resolved once per process
+"""
+import logging
+import os
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationEndpoints:
+    """Upstream URLs of the Conversation State Service
+
+    Read from the environment when the module is imported instead of on every tool call.
+    """
+
+    def __init__(self):
+        self.base_url = os.getenv("CONVERSATION_API_BASE_URL", "https://conversation-state-service.care.dev-godaddy.com")
+        self.search_endpoint = os.getenv("CONVERSATION_STATE_SEARCH_ENDPOINT", "/conversation-state/filters/search")
+        self.detail_endpoint = os.getenv("CONVERSATION_STATE_UCID_ENDPOINT", "/conversation-state/{ucid}")
+        self.transcripts_endpoint = os.getenv("CONVERSATION_STATE_TRANSCRIPTS_ENDPOINT", "/transcripts/ucid/{ucid}")
+
+        parts = urlsplit(self.base_url)
+        self.host = parts.hostname or ""
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+
+    def search_url(self) -> str:
+        return f"{self.base_url}{self.search_endpoint}"
+
+    def detail_url(self, ucid: str) -> str:
+        return f"{self.base_url}{self.detail_endpoint.format(ucid=ucid)}"
+
+    def transcripts_url(self, ucid: str) -> str:
+        return f"{self.base_url}{self.transcripts_endpoint.format(ucid=ucid)}"
+
+    def describe(self) -> Dict[str, Any]:
+        """Return the resolved configuration"""
+        return {
+            "base_url": self.base_url,
+            "search": self.search_endpoint,
+            "detail": self.detail_endpoint,
+            "transcripts": self.transcripts_endpoint,
+        }
+
+
+# Global endpoint configuration instance
+conversation_endpoints = ConversationEndpoints()
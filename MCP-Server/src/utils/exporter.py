@@ -0,0 +1,283 @@
+"""
+Flattening of conversations, legs and transcript messages into typed rows, and batched file writers
+"""
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .conversation_store import to_epoch
+from .fast_json import dumps
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "parquet", "arrow")
+FILE_EXTENSIONS = {"ndjson": "ndjson", "parquet": "parquet", "arrow": "arrow"}
+
+# Column name -> type; keys not listed here are kept as JSON in the "extra" column
+CONVERSATION_COLUMNS: List[Tuple[str, str]] = [
+    ("ucid", "string"),
+    ("id", "string"),
+    ("initialContactId", "string"),
+    ("contactCenterId", "string"),
+    ("contactCenterInstanceId", "string"),
+    ("connectInstanceAlias", "string"),
+    ("customerAuthenticated", "bool"),
+    ("customerDisplayName", "string"),
+    ("brandCustomerId", "string"),
+    ("customerId", "string"),
+    ("visitId", "string"),
+    ("visitorId", "string"),
+    ("createdAt", "timestamp"),
+    ("updatedAt", "timestamp"),
+    ("customerJoinedTimestamp", "timestamp"),
+    ("conversationEndTimestamp", "timestamp"),
+    ("platform", "string"),
+    ("channel", "string"),
+    ("market", "string"),
+    ("plId", "string"),
+    ("supportLevel", "string"),
+    ("location", "string"),
+    ("app", "string"),
+    ("summary", "string"),
+    ("interactionType", "string"),
+    ("durationSeconds", "int64"),
+    ("latestQueueStatus", "string"),
+    ("latestQueue", "string"),
+    ("deviceInfo", "string"),
+    ("legCount", "int64"),
+    ("extra", "string"),
+]
+LEG_COLUMNS: List[Tuple[str, str]] = [
+    ("ucid", "string"),
+    ("legIndex", "int64"),
+    ("contactId", "string"),
+    ("initialContactId", "string"),
+    ("state", "string"),
+    ("agentId", "string"),
+    ("agentDisplayName", "string"),
+    ("createdAt", "timestamp"),
+    ("updatedAt", "timestamp"),
+    ("conversationStartTimestamp", "timestamp"),
+    ("conversationEndTimestamp", "timestamp"),
+    ("durationSeconds", "int64"),
+    ("agentJoinedTimestamp", "timestamp"),
+    ("agentLeftTimestamp", "timestamp"),
+    ("agentLastMessageTimeStamp", "timestamp"),
+    ("customerLastMessageTimeStamp", "timestamp"),
+    ("disconnectReason", "string"),
+    ("endDescription", "string"),
+    ("routingProfileName", "string"),
+    ("queueName", "string"),
+    ("extra", "string"),
+]
+MESSAGE_COLUMNS: List[Tuple[str, str]] = [
+    ("ucid", "string"),
+    ("sequence", "int64"),
+    ("messageId", "string"),
+    ("participantId", "string"),
+    ("participantName", "string"),
+    ("participantRole", "string"),
+    ("source", "string"),
+    ("absoluteTime", "timestamp"),
+    ("content", "string"),
+    ("attachments", "string"),
+    ("extra", "string"),
+]
+TABLES = {"conversations": CONVERSATION_COLUMNS, "legs": LEG_COLUMNS, "messages": MESSAGE_COLUMNS}
+
+# Derived columns that never come from the source object
+_DERIVED = {"legCount", "legIndex", "sequence", "extra"}
+
+
+def _coerce(value: Any, column_type: str) -> Any:
+    if value is None or value == "" and column_type != "string":
+        return None
+    try:
+        if column_type == "int64":
+            return int(float(value))
+        if column_type == "bool":
+            return value if isinstance(value, bool) else str(value).lower() == "true"
+    except (TypeError, ValueError):
+        return None
+    if column_type == "string" and not isinstance(value, str):
+        return dumps(value)
+    # Timestamps stay ISO-8601 strings until a columnar writer converts them
+    return value
+
+
+def _flatten(source: Dict[str, Any], columns: List[Tuple[str, str]], skip: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    # Derived columns are filled in by the caller; they are created here to keep column order
+    row = {name: None if name in _DERIVED else _coerce(source.get(name), column_type) for name, column_type in columns}
+    known = {name for name, _ in columns}
+    extra = {k: v for k, v in source.items() if k not in known and k not in skip}
+    row["extra"] = dumps(extra) if extra else None
+    return row
+
+
+def conversation_row(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one ``conversationInfo`` object (without its legs) into a conversations row"""
+    row = _flatten(info, CONVERSATION_COLUMNS, skip=("conversations",))
+    row["legCount"] = len(info.get("conversations") or [])
+    return row
+
+
+def leg_rows(info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten ``conversationInfo.conversations[]`` into legs rows keyed by the conversation UCID"""
+    rows = []
+    for index, leg in enumerate(info.get("conversations") or []):
+        row = _flatten(leg, LEG_COLUMNS)
+        row["ucid"] = info.get("ucid") or row["ucid"]
+        row["legIndex"] = index
+        rows.append(row)
+    return rows
+
+
+def message_rows(ucid: str, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten ``transcripts[]`` into messages rows keyed by UCID, in transcript order"""
+    rows = []
+    for sequence, message in enumerate(messages):
+        row = _flatten(message, MESSAGE_COLUMNS)
+        row["ucid"] = ucid
+        row["sequence"] = sequence
+        rows.append(row)
+    return rows
+
+
+def schema_description() -> Dict[str, Dict[str, str]]:
+    """Column types of every exported table"""
+    return {table: dict(columns) for table, columns in TABLES.items()}
+
+
+def _arrow_schema(columns: List[Tuple[str, str]]):
+    types = {
+        "string": pyarrow.string(),
+        "int64": pyarrow.int64(),
+        "bool": pyarrow.bool_(),
+        "timestamp": pyarrow.timestamp("ms", tz="UTC"),
+    }
+    return pyarrow.schema([(name, types[column_type]) for name, column_type in columns])
+
+
+class TableWriter:
+    """Buffers rows of one table and writes them out in batches of ``batch_rows``
+
+    NDJSON batches are appended as lines; Parquet batches become row groups and Arrow
+    batches record batches of an IPC file, so memory stays bounded by one batch.
+    """
+
+    def __init__(self, path: str, columns: List[Tuple[str, str]], file_format: str, batch_rows: int):
+        self.path = path
+        self.columns = columns
+        self.format = file_format
+        self.batch_rows = max(1, batch_rows)
+        self.rows = 0
+        self.batches = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._timestamps = [name for name, column_type in columns if column_type == "timestamp"]
+        if file_format == "ndjson":
+            self._file = open(path, "w", encoding="utf-8")
+            self._writer = None
+        else:
+            self._file = None
+            self._schema = _arrow_schema(columns)
+            if file_format == "parquet":
+                self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, compression="zstd")
+            else:
+                self._sink = pyarrow.OSFile(path, "wb")
+                self._writer = pyarrow.ipc.new_file(self._sink, self._schema)
+
+    def write(self, rows: List[Dict[str, Any]]):
+        """Queue rows, writing a batch whenever ``batch_rows`` are pending"""
+        self._buffer.extend(rows)
+        while len(self._buffer) >= self.batch_rows:
+            batch, self._buffer = self._buffer[:self.batch_rows], self._buffer[self.batch_rows:]
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        if self._file is not None:
+            self._file.write("".join(dumps(row) + "\n" for row in batch))
+        else:
+            data = {name: [row.get(name) for row in batch] for name, _ in self.columns}
+            for name in self._timestamps:
+                data[name] = [None if v is None else _to_millis(v) for v in data[name]]
+            table = pyarrow.Table.from_pydict(data, schema=self._schema)
+            self._writer.write_table(table)
+        self.rows += len(batch)
+        self.batches += 1
+
+    def close(self) -> Dict[str, Any]:
+        """Write the remaining rows, close the file and describe it"""
+        try:
+            self._write_batch(self._buffer)
+            self._buffer = []
+        finally:
+            if self._file is not None:
+                self._file.close()
+            else:
+                self._writer.close()
+                if self.format == "arrow":
+                    self._sink.close()
+        return {"path": self.path, "rows": self.rows, "batches": self.batches, "bytes": os.path.getsize(self.path)}
+
+
+def _to_millis(value: Any) -> Optional[int]:
+    epoch = to_epoch(value) if isinstance(value, str) else None
+    return None if epoch is None else int(round(epoch * 1000))
+
+
+class ExportWriter:
+    """Writers for the conversations, legs and messages tables of one export directory"""
+
+    def __init__(self, directory: str, file_format: str, batch_rows: int, tables: Tuple[str, ...]):
+        """
+        Args:
+            directory: Output directory (created if missing)
+            file_format: One of EXPORT_FORMATS
+            batch_rows: Rows per written batch / row group
+            tables: Which of TABLES to write
+
+        Raises:
+            ValueError: Unknown format, or Parquet/Arrow requested without pyarrow installed
+        """
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown format: {file_format} (available: {', '.join(EXPORT_FORMATS)})")
+        if file_format != "ndjson" and pyarrow is None:
+            raise ValueError(f"The {file_format} format requires pyarrow; install it or use ndjson")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.format = file_format
+        self.writers: Dict[str, TableWriter] = {}
+        try:
+            for table in tables:
+                path = os.path.join(directory, f"{table}.{FILE_EXTENSIONS[file_format]}")
+                self.writers[table] = TableWriter(path, TABLES[table], file_format, batch_rows)
+        except Exception:
+            self.close()
+            raise
+
+    def write(self, table: str, rows: List[Dict[str, Any]]):
+        """Append rows to a table if it is being exported"""
+        writer = self.writers.get(table)
+        if writer is not None and rows:
+            writer.write(rows)
+
+    def close(self) -> Dict[str, Dict[str, Any]]:
+        """Flush and close every table, returning path, row count and size per table"""
+        files = {}
+        for table, writer in self.writers.items():
+            try:
+                files[table] = writer.close()
+            except Exception as e:
+                logger.error(f"Failed to close export file {writer.path}: {str(e)}")
+                files[table] = {"path": writer.path, "rows": writer.rows, "error": str(e)}
+        self.writers = {}
+        return files
@@ -0,0 +1,239 @@
+"""
+Weighted fair queueing of upstream request slots across tenants and priority classes
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from .metrics import UPSTREAM_QUEUE_WAIT
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITY_CLASSES = (INTERACTIVE, BULK)
+DEFAULT_TENANT = "default"
+
+# Tenant (contact center) and priority class of the upstream requests made by the current task
+current_tenant: ContextVar[str] = ContextVar("current_tenant", default=DEFAULT_TENANT)
+current_priority: ContextVar[str] = ContextVar("current_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def scheduling(tenant: Optional[str] = None, priority: Optional[str] = None) -> Iterator[None]:
+    """
+    Attribute upstream requests made inside the block to a tenant and priority class
+
+    Args:
+        tenant: Contact center the work is for (unchanged when None)
+        priority: INTERACTIVE or BULK (unchanged when None); work inside a bulk block stays bulk
+    """
+    tokens = []
+    if tenant:
+        tokens.append((current_tenant, current_tenant.set(tenant)))
+    if priority and current_priority.get() != BULK:
+        tokens.append((current_priority, current_priority.set(priority)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def batch_priority(ucids: Optional[Sequence[str]]) -> str:
+    """BULK for date-window work (no explicit UCIDs) and UCID lists above CSS_SCHED_INTERACTIVE_MAX_UCIDS"""
+    if not ucids or len(ucids) > int(os.getenv("CSS_SCHED_INTERACTIVE_MAX_UCIDS", "10")):
+        return BULK
+    return INTERACTIVE
+
+
+def _parse_weights(value: str) -> Dict[str, float]:
+    """Parse "tenantA=2,tenantB=0.5" into a mapping"""
+    weights = {}
+    for entry in value.split(","):
+        name, _, number = entry.strip().rpartition("=")
+        if name:
+            try:
+                weights[name] = float(number)
+            except ValueError:
+                logger.warning(f"Ignoring invalid scheduler setting: {entry}")
+    return weights
+
+
+class Ticket(NamedTuple):
+    tenant: str
+    priority: str
+
+
+class FairScheduler:
+    """Grants upstream request slots in weighted fair order
+
+    Waiting requests are queued per (priority class, tenant) flow and served by start-time
+    fair queueing: each request gets a virtual start tag of max(virtual time, the flow's last
+    finish tag) and advances the flow's finish tag by 1 / (class weight x tenant weight), and
+    the eligible head with the smallest start tag is admitted first. Interactive requests
+    therefore overtake queued bulk work without starving it, and a tenant with a large
+    backfill gets the same share as a tenant with a few lookups.
+
+    A request is eligible when a slot is free under the caller's limit, its tenant is under
+    its concurrency budget and, for bulk requests, bulk work is under CSS_BULK_MAX_SHARE of the
+    limit, so some slots are always left for interactive lookups.
+    """
+
+    def __init__(self):
+        self.class_weights = {
+            INTERACTIVE: float(os.getenv("CSS_SCHED_INTERACTIVE_WEIGHT", "8")),
+            BULK: float(os.getenv("CSS_SCHED_BULK_WEIGHT", "1")),
+        }
+        self.tenant_weights = _parse_weights(os.getenv("CSS_TENANT_WEIGHTS", ""))
+        self.tenant_budgets = _parse_weights(os.getenv("CSS_TENANT_MAX_CONCURRENCY", ""))
+        self.default_budget = float(os.getenv("CSS_TENANT_DEFAULT_MAX_CONCURRENCY", "0"))
+        self.bulk_max_share = float(os.getenv("CSS_BULK_MAX_SHARE", "0.75"))
+
+        self._limit = 1
+        self._in_flight = 0
+        self._bulk_in_flight = 0
+        self._tenant_in_flight: Dict[str, int] = {}
+        self._queues: Dict[Tuple[str, str], Deque[Tuple[float, asyncio.Future, float]]] = {}
+        self._finish_tags: Dict[Tuple[str, str], float] = {}
+        self._virtual_time = 0.0
+        self._tenant_stats: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for queue in self._queues.values() for _, waiter, _ in queue if not waiter.done())
+
+    def _eligible(self, ticket: Ticket) -> bool:
+        if self._in_flight >= self._limit:
+            return False
+        budget = self.tenant_budgets.get(ticket.tenant, self.default_budget)
+        if budget and self._tenant_in_flight.get(ticket.tenant, 0) >= budget:
+            return False
+        if ticket.priority == BULK and self._bulk_in_flight >= max(1, int(self._limit * self.bulk_max_share)):
+            return False
+        return True
+
+    def _admit(self, ticket: Ticket, waited: float):
+        self._in_flight += 1
+        if ticket.priority == BULK:
+            self._bulk_in_flight += 1
+        self._tenant_in_flight[ticket.tenant] = self._tenant_in_flight.get(ticket.tenant, 0) + 1
+
+        stats = self._tenant_stats.setdefault(ticket.tenant, {
+            f"{p}_{k}": 0 for p in PRIORITY_CLASSES for k in ("admitted", "queued", "wait_seconds")
+        })
+        stats[f"{ticket.priority}_admitted"] += 1
+        if waited:
+            stats[f"{ticket.priority}_queued"] += 1
+            stats[f"{ticket.priority}_wait_seconds"] = round(stats[f"{ticket.priority}_wait_seconds"] + waited, 6)
+        UPSTREAM_QUEUE_WAIT.observe(waited, tenant=ticket.tenant, priority=ticket.priority)
+
+    async def acquire(self, limit: int) -> Ticket:
+        """
+        Wait for a slot under the given concurrency limit
+
+        Args:
+            limit: Current total concurrency limit
+
+        Returns:
+            Ticket to pass to release()
+        """
+        ticket = Ticket(current_tenant.get(), current_priority.get())
+        # Serve eligible waiters first so an arrival never jumps the queue
+        self.wake(limit)
+        if self._eligible(ticket):
+            self._admit(ticket, 0.0)
+            return ticket
+
+        flow = (ticket.priority, ticket.tenant)
+        weight = self.class_weights.get(ticket.priority, 1.0) * self.tenant_weights.get(ticket.tenant, 1.0)
+        start_tag = max(self._virtual_time, self._finish_tags.get(flow, 0.0))
+        self._finish_tags[flow] = start_tag + 1.0 / max(weight, 1e-6)
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(flow, deque()).append((start_tag, waiter, time.monotonic()))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just before cancellation; hand it back
+                self.release(ticket)
+            else:
+                waiter.cancel()
+            raise
+        return ticket
+
+    def try_acquire(self, limit: int) -> Optional[Ticket]:
+        """Take a slot only if one is free without waiting and nobody eligible is queued"""
+        self.wake(limit)
+        ticket = Ticket(current_tenant.get(), current_priority.get())
+        if not self._eligible(ticket):
+            return None
+        self._admit(ticket, 0.0)
+        return ticket
+
+    def release(self, ticket: Ticket, limit: Optional[int] = None):
+        """Return a slot and admit the next eligible waiters"""
+        self._in_flight -= 1
+        if ticket.priority == BULK:
+            self._bulk_in_flight -= 1
+        self._tenant_in_flight[ticket.tenant] -= 1
+        if not self._tenant_in_flight[ticket.tenant]:
+            del self._tenant_in_flight[ticket.tenant]
+        self.wake(self._limit if limit is None else limit)
+
+    def wake(self, limit: int):
+        """Admit queued requests in fair order while slots are free"""
+        self._limit = max(1, limit)
+        while self._in_flight < self._limit:
+            best = None
+            for flow, queue in list(self._queues.items()):
+                # Cancelled waiters are dropped lazily
+                while queue and queue[0][1].done():
+                    queue.popleft()
+                if not queue:
+                    del self._queues[flow]
+                    continue
+                if (best is None or queue[0][0] < best[1]) and self._eligible(Ticket(flow[1], flow[0])):
+                    best = (flow, queue[0][0])
+            if best is None:
+                return
+            flow, start_tag = best
+            _, waiter, enqueued_at = self._queues[flow].popleft()
+            self._virtual_time = max(self._virtual_time, start_tag)
+            self._admit(Ticket(flow[1], flow[0]), time.monotonic() - enqueued_at)
+            waiter.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return slot usage, queue depth and per-tenant admission counters"""
+        queued_by_class = {p: 0 for p in PRIORITY_CLASSES}
+        for (priority, _), queue in self._queues.items():
+            queued_by_class[priority] = queued_by_class.get(priority, 0) + sum(1 for _, w, _ in queue if not w.done())
+        return {
+            "in_flight": self._in_flight,
+            "bulk_in_flight": self._bulk_in_flight,
+            "queued": queued_by_class,
+            "class_weights": self.class_weights,
+            "bulk_max_share": self.bulk_max_share,
+            "tenants": {
+                tenant: {
+                    **stats,
+                    "in_flight": self._tenant_in_flight.get(tenant, 0),
+                    "max_concurrency": self.tenant_budgets.get(tenant, self.default_budget) or None,
+                    "weight": self.tenant_weights.get(tenant, 1.0),
+                }
+                for tenant, stats in self._tenant_stats.items()
+            },
+        }
+
+
+# Global scheduler in front of all upstream Conversation State Service calls
+fair_scheduler = FairScheduler()
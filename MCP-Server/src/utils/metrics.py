@@ -0,0 +1,231 @@
+"""
+Lightweight Prometheus-format metrics for the MCP server
+"""
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .fast_json import dumps
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+# Name of the tool whose call is currently running, used to label nested upstream metrics
+current_tool: ContextVar[str] = ContextVar("current_tool", default="none")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[0][i] += 1
+                break
+        state[1] += value
+        state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            inf_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]):
+        """Add a callback that renders extra metric lines at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {str(e)}")
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry and server metrics
+registry = MetricsRegistry()
+
+TOOL_DURATION = registry.histogram(
+    "mcp_tool_duration_seconds", "End-to-end tool call latency", ["tool"]
+)
+TOOL_PHASE_DURATION = registry.histogram(
+    "mcp_tool_phase_duration_seconds",
+    "Time spent per phase of a tool call (token_wait, upstream, decode)",
+    ["tool", "phase"],
+)
+TOOL_RESPONSE_BYTES = registry.histogram(
+    "mcp_tool_response_bytes", "Serialized tool response size (sampled)", ["tool"], BYTES_BUCKETS
+)
+TOOL_IN_FLIGHT = registry.gauge("mcp_tool_in_flight", "Tool calls currently running", ["tool"])
+TOOL_ERRORS = registry.counter("mcp_tool_errors_total", "Tool calls that returned an error", ["tool"])
+UPSTREAM_REQUESTS = registry.counter(
+    "css_upstream_requests_total", "Upstream requests by HTTP status", ["tool", "status"]
+)
+UPSTREAM_RESPONSE_BYTES = registry.histogram(
+    "css_upstream_response_bytes", "Upstream response body size", ["tool"], BYTES_BUCKETS
+)
+UPSTREAM_COALESCED = registry.counter(
+    "css_upstream_coalesced_total", "Requests served by joining an identical in-flight upstream request", ["tool"]
+)
+UPSTREAM_RETRIES = registry.counter("css_upstream_retries_total", "Upstream request retries", ["tool"])
+UPSTREAM_HEDGES = registry.counter(
+    "css_upstream_hedges_total", "Hedged upstream requests by which attempt answered first", ["tool", "outcome"]
+)
+UPSTREAM_CONCURRENCY_LIMIT = registry.gauge(
+    "css_upstream_concurrency_limit", "Current adaptive concurrency limit for upstream requests"
+)
+UPSTREAM_IN_FLIGHT = registry.gauge("css_upstream_in_flight", "Upstream requests currently in flight")
+UPSTREAM_QUEUE_WAIT = registry.histogram(
+    "css_upstream_queue_wait_seconds", "Time upstream requests waited for a slot", ["tenant", "priority"]
+)
+
+
+async def instrumented_call(
+    tool_name: str, fn: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]], arguments: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Run a tool under the metrics context
+
+    Args:
+        tool_name: Tool name used as the metric label
+        fn: Tool coroutine function (usually ``tool.execute``)
+        arguments: Tool arguments
+
+    Returns:
+        The tool result, unchanged
+    """
+    token = current_tool.set(tool_name)
+    TOOL_IN_FLIGHT.inc(tool=tool_name)
+    started = time.perf_counter()
+    try:
+        result = await fn(arguments)
+    finally:
+        TOOL_IN_FLIGHT.dec(tool=tool_name)
+        TOOL_DURATION.observe(time.perf_counter() - started, tool=tool_name)
+        current_tool.reset(token)
+
+    if isinstance(result, dict) and result.get("status") == "error":
+        TOOL_ERRORS.inc(tool=tool_name)
+
+    # Measuring the size encodes the response a second time, so it is only done for a sample of calls
+    if random.random() < float(os.getenv("CSS_METRICS_RESPONSE_SAMPLE_RATE", "0.1")):
+        TOOL_RESPONSE_BYTES.observe(len(dumps(result)), tool=tool_name)
+    return result
+
+
+def observe_phase(phase: str, seconds: float):
+    """Record time spent in a phase of the current tool call"""
+    TOOL_PHASE_DURATION.observe(seconds, tool=current_tool.get(), phase=phase)
+
+
+def log_payload(log: logging.Logger, label: str, payload: Any, sample_rate: Optional[float] = None):
+    """Log a full payload at DEBUG level when CSS_DEBUG_PAYLOADS is on, for a sample of calls"""
+    if os.getenv("CSS_DEBUG_PAYLOADS", "false").lower() != "true" or not log.isEnabledFor(logging.DEBUG):
+        return
+    if sample_rate is None:
+        sample_rate = float(os.getenv("CSS_DEBUG_PAYLOAD_SAMPLE_RATE", "0.01"))
+    if random.random() < sample_rate:
+        log.debug(f"{label}: {payload}")
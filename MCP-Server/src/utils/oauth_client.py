@@ -3,24 +3,169 @@ OAuth 2.0 Client Utility for GoDaddy APIs
 """
 import asyncio
 import base64
+import hashlib
 import logging
 import os
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Tuple
 import aiohttp
 
+from .fast_json import loads
+from .metrics import (
+    UPSTREAM_COALESCED,
+    UPSTREAM_IN_FLIGHT,
+    UPSTREAM_REQUESTS,
+    UPSTREAM_RESPONSE_BYTES,
+    current_tool,
+    observe_phase,
+)
+from .request_policy import request_policy
+from .shared_state import shared_state
+
 logger = logging.getLogger(__name__)
 
 
+class APIResponse:
+    """Fully read upstream HTTP response, usable after its connection is released"""
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes, url: str = ""):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+        self._json: Any = None
+        self._decoded = False
+
+    async def json(self) -> Any:
+        """Decode the response body as JSON
+
+        The body is decoded once and the document is shared by coalesced callers, so it must
+        not be modified; callers copy what they change.
+        """
+        if not self._decoded:
+            started = time.perf_counter()
+            self._json = loads(self.body)
+            self._decoded = True
+            observe_phase("decode", time.perf_counter() - started)
+        return self._json
+
+    async def text(self) -> str:
+        """Decode the response body as text"""
+        return self.body.decode("utf-8", errors="replace")
+
+
 class GoDaddyOAuthClient:
     """OAuth 2.0 client for GoDaddy APIs"""
     
     def __init__(self):
-        self.oauth_url = "https://oauth.api.dev-godaddy.com/v2/oauth2/token"
+        self.oauth_url = os.getenv("OAUTH_TOKEN_URL", "https://oauth.api.dev-godaddy.com/v2/oauth2/token")
         self.client_id = os.getenv("OAUTH_CLIENT_ID", "3a732f46-c240-4344-91ed-5e7ab1a04b4a")
         self.client_secret = os.getenv("OAUTH_CLIENT_SECRET", "9a6UOEykPfz9AIKoSaqsLEnE2avJgUqk")
         self.scope = os.getenv("OAUTH_SCOPE", "care.dataplane.read:all")
         self._cached_token = None
         self._token_expires_at = None
+
+        # Connection pool settings for the shared upstream session
+        self.pool_limit = int(os.getenv("CSS_HTTP_POOL_LIMIT", "100"))
+        self.pool_limit_per_host = int(os.getenv("CSS_HTTP_POOL_LIMIT_PER_HOST", "20"))
+        self.keepalive_timeout = float(os.getenv("CSS_HTTP_KEEPALIVE_TIMEOUT", "30"))
+        self.request_timeout = float(os.getenv("CSS_HTTP_TIMEOUT", "30"))
+        self.connect_timeout = float(os.getenv("CSS_HTTP_CONNECT_TIMEOUT", "10"))
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Identical GET requests in flight at the same time share one upstream call
+        self.coalesce_requests = os.getenv("CSS_COALESCE_REQUESTS", "true").lower() == "true"
+        self._inflight_requests: Dict[Tuple[Any, ...], asyncio.Task] = {}
+        self._request_stats = {"upstream_requests": 0, "coalesced_requests": 0}
+
+        # Token refresh settings: one in-flight fetch is shared by all waiters,
+        # and a background task renews the token before it leaves the validity window
+        self.token_expiry_buffer = 300  # 5 minutes
+        self.refresh_ahead = float(os.getenv("OAUTH_REFRESH_AHEAD_SECONDS", "300"))
+        self.background_refresh = os.getenv("OAUTH_BACKGROUND_REFRESH", "true").lower() == "true"
+        self._token_fetch_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._token_stats = {
+            "token_fetches": 0,
+            "token_fetch_failures": 0,
+            "background_refreshes": 0,
+            "cache_hits": 0,
+            "waits": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "shared_token_hits": 0,
+        }
+        # Worker processes share one token; the name keeps different credentials apart
+        self._shared_token_name = "oauth:" + hashlib.sha256(
+            f"{self.oauth_url}|{self.client_id}|{self.scope}".encode()
+        ).hexdigest()[:16]
+
+    async def start(self):
+        """Open the shared HTTP session (called once from the server lifespan)"""
+        self._get_session()
+        logger.info(
+            f"Upstream HTTP pool opened (limit={self.pool_limit}, "
+            f"limit_per_host={self.pool_limit_per_host}, keepalive={self.keepalive_timeout}s)"
+        )
+        if self.background_refresh and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        """Close the shared HTTP session and release pooled connections"""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("Upstream HTTP pool closed")
+        self._session = None
+
+    async def warm_connections(self, url: str, count: int) -> int:
+        """
+        Open pooled keep-alive connections to an upstream host ahead of the first tool call
+
+        Sends ``count`` concurrent unauthenticated GETs so DNS, TCP and TLS are done up front;
+        any HTTP status counts, only the connection matters.
+
+        Args:
+            url: URL on the upstream host
+            count: Connections to open (capped by the per-host pool limit)
+
+        Returns:
+            Number of connections that completed a request
+        """
+        session = self._get_session()
+        count = max(0, min(count, self.pool_limit_per_host or count))
+
+        async def probe() -> bool:
+            try:
+                async with session.get(url, allow_redirects=False) as response:
+                    await response.read()
+                    return True
+            except Exception as e:
+                logger.debug(f"Warm-up connection to {url} failed: {str(e)}")
+                return False
+
+        results = await asyncio.gather(*(probe() for _ in range(count)))
+        return sum(results)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                limit_per_host=self.pool_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+                use_dns_cache=True,
+            )
+            timeout = aiohttp.ClientTimeout(total=self.request_timeout, connect=self.connect_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
     
     async def get_access_token(self, force_refresh: bool = False) -> Optional[str]:
         """
@@ -35,8 +180,73 @@ class GoDaddyOAuthClient:
         # Check if we have a valid cached token
         if not force_refresh and self._cached_token and self._is_token_valid():
             logger.debug("Using cached OAuth token")
+            self._token_stats["cache_hits"] += 1
             return self._cached_token
         
+        # Join the in-flight token request if there is one, otherwise start it
+        started = time.monotonic()
+        if self._token_fetch_task is None or self._token_fetch_task.done():
+            self._token_fetch_task = asyncio.create_task(self._fetch_token())
+        token = await asyncio.shield(self._token_fetch_task)
+
+        waited = time.monotonic() - started
+        self._token_stats["waits"] += 1
+        self._token_stats["wait_seconds_total"] += waited
+        self._token_stats["wait_seconds_max"] = max(self._token_stats["wait_seconds_max"], waited)
+        return token
+
+    async def _fetch_token(self) -> Optional[str]:
+        """Get a new token, from the other worker processes when they share state, otherwise from the OAuth endpoint"""
+        if not shared_state.enabled:
+            return await self._request_token()
+
+        try:
+            # Another worker may already have renewed the token
+            if await self._adopt_shared_token():
+                return self._cached_token
+
+            # One worker fetches while the others wait for it to publish the token
+            lease_seconds = self.request_timeout + self.connect_timeout
+            deadline = time.monotonic() + lease_seconds
+            while not await shared_state.try_lease("oauth-token", lease_seconds):
+                await asyncio.sleep(0.1)
+                if await self._adopt_shared_token():
+                    return self._cached_token
+                if time.monotonic() > deadline:
+                    logger.warning("Timed out waiting for another worker's OAuth token; fetching one")
+                    return await self._request_token()
+        except Exception as e:
+            logger.warning(f"Shared OAuth token unavailable, fetching one: {str(e)}")
+            return await self._request_token()
+
+        try:
+            if await self._adopt_shared_token():
+                return self._cached_token
+            token = await self._request_token()
+            if token:
+                ttl = self._token_expires_at - asyncio.get_event_loop().time()
+                await shared_state.put_token(self._shared_token_name, token, time.time() + ttl)
+            return token
+        finally:
+            await shared_state.release_lease("oauth-token")
+
+    async def _adopt_shared_token(self) -> bool:
+        """Use the token published by another worker if it is outside the refresh window"""
+        token, expires_at = await shared_state.get_token(self._shared_token_name)
+        if not token:
+            return False
+        remaining = expires_at - time.time()
+        if remaining <= self.token_expiry_buffer + self.refresh_ahead:
+            return False
+        self._cached_token = token
+        self._token_expires_at = asyncio.get_event_loop().time() + remaining
+        self._token_stats["shared_token_hits"] += 1
+        logger.info("OAuth token taken from shared state")
+        return True
+
+    async def _request_token(self) -> Optional[str]:
+        """Request a new token from the OAuth endpoint and cache it"""
+        self._token_stats["token_fetches"] += 1
         try:
             # Prepare OAuth 2.0 request parameters as form data
             oauth_data = {
@@ -55,41 +265,80 @@ class GoDaddyOAuthClient:
                 "Content-Type": "application/x-www-form-urlencoded"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.oauth_url, data=oauth_data, headers=oauth_headers) as response:
-                    if response.status == 200:
-                        token_data = await response.json()
-                        access_token = token_data.get("access_token")
+            session = self._get_session()
+            async with session.post(self.oauth_url, data=oauth_data, headers=oauth_headers) as response:
+                if response.status == 200:
+                    token_data = await response.json()
+                    access_token = token_data.get("access_token")
+                    
+                    if access_token:
+                        # Cache the token
+                        self._cached_token = access_token
+                        # Set expiration (default to 1 hour if not provided)
+                        expires_in = token_data.get("expires_in", 3600)
+                        self._token_expires_at = asyncio.get_event_loop().time() + expires_in
                         
-                        if access_token:
-                            # Cache the token
-                            self._cached_token = access_token
-                            # Set expiration (default to 1 hour if not provided)
-                            expires_in = token_data.get("expires_in", 3600)
-                            self._token_expires_at = asyncio.get_event_loop().time() + expires_in
-                            
-                            logger.info("OAuth token acquired successfully")
-                            return access_token
-                        else:
-                            logger.error("No access_token in OAuth response")
-                            return None
+                        logger.info("OAuth token acquired successfully")
+                        return access_token
                     else:
-                        error_text = await response.text()
-                        logger.error(f"OAuth token request failed: {response.status} - {error_text}")
+                        logger.error("No access_token in OAuth response")
+                        self._token_stats["token_fetch_failures"] += 1
                         return None
+                else:
+                    error_text = await response.text()
+                    logger.error(f"OAuth token request failed: {response.status} - {error_text}")
+                    self._token_stats["token_fetch_failures"] += 1
+                    return None
                         
         except Exception as e:
             logger.error(f"Error getting OAuth token: {str(e)}")
+            self._token_stats["token_fetch_failures"] += 1
             return None
     
+    async def _refresh_loop(self):
+        """Renew the token ahead of expiry so request paths never wait on OAuth"""
+        retry_delay = 5.0
+        while True:
+            if self._cached_token and self._token_expires_at:
+                delay = (
+                    self._token_expires_at
+                    - self.token_expiry_buffer
+                    - self.refresh_ahead
+                    - asyncio.get_event_loop().time()
+                )
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            if self._token_fetch_task is None or self._token_fetch_task.done():
+                self._token_fetch_task = asyncio.create_task(self._fetch_token())
+            self._token_stats["background_refreshes"] += 1
+            token = await asyncio.shield(self._token_fetch_task)
+
+            if token:
+                retry_delay = 5.0
+                # Never spin on tokens whose lifetime is shorter than the refresh window
+                await asyncio.sleep(30)
+            else:
+                logger.warning(f"Background OAuth refresh failed, retrying in {retry_delay:.0f}s")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60.0)
+
     def _is_token_valid(self) -> bool:
         """Check if the cached token is still valid"""
         if not self._cached_token or not self._token_expires_at:
             return False
         
         # Add 5 minute buffer before expiration
-        buffer_time = 300  # 5 minutes
-        return asyncio.get_event_loop().time() < (self._token_expires_at - buffer_time)
+        return asyncio.get_event_loop().time() < (self._token_expires_at - self.token_expiry_buffer)
+
+    def get_token_stats(self) -> Dict[str, Any]:
+        """Return token acquisition counters"""
+        stats = dict(self._token_stats)
+        stats["wait_seconds_avg"] = (
+            stats["wait_seconds_total"] / stats["waits"] if stats["waits"] else 0.0
+        )
+        stats["background_refresh_running"] = bool(self._refresh_task and not self._refresh_task.done())
+        return stats
     
     async def make_authenticated_request(
         self, 
@@ -99,7 +348,7 @@ class GoDaddyOAuthClient:
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
         **kwargs
-    ) -> Optional[aiohttp.ClientResponse]:
+    ) -> Optional[APIResponse]:
         """
         Make an authenticated request to a GoDaddy API
         
@@ -112,10 +361,46 @@ class GoDaddyOAuthClient:
             **kwargs: Additional arguments for aiohttp
             
         Returns:
-            aiohttp.ClientResponse or None if failed
+            APIResponse with the fully read body, or None if failed
         """
+        if method.upper() not in ("GET", "POST", "PUT", "DELETE"):
+            logger.error(f"Unsupported HTTP method: {method}")
+            return None
+
+        # Only side-effect free requests without extra aiohttp options are coalesced
+        if not self.coalesce_requests or method.upper() != "GET" or kwargs:
+            return await self._send(method, url, headers, params, data, **kwargs)
+
+        key = (
+            url,
+            tuple(sorted((k, str(v)) for k, v in (params or {}).items())),
+            tuple(sorted((headers or {}).items())),
+        )
+        task = self._inflight_requests.get(key)
+        if task is None:
+            task = asyncio.create_task(self._send(method, url, headers, params, data))
+            self._inflight_requests[key] = task
+            task.add_done_callback(lambda _: self._inflight_requests.pop(key, None))
+        else:
+            self._request_stats["coalesced_requests"] += 1
+            UPSTREAM_COALESCED.inc(tool=current_tool.get())
+        # Shield so a cancelled caller does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Optional[APIResponse]:
+        """Acquire a token and send the request under the shared request policy"""
         # Get access token
+        token_started = time.perf_counter()
         token = await self.get_access_token()
+        observe_phase("token_wait", time.perf_counter() - token_started)
         if not token:
             logger.error("Failed to get access token for authenticated request")
             return None
@@ -129,39 +414,50 @@ class GoDaddyOAuthClient:
         
         if headers:
             request_headers.update(headers)
-        
+
+        return await request_policy.run(
+            method, lambda: self._attempt(method, url, request_headers, params, data, **kwargs)
+        )
+
+    async def _attempt(
+        self,
+        method: str,
+        url: str,
+        request_headers: Dict[str, str],
+        params: Optional[Dict[str, Any]],
+        data: Optional[Dict[str, Any]],
+        **kwargs
+    ) -> Optional[APIResponse]:
+        """Send one attempt of a request upstream"""
+        self._request_stats["upstream_requests"] += 1
+        tool = current_tool.get()
+        started = time.perf_counter()
+        UPSTREAM_IN_FLIGHT.inc()
         try:
-            # Use aiohttp connector with proper settings to avoid connection issues
-            connector = aiohttp.TCPConnector(
-                limit=10,
-                limit_per_host=5,
-                ttl_dns_cache=300,
-                use_dns_cache=True,
-            )
-            
-            timeout = aiohttp.ClientTimeout(total=30, connect=10)
-            
-            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-                if method.upper() == "GET":
-                    response = await session.get(url, headers=request_headers, params=params, **kwargs)
-                    return response
-                elif method.upper() == "POST":
-                    response = await session.post(url, headers=request_headers, params=params, data=data, **kwargs)
-                    return response
-                elif method.upper() == "PUT":
-                    response = await session.put(url, headers=request_headers, params=params, data=data, **kwargs)
-                    return response
-                elif method.upper() == "DELETE":
-                    response = await session.delete(url, headers=request_headers, params=params, **kwargs)
-                    return response
-                else:
-                    logger.error(f"Unsupported HTTP method: {method}")
-                    return None
+            # Reuse pooled keep-alive connections and read the body before releasing them
+            session = self._get_session()
+            async with session.request(
+                method.upper(), url, headers=request_headers, params=params, data=data, **kwargs
+            ) as response:
+                body = await response.read()
+                UPSTREAM_REQUESTS.inc(tool=tool, status=str(response.status))
+                UPSTREAM_RESPONSE_BYTES.observe(len(body), tool=tool)
+                return APIResponse(response.status, dict(response.headers), body, str(response.url))
                     
         except Exception as e:
             logger.error(f"Error making authenticated request: {str(e)}")
+            UPSTREAM_REQUESTS.inc(tool=tool, status=type(e).__name__)
             return None
+        finally:
+            UPSTREAM_IN_FLIGHT.dec()
+            observe_phase("upstream", time.perf_counter() - started)
     
+    def get_request_stats(self) -> Dict[str, Any]:
+        """Return upstream request and coalescing counters"""
+        stats = dict(self._request_stats)
+        stats["in_flight_coalescable"] = len(self._inflight_requests)
+        return stats
+
     def clear_token_cache(self):
         """Clear the cached token"""
         self._cached_token = None
@@ -190,7 +486,7 @@ async def make_authenticated_request(
     params: Optional[Dict[str, Any]] = None,
     data: Optional[Dict[str, Any]] = None,
     **kwargs
-) -> Optional[aiohttp.ClientResponse]:
+) -> Optional[APIResponse]:
     """
     Convenience function to make authenticated requests
     
@@ -203,7 +499,7 @@ async def make_authenticated_request(
         **kwargs: Additional arguments for aiohttp
         
     Returns:
-        aiohttp.ClientResponse or None if failed
+        APIResponse with the fully read body, or None if failed
     """
     return await oauth_client.make_authenticated_request(
         method, url, headers, params, data, **kwargs
@@ -0,0 +1,160 @@
+"""
+Field projection and compact mode for tool responses
+"""
+from typing import Any, Dict, List, Optional
+
+# Transcript messages that carry no conversational content
+BOILERPLATE_ROLES = (None, "SYSTEM")
+BOILERPLATE_PHRASES = (
+    "conversation rehydrated",
+    "has started a conversation",
+    "joined the conversation",
+    "joined with role",
+    "left the conversation",
+    "conversation closed",
+)
+
+# Short aliases used when shortKeys is requested
+KEY_ALIASES = {
+    "conversationInfo": "ci",
+    "conversations": "cv",
+    "ucid": "u",
+    "contactId": "cid",
+    "initialContactId": "icid",
+    "contactCenterId": "cc",
+    "customerId": "cus",
+    "customerDisplayName": "cn",
+    "createdAt": "ca",
+    "updatedAt": "ua",
+    "state": "st",
+    "agentId": "a",
+    "agentDisplayName": "an",
+    "channel": "ch",
+    "supportLevel": "sl",
+    "latestQueue": "lq",
+    "queueName": "q",
+    "durationSeconds": "d",
+    "summary": "sum",
+    "interactionType": "it",
+    "disconnectReason": "dr",
+    "conversationStartTimestamp": "cs",
+    "conversationEndTimestamp": "ce",
+    "transcripts": "tx",
+    "messageId": "mid",
+    "participantId": "pid",
+    "participantName": "pn",
+    "participantRole": "r",
+    "content": "c",
+    "absoluteTime": "t",
+}
+
+
+def field_tree(fields: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+    """Turn dotted paths (e.g. "conversationInfo.conversations.agentId") into a nested selection tree"""
+    if not fields:
+        return None
+    tree: Dict[str, Any] = {}
+    for path in fields:
+        node = tree
+        parts = [p for p in path.split(".") if p]
+        for i, part in enumerate(parts):
+            if i == len(parts) - 1:
+                node[part] = None
+            elif node.get(part, {}) is None:
+                # A parent path was already selected whole
+                break
+            else:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def project(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """Keep only the selected fields; lists are projected element-wise"""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [project(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {k: project(value[k], sub) for k, sub in tree.items() if k in value}
+    return value
+
+
+def compact(value: Any) -> Any:
+    """Drop nulls, empty strings and empty containers (such as empty attachments)"""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            v = compact(v)
+            if v is None or v == "" or v == {} or v == []:
+                continue
+            out[k] = v
+        return out
+    if isinstance(value, list):
+        return [compact(v) for v in value]
+    return value
+
+
+def is_boilerplate(message: Dict[str, Any]) -> bool:
+    """Whether a transcript message is a system notice rather than conversation"""
+    if message.get("participantRole") in BOILERPLATE_ROLES:
+        return True
+    content = (message.get("content") or "").lower()
+    return any(phrase in content for phrase in BOILERPLATE_PHRASES)
+
+
+def shorten_keys(value: Any, used: Dict[str, str]) -> Any:
+    """Replace known keys with short aliases, recording the aliases used"""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            alias = KEY_ALIASES.get(k, k)
+            if alias != k:
+                used[alias] = k
+            out[alias] = shorten_keys(v, used)
+        return out
+    if isinstance(value, list):
+        return [shorten_keys(v, used) for v in value]
+    return value
+
+
+def shape_response(result: Dict[str, Any], arguments: Dict[str, Any], transcripts: bool = False) -> Dict[str, Any]:
+    """
+    Apply projection and compact mode to a tool response
+
+    Args:
+        result: Tool response with a "data" payload; it is not modified
+        arguments: Tool arguments; reads "fields", "compact" and "shortKeys"
+        transcripts: Whether "data" is a transcripts envelope (fields select message keys)
+
+    Returns:
+        The original result when no shaping was requested, otherwise a shaped copy
+    """
+    fields = arguments.get("fields")
+    compact_mode = bool(arguments.get("compact"))
+    short_keys = bool(arguments.get("shortKeys"))
+    if result.get("status") == "error" or not (fields or compact_mode or short_keys):
+        return result
+
+    tree = field_tree(fields)
+    data = result.get("data")
+
+    if transcripts and isinstance(data, dict):
+        messages = data.get("transcripts") or []
+        if compact_mode:
+            messages = [m for m in messages if not is_boilerplate(m)]
+        data = dict(data)
+        data["transcripts"] = project(messages, tree)
+    else:
+        data = project(data, tree)
+
+    if compact_mode:
+        data = compact(data)
+
+    shaped = dict(result)
+    if short_keys:
+        used: Dict[str, str] = {}
+        shaped["data"] = shorten_keys(data, used)
+        shaped["keys"] = used
+    else:
+        shaped["data"] = data
+    return shaped
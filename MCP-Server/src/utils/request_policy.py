@@ -0,0 +1,190 @@
+"""
+Shared upstream request policy: adaptive concurrency, hedged GETs and jittered retries
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from .fair_scheduler import Ticket, fair_scheduler
+from .metrics import (
+    UPSTREAM_CONCURRENCY_LIMIT,
+    UPSTREAM_HEDGES,
+    UPSTREAM_RETRIES,
+    current_tool,
+)
+from .stats import percentile
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "PUT", "DELETE")
+
+
+class RequestPolicy:
+    """Admission, hedging and retry policy for requests to the Conversation State Service
+
+    - Concurrency is limited with AIMD: the limit grows by 1/limit per healthy response and is
+      multiplied by the backoff ratio on 429/5xx, network errors or responses slower than the
+      latency target (at most once per round trip)
+    - Slots under that limit are handed out by the fair scheduler, which orders waiting
+      requests across tenants and interactive / bulk classes
+    - GETs still pending after the observed latency percentile get one hedged duplicate when
+      the limiter has a free slot; the first usable response wins and the other is cancelled
+    - Network errors and retryable statuses are retried for idempotent methods with
+      full-jitter exponential backoff, honouring a numeric Retry-After
+    """
+
+    def __init__(self):
+        self.min_limit = float(os.getenv("CSS_ADAPTIVE_MIN_LIMIT", "2"))
+        self.max_limit = float(os.getenv("CSS_ADAPTIVE_MAX_LIMIT", "50"))
+        self.limit = min(self.max_limit, max(self.min_limit, float(os.getenv("CSS_ADAPTIVE_INITIAL_LIMIT", "10"))))
+        self.backoff_ratio = float(os.getenv("CSS_ADAPTIVE_BACKOFF_RATIO", "0.7"))
+        self.latency_target = float(os.getenv("CSS_ADAPTIVE_LATENCY_TARGET", "5"))
+
+        self.hedge_enabled = os.getenv("CSS_HEDGE_REQUESTS", "true").lower() == "true"
+        self.hedge_percentile = float(os.getenv("CSS_HEDGE_PERCENTILE", "95"))
+        self.hedge_min_delay = float(os.getenv("CSS_HEDGE_MIN_DELAY", "0.05"))
+        self.hedge_min_samples = int(os.getenv("CSS_HEDGE_MIN_SAMPLES", "20"))
+
+        self.max_retries = int(os.getenv("CSS_RETRY_MAX", "2"))
+        self.retry_base_delay = float(os.getenv("CSS_RETRY_BASE_DELAY", "0.2"))
+        self.retry_max_delay = float(os.getenv("CSS_RETRY_MAX_DELAY", "5"))
+
+        self._latencies: Deque[float] = deque(maxlen=int(os.getenv("CSS_LATENCY_WINDOW", "200")))
+        self._last_decrease = 0.0
+        self._stats = {"requests": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "limit_decreases": 0}
+        UPSTREAM_CONCURRENCY_LIMIT.set(self.limit)
+
+    async def run(self, method: str, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Send a request under the policy
+
+        Args:
+            method: HTTP method, used to decide whether hedging and retries are safe
+            attempt: Coroutine function performing one attempt; returns a response with a
+                ``status`` attribute, or None on a network error
+
+        Returns:
+            The response of the last attempt, or None
+        """
+        method = method.upper()
+        self._stats["requests"] += 1
+        retries = self.max_retries if method in IDEMPOTENT_METHODS else 0
+        result = None
+        for retry in range(retries + 1):
+            if method == "GET" and self.hedge_enabled:
+                result = await self._hedged(attempt)
+            else:
+                result = await self._limited(attempt)
+            if not self.is_retryable(result) or retry == retries:
+                return result
+            delay = self._backoff(retry, result)
+            self._stats["retries"] += 1
+            UPSTREAM_RETRIES.inc(tool=current_tool.get())
+            status = result.status if result is not None else "network error"
+            logger.warning(f"Upstream request failed ({status}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        return result
+
+    @staticmethod
+    def is_retryable(result: Any) -> bool:
+        """Whether a response (or None for a network error) is worth another attempt"""
+        return result is None or result.status in RETRYABLE_STATUSES
+
+    def hedge_delay(self) -> Optional[float]:
+        """Delay before hedging, from the observed latency percentile; None until enough samples"""
+        if len(self._latencies) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, percentile(sorted(self._latencies), self.hedge_percentile))
+
+    async def _limited(self, attempt: Callable[[], Awaitable[Any]], ticket: Optional[Ticket] = None) -> Any:
+        if ticket is None:
+            ticket = await fair_scheduler.acquire(int(self.limit))
+        started = time.monotonic()
+        try:
+            result = await attempt()
+        finally:
+            fair_scheduler.release(ticket, int(self.limit))
+        self._record(result, started)
+        return result
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._limited(attempt)
+
+        primary = asyncio.create_task(self._limited(attempt))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            # Only hedge when there is spare capacity, so hedging never adds to overload
+            ticket = None if done else fair_scheduler.try_acquire(int(self.limit))
+            if ticket is None:
+                return await primary
+
+            hedge = asyncio.create_task(self._limited(attempt, ticket))
+            pending.add(hedge)
+            self._stats["hedges"] += 1
+            tool = current_tool.get()
+            result = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if not self.is_retryable(result):
+                        if task is hedge:
+                            self._stats["hedge_wins"] += 1
+                        UPSTREAM_HEDGES.inc(tool=tool, outcome="hedge" if task is hedge else "primary")
+                        return result
+            UPSTREAM_HEDGES.inc(tool=tool, outcome="failed")
+            return result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _record(self, result: Any, started: float):
+        now = time.monotonic()
+        elapsed = now - started
+        overloaded = self.is_retryable(result) or elapsed > self.latency_target
+        if result is not None and result.status < 500 and result.status != 429:
+            self._latencies.append(elapsed)
+
+        if overloaded:
+            # One multiplicative decrease per round trip: ignore requests sent before the last cut
+            if started >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self._last_decrease = now
+                self._stats["limit_decreases"] += 1
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        UPSTREAM_CONCURRENCY_LIMIT.set(round(self.limit, 3))
+        fair_scheduler.wake(int(self.limit))
+
+    def _backoff(self, retry: int, result: Any) -> float:
+        if result is not None and result.status == 429:
+            try:
+                retry_after = float(result.headers.get("Retry-After", ""))
+                return min(self.retry_max_delay, max(0.0, retry_after))
+            except (TypeError, ValueError):
+                pass
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** retry)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return limiter, hedging and retry counters"""
+        stats = dict(self._stats)
+        stats.update({
+            "concurrency_limit": round(self.limit, 3),
+            "in_flight": fair_scheduler.in_flight,
+            "queued": fair_scheduler.queued,
+            "hedge_delay": self.hedge_delay(),
+            "latency_samples": len(self._latencies),
+        })
+        return stats
+
+
+# Global policy shared by all tools that call the Conversation State Service
+request_policy = RequestPolicy()
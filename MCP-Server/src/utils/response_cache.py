@@ -0,0 +1,262 @@
+"""
+In-process TTL/LRU cache for Conversation State Service responses
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+class ResponseCache:
+    """Size-bounded LRU cache keyed by UCID with state-dependent TTLs
+
+    COMPLETED conversations are kept for a long TTL, in-progress ones for a
+    short TTL. Entries for a UCID are dropped as soon as a newer ``updatedAt``
+    is observed for it (for example in search results).
+
+    When shared state is enabled (``--workers`` mode) the LRU is a first level in front
+    of the shared SQLite cache: writes and invalidations go to both, misses are looked up
+    in the shared cache by ``lookup()``, and local entries live at most
+    CSS_SHARED_CACHE_LOCAL_TTL seconds so invalidations made by other workers are seen
+    within that bound.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("CSS_CACHE_ENABLED", "true").lower() == "true"
+        self.max_entries = int(os.getenv("CSS_CACHE_MAX_ENTRIES", "2000"))
+        self.completed_ttl = float(os.getenv("CSS_CACHE_COMPLETED_TTL", "86400"))
+        self.active_ttl = float(os.getenv("CSS_CACHE_ACTIVE_TTL", "30"))
+        self.shared = shared_state if shared_state.enabled else None
+        self.local_ttl = float(os.getenv("CSS_SHARED_CACHE_LOCAL_TTL", "5"))
+        self._background: Set[asyncio.Task] = set()
+        # key -> (expires_at, updated_at, completed, value)
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Optional[str], bool, Any]]" = OrderedDict()
+        self._keys_by_ucid: Dict[str, Set[CacheKey]] = {}
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "shared_hits": 0,
+        }
+
+    def get(self, kind: str, ucid: str, variant: str = "") -> Optional[Any]:
+        """
+        Look up a cached response
+
+        Args:
+            kind: Response type (e.g. "detail", "transcripts")
+            ucid: Unique Conversation ID
+            variant: Distinguishes calls with different arguments for the same UCID
+
+        Returns:
+            Cached value or None on a miss. Values are shared and must not be mutated.
+        """
+        if not self.enabled:
+            return None
+
+        key = (kind, ucid, variant)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry[3]
+
+    async def lookup(self, kind: str, ucid: str, variant: str = "") -> Optional[Any]:
+        """Like get(), but a local miss is looked up in the cache shared with other workers"""
+        value = self.get(kind, ucid, variant)
+        if value is not None or not self.enabled or self.shared is None:
+            return value
+
+        entry = await self.shared.cache_get(kind, ucid, variant)
+        if entry is None:
+            return None
+        expires_at, updated_at, completed, value = entry
+        self._store((kind, ucid, variant), expires_at - time.time(), updated_at, completed, value)
+        self._stats["shared_hits"] += 1
+        return value
+
+    def put(
+        self,
+        kind: str,
+        ucid: str,
+        value: Any,
+        completed: bool = False,
+        updated_at: Optional[str] = None,
+        variant: str = "",
+    ):
+        """
+        Store a response
+
+        Args:
+            kind: Response type (e.g. "detail", "transcripts")
+            ucid: Unique Conversation ID
+            value: Response to cache
+            completed: Whether the conversation is COMPLETED (selects the long TTL)
+            updated_at: The conversation's updatedAt, used for invalidation
+            variant: Distinguishes calls with different arguments for the same UCID
+        """
+        if not self.enabled or self.max_entries <= 0:
+            return
+
+        ttl = self.completed_ttl if completed else self.active_ttl
+        self._store((kind, ucid, variant), ttl, updated_at, completed, value)
+        if self.shared is not None:
+            self._spawn(self.shared.cache_put(kind, ucid, variant, (time.time() + ttl, updated_at, completed, value)))
+
+    def _store(self, key: CacheKey, ttl: float, updated_at: Optional[str], completed: bool, value: Any):
+        if self.shared is not None:
+            ttl = min(ttl, self.local_ttl)
+        self._entries[key] = (time.monotonic() + ttl, updated_at, completed, value)
+        self._entries.move_to_end(key)
+        self._keys_by_ucid.setdefault(key[1], set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def is_completed(self, ucid: str) -> bool:
+        """Whether a cached detail response marks this UCID as COMPLETED"""
+        for key in self._keys_by_ucid.get(ucid, ()):
+            if key[0] == "detail" and self._entries[key][2]:
+                return True
+        return False
+
+    def updated_at(self, ucid: str) -> Optional[str]:
+        """Latest updatedAt recorded for this UCID, if any"""
+        for key in self._keys_by_ucid.get(ucid, ()):
+            if self._entries[key][1]:
+                return self._entries[key][1]
+        return None
+
+    def observe(self, ucid: str, updated_at: Optional[str]):
+        """Invalidate cached entries for a UCID whose updatedAt has moved"""
+        if self._observe_local(ucid, updated_at) and self.shared is not None:
+            self._spawn(self.shared.cache_invalidate_stale([(ucid, updated_at)]))
+
+    def _observe_local(self, ucid: str, updated_at: Optional[str]) -> bool:
+        if not ucid or not updated_at:
+            return False
+        stale = [
+            key for key in self._keys_by_ucid.get(ucid, ())
+            if self._entries[key][1] and self._entries[key][1] != updated_at
+        ]
+        for key in stale:
+            self._remove(key)
+            self._stats["invalidations"] += 1
+        return True
+
+    def observe_conversations(self, items: Iterable[Dict[str, Any]]):
+        """Invalidate stale entries using conversationInfo.updatedAt from search results"""
+        observed: List[Tuple[str, str]] = []
+        for item in items:
+            info = item.get("conversationInfo") or {}
+            if self._observe_local(info.get("ucid"), info.get("updatedAt")):
+                observed.append((info["ucid"], info["updatedAt"]))
+        # Other workers may hold entries this one never saw, so every observed pair is checked
+        if observed and self.shared is not None:
+            self._spawn(self.shared.cache_invalidate_stale(observed))
+
+    def invalidate(self, ucid: Optional[str] = None) -> int:
+        """
+        Drop cached entries
+
+        Args:
+            ucid: Only drop entries for this UCID; flush everything if omitted
+
+        Returns:
+            Number of entries removed
+        """
+        if ucid is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._keys_by_ucid.clear()
+        else:
+            keys = list(self._keys_by_ucid.get(ucid, ()))
+            for key in keys:
+                self._remove(key)
+            removed = len(keys)
+        if self.shared is not None:
+            self._spawn(self.shared.cache_invalidate(ucid))
+        self._stats["invalidations"] += removed
+        logger.info(f"Response cache invalidated {removed} entries")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current size"""
+        stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        stats["enabled"] = self.enabled
+        stats["shared"] = self.shared is not None
+        return stats
+
+    def _spawn(self, coro):
+        """Run a shared cache write in the background; it is dropped when no event loop is running"""
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._background.add(task)
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Shared cache update failed: {task.exception()}")
+
+    def _remove(self, key: CacheKey):
+        self._entries.pop(key, None)
+        keys = self._keys_by_ucid.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_ucid[key[1]]
+
+
+def conversation_status(data: Any) -> Tuple[bool, Optional[str]]:
+    """
+    Derive (completed, updatedAt) from a contact detail ``data`` payload
+
+    A conversation counts as completed when it has an end timestamp and every
+    leg in ``conversations[]`` is in state COMPLETED.
+    """
+    items = data if isinstance(data, list) else [data]
+    completed = bool(items)
+    updated_at = None
+    for item in items:
+        info = (item or {}).get("conversationInfo") or {}
+        legs = info.get("conversations") or []
+        if not info.get("conversationEndTimestamp") or not legs:
+            completed = False
+        if any(leg.get("state") != "COMPLETED" for leg in legs):
+            completed = False
+        if info.get("updatedAt") and (updated_at is None or info["updatedAt"] > updated_at):
+            updated_at = info["updatedAt"]
+    return completed, updated_at
+
+
+# Global response cache instance
+response_cache = ResponseCache()
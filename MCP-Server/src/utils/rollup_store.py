@@ -0,0 +1,414 @@
+"""
+Incrementally maintained per-hour rollups of conversation legs
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .conversation_store import to_epoch
+from .response_cache import conversation_status
+from .rollups import BOT_AGENT_IDS, flatten_legs
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the duration histogram buckets; the last bucket is open-ended
+DURATION_BUCKETS = (30, 60, 120, 300, 600, 900, 1800, 3600)
+HIST_COLUMNS = [f"h{i}" for i in range(len(DURATION_BUCKETS) + 1)]
+
+# Dimensions a range query can group by, mapped to bucket columns
+DIMENSIONS = {
+    "agent": "agent_id",
+    "latestQueue": "latest_queue",
+    "supportLevel": "support_level",
+    "channel": "channel",
+    "hour": "hour_ts",
+}
+
+_HIST_DEFS = ", ".join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in HIST_COLUMNS)
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS rollup_conversations (
+    ucid TEXT PRIMARY KEY,
+    contact_center_id TEXT NOT NULL,
+    hour_ts REAL NOT NULL,
+    latest_queue TEXT NOT NULL,
+    support_level TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    updated_at TEXT,
+    completed INTEGER NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollup_legs (
+    ucid TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    completed INTEGER NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rollup_legs_by_ucid ON rollup_legs (ucid);
+CREATE TABLE IF NOT EXISTS agent_hour_buckets (
+    contact_center_id TEXT NOT NULL,
+    hour_ts REAL NOT NULL,
+    agent_id TEXT NOT NULL,
+    latest_queue TEXT NOT NULL,
+    support_level TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    interactions INTEGER NOT NULL DEFAULT 0,
+    conversations INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    duration_sum REAL NOT NULL DEFAULT 0,
+    {_HIST_DEFS},
+    PRIMARY KEY (contact_center_id, hour_ts, agent_id, latest_queue, support_level, channel)
+);
+CREATE TABLE IF NOT EXISTS conversation_hour_buckets (
+    contact_center_id TEXT NOT NULL,
+    hour_ts REAL NOT NULL,
+    latest_queue TEXT NOT NULL,
+    support_level TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    conversations INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    duration_sum REAL NOT NULL DEFAULT 0,
+    {_HIST_DEFS},
+    PRIMARY KEY (contact_center_id, hour_ts, latest_queue, support_level, channel)
+);
+CREATE TABLE IF NOT EXISTS rollup_state (
+    contact_center_id TEXT PRIMARY KEY,
+    ingested_from REAL,
+    ingested_until REAL,
+    last_run_at REAL
+);
+"""
+
+
+def duration_bucket(seconds: float) -> int:
+    """Index of the histogram bucket for a duration"""
+    for i, bound in enumerate(DURATION_BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(DURATION_BUCKETS)
+
+
+def _histogram(row: Sequence[Any]) -> Dict[str, int]:
+    labels = [f"le{bound}" for bound in DURATION_BUCKETS] + ["inf"]
+    return {label: int(count) for label, count in zip(labels, row) if count}
+
+
+class RollupStore:
+    """SQLite tables of per-hour rollups keyed by agent, latestQueue, supportLevel, channel and contact center
+
+    Conversations are bucketed by the hour of their ``createdAt``. Each ingested
+    conversation's contribution is remembered, so re-ingesting a conversation whose
+    ``updatedAt`` moved subtracts its old contribution and adds the new one; unchanged
+    conversations are skipped. Range queries sum the hour buckets and never touch
+    individual conversations.
+    """
+
+    def __init__(self):
+        self.path = os.getenv("CSS_ROLLUP_PATH") or os.getenv("CSS_STORE_PATH") or ":memory:"
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stats = {"ingested": 0, "updated": 0, "unchanged": 0, "queries": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            logger.info(f"Rollup store opened at {self.path}")
+        return self._conn
+
+    def _run(self, fn, *args):
+        with self._lock:
+            conn = self._connect()
+            return fn(conn, *args)
+
+    async def _call(self, fn, *args):
+        return await asyncio.to_thread(self._run, fn, *args)
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def ingest(self, contact_center_id: str, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Add search result items to the rollups, replacing the contribution of re-ingested conversations
+
+        Args:
+            contact_center_id: Contact center the items were searched in
+            items: Search result items (``conversationInfo`` objects)
+
+        Returns:
+            Counts of new, updated and unchanged conversations
+        """
+        counts = await self._call(self._ingest, contact_center_id, items)
+        for key, value in counts.items():
+            self._stats[key] += value
+        return counts
+
+    def _ingest(self, conn, contact_center_id, items):
+        counts = {"ingested": 0, "updated": 0, "unchanged": 0}
+        agent_deltas: Dict[tuple, List[float]] = defaultdict(lambda: [0.0] * (4 + len(HIST_COLUMNS)))
+        conversation_deltas: Dict[tuple, List[float]] = defaultdict(lambda: [0.0] * (3 + len(HIST_COLUMNS)))
+        conversation_rows = []
+        leg_rows = []
+        replaced = []
+        seen = set()
+
+        for item in items:
+            info = item.get("conversationInfo") or {}
+            ucid = info.get("ucid")
+            created_at = to_epoch(info.get("createdAt"))
+            if not ucid or created_at is None or ucid in seen:
+                continue
+            seen.add(ucid)
+            updated_at = info.get("updatedAt")
+            previous = conn.execute(
+                "SELECT contact_center_id, hour_ts, latest_queue, support_level, channel, updated_at, completed, duration "
+                "FROM rollup_conversations WHERE ucid = ?",
+                (ucid,),
+            ).fetchone()
+            if previous is not None:
+                if previous[5] == updated_at:
+                    counts["unchanged"] += 1
+                    continue
+                # Take the old contribution back out before adding the new one
+                old_key = previous[:5]
+                old_legs = conn.execute(
+                    "SELECT agent_id, completed, duration FROM rollup_legs WHERE ucid = ?", (ucid,)
+                ).fetchall()
+                self._add(agent_deltas, conversation_deltas, old_key, old_legs, previous[6], previous[7], -1)
+                replaced.append((ucid,))
+                counts["updated"] += 1
+            else:
+                counts["ingested"] += 1
+
+            hour_ts = created_at - created_at % 3600
+            key = (
+                contact_center_id,
+                hour_ts,
+                info.get("latestQueue") or "",
+                info.get("supportLevel") or "",
+                info.get("channel") or "",
+            )
+            legs = [
+                (leg.agent_id, int(leg.state == "COMPLETED"), leg.duration_seconds)
+                for leg in flatten_legs([item], include_bots=True)
+            ]
+            completed = int(conversation_status(item)[0])
+            try:
+                duration = float(info.get("durationSeconds") or 0)
+            except (TypeError, ValueError):
+                duration = 0.0
+            self._add(agent_deltas, conversation_deltas, key, legs, completed, duration, 1)
+            conversation_rows.append((ucid, *key, updated_at, completed, duration))
+            leg_rows.extend((ucid, *leg) for leg in legs)
+
+        if not conversation_rows:
+            return counts
+
+        hist_updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in HIST_COLUMNS)
+        hist_columns = ", ".join(HIST_COLUMNS)
+        hist_params = ", ".join("?" for _ in HIST_COLUMNS)
+        conn.execute("BEGIN")
+        conn.executemany("DELETE FROM rollup_legs WHERE ucid = ?", replaced)
+        conn.executemany(
+            "INSERT INTO rollup_conversations (ucid, contact_center_id, hour_ts, latest_queue, support_level, channel, "
+            "updated_at, completed, duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(ucid) DO UPDATE SET "
+            "contact_center_id = excluded.contact_center_id, hour_ts = excluded.hour_ts, "
+            "latest_queue = excluded.latest_queue, support_level = excluded.support_level, channel = excluded.channel, "
+            "updated_at = excluded.updated_at, completed = excluded.completed, duration = excluded.duration",
+            conversation_rows,
+        )
+        conn.executemany("INSERT INTO rollup_legs (ucid, agent_id, completed, duration) VALUES (?, ?, ?, ?)", leg_rows)
+        conn.executemany(
+            "INSERT INTO agent_hour_buckets (contact_center_id, hour_ts, latest_queue, support_level, channel, agent_id, "
+            f"interactions, conversations, completed, duration_sum, {hist_columns}) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {hist_params}) "
+            "ON CONFLICT(contact_center_id, hour_ts, agent_id, latest_queue, support_level, channel) DO UPDATE SET "
+            "interactions = interactions + excluded.interactions, conversations = conversations + excluded.conversations, "
+            "completed = completed + excluded.completed, duration_sum = duration_sum + excluded.duration_sum, "
+            f"{hist_updates}",
+            [(*key, *values) for key, values in agent_deltas.items()],
+        )
+        conn.executemany(
+            "INSERT INTO conversation_hour_buckets (contact_center_id, hour_ts, latest_queue, support_level, channel, "
+            f"conversations, completed, duration_sum, {hist_columns}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, {hist_params}) "
+            "ON CONFLICT(contact_center_id, hour_ts, latest_queue, support_level, channel) DO UPDATE SET "
+            "conversations = conversations + excluded.conversations, completed = completed + excluded.completed, "
+            f"duration_sum = duration_sum + excluded.duration_sum, {hist_updates}",
+            [(*key, *values) for key, values in conversation_deltas.items()],
+        )
+        conn.execute("COMMIT")
+        return counts
+
+    @staticmethod
+    def _add(agent_deltas, conversation_deltas, key, legs, completed, duration, sign):
+        """Accumulate one conversation's contribution (sign -1 removes it)"""
+        conversation = conversation_deltas[key]
+        conversation[0] += sign
+        conversation[1] += sign * completed
+        conversation[2] += sign * duration
+        conversation[3 + duration_bucket(duration)] += sign
+
+        agents_seen = set()
+        for agent_id, leg_completed, leg_duration in legs:
+            values = agent_deltas[(*key, agent_id)]
+            values[0] += sign
+            if agent_id not in agents_seen:
+                values[1] += sign
+                agents_seen.add(agent_id)
+            values[2] += sign * leg_completed
+            values[3] += sign * leg_duration
+            values[4 + duration_bucket(leg_duration)] += sign
+
+    async def mark_ingested(self, contact_center_id: str, start_ts: float, end_ts: float):
+        """Record that conversations created in [start_ts, end_ts) have been ingested"""
+        await self._call(self._mark_ingested, contact_center_id, start_ts, end_ts)
+
+    @staticmethod
+    def _mark_ingested(conn, contact_center_id, start_ts, end_ts):
+        conn.execute(
+            "INSERT INTO rollup_state (contact_center_id, ingested_from, ingested_until, last_run_at) "
+            "VALUES (?, ?, ?, ?) ON CONFLICT(contact_center_id) DO UPDATE SET "
+            "ingested_from = MIN(ingested_from, excluded.ingested_from), "
+            "ingested_until = MAX(ingested_until, excluded.ingested_until), last_run_at = excluded.last_run_at",
+            (contact_center_id, start_ts, end_ts, time.time()),
+        )
+
+    async def get_state(self, contact_center_id: str) -> Optional[Dict[str, float]]:
+        """Return the ingested window and last run time for a contact center"""
+        row = await self._call(
+            lambda conn: conn.execute(
+                "SELECT ingested_from, ingested_until, last_run_at FROM rollup_state WHERE contact_center_id = ?",
+                (contact_center_id,),
+            ).fetchone()
+        )
+        if row is None:
+            return None
+        return {"ingestedFrom": row[0], "ingestedUntil": row[1], "lastRunAt": row[2]}
+
+    async def query(
+        self,
+        contact_center_id: str,
+        start_ts: float,
+        end_ts: float,
+        group_by: Sequence[str],
+        filters: Dict[str, Iterable[str]],
+        include_bots: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Combine the hour buckets in [start_ts, end_ts)
+
+        Args:
+            contact_center_id: Contact center to query
+            start_ts: Range start in epoch seconds (rounded down to the hour)
+            end_ts: Range end in epoch seconds, exclusive (rounded up to the hour)
+            group_by: Dimensions from DIMENSIONS to group the agent rollups by
+            filters: Allowed values per dimension (e.g. {"agent": [...], "channel": [...]})
+            include_bots: Include CUSTOM_BOT legs in the agent rollups
+
+        Returns:
+            Dict with "groups" (agent rollups), "team" (conversation totals) and "bucketsScanned"
+        """
+        self._stats["queries"] += 1
+        start_ts = start_ts - start_ts % 3600
+        end_ts = end_ts if end_ts % 3600 == 0 else end_ts - end_ts % 3600 + 3600
+        return await self._call(
+            self._query, contact_center_id, start_ts, end_ts, list(group_by), filters, include_bots
+        )
+
+    def _query(self, conn, contact_center_id, start_ts, end_ts, group_by, filters, include_bots):
+        hist_sums = ", ".join(f"SUM({c})" for c in HIST_COLUMNS)
+        conditions = ["contact_center_id = ?", "hour_ts >= ?", "hour_ts < ?"]
+        params: List[Any] = [contact_center_id, start_ts, end_ts]
+        for dimension, values in filters.items():
+            values = list(values or [])
+            if values and dimension in DIMENSIONS:
+                conditions.append(f"{DIMENSIONS[dimension]} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+
+        agent_conditions = list(conditions)
+        agent_params = list(params)
+        if not include_bots:
+            agent_conditions.append(f"agent_id NOT IN ({', '.join('?' for _ in BOT_AGENT_IDS)})")
+            agent_params.extend(BOT_AGENT_IDS)
+        columns = [DIMENSIONS[d] for d in group_by]
+        select = ", ".join(columns + [
+            "SUM(interactions)", "SUM(conversations)", "SUM(completed)", "SUM(duration_sum)", hist_sums, "COUNT(*)"
+        ])
+        group_clause = f" GROUP BY {', '.join(columns)}" if columns else ""
+        rows = conn.execute(
+            f"SELECT {select} FROM agent_hour_buckets WHERE {' AND '.join(agent_conditions)}{group_clause} "
+            "ORDER BY SUM(interactions) DESC",
+            agent_params,
+        ).fetchall()
+
+        groups = []
+        buckets_scanned = 0
+        width = len(columns)
+        for row in rows:
+            interactions, conversations, completed, duration = row[width:width + 4]
+            if not interactions:
+                continue
+            key = {}
+            for dimension, value in zip(group_by, row[:width]):
+                key[dimension] = value
+            groups.append({
+                **key,
+                "totalInteractions": int(interactions),
+                "totalConversations": int(conversations),
+                "completedInteractions": int(completed),
+                "sessionCompletionRate": round(completed / interactions, 4),
+                "totalDurationSeconds": round(duration, 3),
+                "averageDurationSeconds": round(duration / interactions, 3),
+                "durationHistogram": _histogram(row[width + 4:width + 4 + len(HIST_COLUMNS)]),
+            })
+            buckets_scanned += int(row[-1])
+
+        # Team totals come from conversation-level buckets, so multi-agent conversations count once
+        team_conditions = [c for c in conditions if not c.startswith(DIMENSIONS["agent"])]
+        team_params = [contact_center_id, start_ts, end_ts]
+        for dimension, values in filters.items():
+            values = list(values or [])
+            if values and dimension in DIMENSIONS and dimension != "agent":
+                team_params.extend(values)
+        team = conn.execute(
+            f"SELECT SUM(conversations), SUM(completed), SUM(duration_sum), {hist_sums}, COUNT(*) "
+            f"FROM conversation_hour_buckets WHERE {' AND '.join(team_conditions)}",
+            team_params,
+        ).fetchone()
+        conversations = int(team[0] or 0)
+        return {
+            "groups": groups,
+            "team": {
+                "agents": len({g.get("agent") for g in groups}) if "agent" in group_by else None,
+                "totalConversations": conversations,
+                "completedConversations": int(team[1] or 0),
+                "totalDurationSeconds": round(team[2] or 0.0, 3),
+                "averageDurationSeconds": round((team[2] or 0.0) / conversations, 3) if conversations else None,
+                "durationHistogram": _histogram([v or 0 for v in team[3:3 + len(HIST_COLUMNS)]]),
+            },
+            "bucketsScanned": buckets_scanned + int(team[-1] or 0),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return ingestion and query counters"""
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["path"] = self.path
+        return stats
+
+
+# Global rollup store instance
+rollup_store = RollupStore()
@@ -0,0 +1,195 @@
+"""
+Aggregation helpers for per-agent conversation rollups
+"""
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BOT_AGENT_IDS = ("CUSTOM_BOT",)
+
+
+class Leg(NamedTuple):
+    """One agent leg of a conversation (an entry of conversationInfo.conversations[])"""
+    ucid: str
+    contact_center_id: str
+    agent_id: str
+    agent_name: str
+    queue: str
+    latest_queue: str
+    support_level: str
+    channel: str
+    state: str
+    disconnect_reason: str
+    created_at: str
+    duration_seconds: float
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def flatten_legs(items: Iterable[Dict[str, Any]], include_bots: bool = False) -> List[Leg]:
+    """Flatten search result items into one row per agent leg"""
+    legs = []
+    for item in items:
+        info = item.get("conversationInfo") or {}
+        for leg in info.get("conversations") or []:
+            agent_id = leg.get("agentId") or ""
+            if not agent_id or (not include_bots and agent_id in BOT_AGENT_IDS):
+                continue
+            legs.append(Leg(
+                ucid=info.get("ucid") or leg.get("ucid") or "",
+                contact_center_id=info.get("contactCenterId") or "",
+                agent_id=agent_id,
+                agent_name=leg.get("agentDisplayName") or "",
+                queue=leg.get("queueName") or "",
+                latest_queue=info.get("latestQueue") or "",
+                support_level=info.get("supportLevel") or "",
+                channel=info.get("channel") or "",
+                state=leg.get("state") or "",
+                disconnect_reason=leg.get("disconnectReason") or "",
+                created_at=leg.get("createdAt") or info.get("createdAt") or "",
+                duration_seconds=_to_float(leg.get("durationSeconds")),
+            ))
+    return legs
+
+
+def _encode(values: Iterable[str]) -> Tuple[List[int], List[str]]:
+    """Map values to integer codes in first-seen order, returning (codes, labels)"""
+    index: Dict[str, int] = {}
+    codes = [index.setdefault(value, len(index)) for value in values]
+    return codes, list(index)
+
+
+def summarize_by_agent(legs: Iterable[Leg], agent_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Aggregate legs per agent
+
+    The legs are turned into columns once, with agents and every breakdown field encoded as
+    integer codes. With NumPy each figure is a ``bincount`` over the agent codes (breakdowns
+    over agent code x value code); without it the same columns are counted in a plain loop.
+
+    Args:
+        legs: Rows from flatten_legs
+        agent_ids: Only include these agents if given
+
+    Returns:
+        Dict with "agentsSummary" (one entry per agent, busiest first) and "team" totals
+    """
+    wanted = set(agent_ids) if agent_ids else None
+    legs = [leg for leg in legs if wanted is None or leg.agent_id in wanted]
+
+    agent_codes, agents = _encode(leg.agent_id for leg in legs)
+    ucid_codes, ucids = _encode(leg.ucid for leg in legs)
+    durations = [leg.duration_seconds for leg in legs]
+    completed = [leg.state == "COMPLETED" for leg in legs]
+    breakdowns = {
+        "queues": _encode(leg.queue or "unknown" for leg in legs),
+        "supportLevels": _encode(leg.support_level or "unknown" for leg in legs),
+        "channels": _encode(leg.channel or "unknown" for leg in legs),
+        # An empty disconnect reason is not counted
+        "disconnectReasons": _encode(leg.disconnect_reason for leg in legs),
+    }
+    names: Dict[int, str] = {}
+    for code, leg in zip(agent_codes, legs):
+        if leg.agent_name and code not in names:
+            names[code] = leg.agent_name
+
+    aggregate = _aggregate_numpy if numpy is not None else _aggregate_python
+    totals, counts = aggregate(agent_codes, len(agents), ucid_codes, durations, completed, breakdowns)
+
+    summaries = []
+    # Busiest first; ties keep the order agents were first seen in
+    for code in sorted(range(len(agents)), key=lambda c: -totals["interactions"][c]):
+        count = totals["interactions"][code]
+        duration = totals["durations"][code]
+        summaries.append({
+            "agentId": agents[code],
+            "agentName": names.get(code, ""),
+            "performanceStats": {
+                "totalInteractions": count,
+                "totalConversations": totals["conversations"][code],
+                "totalDurationSeconds": round(duration, 3),
+                "averageDurationSeconds": round(duration / count, 3),
+                "sessionCompletionRate": round(totals["completed"][code] / count, 4),
+            },
+            **{
+                name: {labels[value]: n for value, n in counts[name][code].items() if labels[value]}
+                for name, (_, labels) in breakdowns.items()
+            },
+        })
+
+    return {
+        "agentsSummary": summaries,
+        "team": {
+            "agents": len(summaries),
+            "totalInteractions": len(legs),
+            "totalConversations": len(ucids),
+            "totalDurationSeconds": round(sum(totals["durations"]), 3),
+        },
+    }
+
+
+def _aggregate_numpy(
+    agent_codes: List[int],
+    agents: int,
+    ucid_codes: List[int],
+    durations: List[float],
+    completed: List[bool],
+    breakdowns: Dict[str, Tuple[List[int], List[str]]],
+) -> Tuple[Dict[str, List[Any]], Dict[str, List[Dict[int, int]]]]:
+    agent = numpy.array(agent_codes, dtype=numpy.int64)
+    totals = {
+        "interactions": numpy.bincount(agent, minlength=agents).tolist(),
+        "durations": numpy.bincount(agent, weights=numpy.array(durations, dtype=float), minlength=agents).tolist(),
+        "completed": numpy.bincount(agent, weights=numpy.array(completed, dtype=float), minlength=agents).tolist(),
+    }
+    # Distinct conversations: unique (agent, ucid) pairs counted per agent
+    width = max(ucid_codes, default=0) + 1
+    pairs = numpy.unique(agent * width + numpy.array(ucid_codes, dtype=numpy.int64))
+    totals["conversations"] = numpy.bincount(pairs // width, minlength=agents).tolist()
+
+    counts = {}
+    for name, (codes, labels) in breakdowns.items():
+        width = max(1, len(labels))
+        grid = numpy.bincount(agent * width + numpy.array(codes, dtype=numpy.int64), minlength=agents * width)
+        grid = grid.reshape(agents, width)
+        counts[name] = [{int(v): int(grid[a, v]) for v in numpy.flatnonzero(grid[a])} for a in range(agents)]
+    return totals, counts
+
+
+def _aggregate_python(
+    agent_codes: List[int],
+    agents: int,
+    ucid_codes: List[int],
+    durations: List[float],
+    completed: List[bool],
+    breakdowns: Dict[str, Tuple[List[int], List[str]]],
+) -> Tuple[Dict[str, List[Any]], Dict[str, List[Dict[int, int]]]]:
+    totals: Dict[str, List[Any]] = {
+        "interactions": [0] * agents,
+        "durations": [0.0] * agents,
+        "completed": [0] * agents,
+    }
+    conversations: List[set] = [set() for _ in range(agents)]
+    for code, ucid, duration, done in zip(agent_codes, ucid_codes, durations, completed):
+        totals["interactions"][code] += 1
+        totals["durations"][code] += duration
+        totals["completed"][code] += done
+        conversations[code].add(ucid)
+    totals["conversations"] = [len(c) for c in conversations]
+
+    counts = {}
+    for name, (codes, _) in breakdowns.items():
+        per_agent: List[Counter] = [Counter() for _ in range(agents)]
+        for code, value in zip(agent_codes, codes):
+            per_agent[code][value] += 1
+        counts[name] = [dict(c) for c in per_agent]
+    return totals, counts
@@ -0,0 +1,243 @@
+"""
+Batched lexicon sentiment scoring of transcript messages
+"""
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .projection import is_boilerplate
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SENTIMENT_BACKEND = "numpy" if numpy is not None else "python"
+
+# Same lexicon and arithmetic as the LLM server's sentimentAnalyzer.ts, so scores are comparable.
+# The TypeScript analyzer lists intensifiers but only applies their weight to a word that is both
+# an intensifier and a sentiment word, which never happens, so they are left out here.
+POSITIVE_WORDS = frozenset((
+    "good", "great", "excellent", "amazing", "wonderful", "fantastic", "awesome",
+    "helpful", "thank", "thanks", "appreciate", "solved", "fixed", "resolved",
+    "perfect", "love", "happy", "satisfied", "pleased", "delighted",
+    "outstanding", "brilliant", "superb", "marvelous", "exceptional",
+))
+NEGATIVE_WORDS = frozenset((
+    "bad", "terrible", "awful", "horrible", "disgusting", "hate", "angry",
+    "frustrated", "disappointed", "annoyed", "upset", "mad", "furious",
+    "problem", "issue", "broken", "failed", "wrong", "error", "mistake",
+    "useless", "waste", "worst",
+))
+LABEL_THRESHOLD = 0.1
+
+ESCALATION_PHRASES = ("escalate", "manager", "supervisor", "complaint")
+RESOLUTION_PHRASES = ("resolved", "fixed", "solved", "thank you", "appreciate")
+
+CUSTOMER_ROLE = "CUSTOMER"
+AGENT_ROLE = "AGENT"
+
+# Same tokenization as the TypeScript analyzer: lowercase, ASCII word characters
+_WORD = re.compile(r"\w+", re.ASCII)
+
+
+def label_for(score: float) -> str:
+    """Map a score in [-1, 1] to positive / negative / neutral"""
+    if score > LABEL_THRESHOLD:
+        return "positive"
+    if score < -LABEL_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+
+def trend_slope(scores: Sequence[float]) -> Optional[float]:
+    """Least-squares slope of scores over message position (change per message)"""
+    n = len(scores)
+    if n < 2:
+        return None
+    mean_x = (n - 1) / 2.0
+    mean_y = sum(scores) / n
+    covariance = sum((i - mean_x) * (y - mean_y) for i, y in enumerate(scores))
+    variance = sum((i - mean_x) ** 2 for i in range(n))
+    return covariance / variance
+
+
+class LexiconScorer:
+    """Scores many messages at once against the sentiment lexicon
+
+    Lexicon words get ids 1..n with a polarity of +1 or -1; every other token maps to id 0
+    with polarity 0, so the lookup arrays are built once and never grow. With NumPy the
+    per-token polarities of a whole batch are gathered and summed per message with
+    ``bincount``; without it the same arithmetic runs in a plain loop. A message scores
+    (positive - negative) / tokens, clamped to [-1, 1].
+    """
+
+    def __init__(self):
+        words = sorted(POSITIVE_WORDS) + sorted(NEGATIVE_WORDS)
+        self._ids: Dict[str, int] = {word: i for i, word in enumerate(words, start=1)}
+        self._polarity: List[float] = [0.0] + [1.0] * len(POSITIVE_WORDS) + [-1.0] * len(NEGATIVE_WORDS)
+        self._polarity_array = numpy.array(self._polarity) if numpy is not None else None
+
+    def score(self, texts: Sequence[str]) -> List[float]:
+        """
+        Score a batch of message texts
+
+        Args:
+            texts: Message contents
+
+        Returns:
+            One score in [-1, 1] per text
+        """
+        ids: List[int] = []
+        lengths: List[int] = []
+        lookup = self._ids.get
+        for text in texts:
+            tokens = _WORD.findall(text.lower()) if text else []
+            ids.extend(lookup(t, 0) for t in tokens)
+            lengths.append(len(tokens))
+        if numpy is not None:
+            return self._score_numpy(ids, lengths)
+        return self._score_python(ids, lengths)
+
+    def _score_numpy(self, ids: List[int], lengths: List[int]) -> List[float]:
+        if not ids:
+            return [0.0] * len(lengths)
+        counts = numpy.array(lengths, dtype=numpy.int64)
+        owner = numpy.repeat(numpy.arange(len(lengths)), counts)
+        weights = self._polarity_array[numpy.array(ids, dtype=numpy.int64)]
+        totals = numpy.bincount(owner, weights=weights, minlength=len(lengths))
+        scores = numpy.divide(totals, counts, out=numpy.zeros(len(lengths)), where=counts > 0)
+        return numpy.clip(scores, -1.0, 1.0).tolist()
+
+    def _score_python(self, ids: List[int], lengths: List[int]) -> List[float]:
+        polarity = self._polarity
+        scores = []
+        offset = 0
+        for length in lengths:
+            total = sum(polarity[token_id] for token_id in ids[offset:offset + length])
+            offset += length
+            scores.append(max(-1.0, min(1.0, total / length)) if length else 0.0)
+        return scores
+
+
+def _role_summary(scores: List[float]) -> Dict[str, Any]:
+    count = len(scores)
+    if not count:
+        return {"messages": 0}
+    labels = [label_for(s) for s in scores]
+    slope = trend_slope(scores)
+    return {
+        "messages": count,
+        "meanScore": round(sum(scores) / count, 4),
+        "magnitude": round(sum(abs(s) for s in scores) / count, 4),
+        "positive": labels.count("positive"),
+        "negative": labels.count("negative"),
+        "neutral": labels.count("neutral"),
+        "firstScore": round(scores[0], 4),
+        "lastScore": round(scores[-1], 4),
+        "trendSlope": round(slope, 5) if slope is not None else None,
+    }
+
+
+class SentimentBatch:
+    """Collects transcript messages from many conversations and scores them together
+
+    Only the text needed for scoring is kept until ``flush()``; the results hold numbers only.
+    """
+
+    def __init__(self, scorer: LexiconScorer, include_messages: bool = False):
+        self.scorer = scorer
+        self.include_messages = include_messages
+        self.pending_messages = 0
+        self._conversations: List[Tuple[str, List[Tuple[Optional[str], str, str]], Dict[str, Any]]] = []
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def add(self, ucid: str, messages: List[Dict[str, Any]]):
+        """Queue one transcript; system notices and boilerplate are skipped"""
+        kept = []
+        agents: List[str] = []
+        escalation = resolution = False
+        for message in messages:
+            content = message.get("content")
+            if not content or not isinstance(content, str) or is_boilerplate(message):
+                continue
+            role = message.get("participantRole") or "NONE"
+            if role == AGENT_ROLE and message.get("participantId") and message["participantId"] not in agents:
+                agents.append(message["participantId"])
+            lowered = content.lower()
+            escalation = escalation or any(p in lowered for p in ESCALATION_PHRASES)
+            resolution = resolution or any(p in lowered for p in RESOLUTION_PHRASES)
+            kept.append((message.get("messageId"), role, content))
+        self._conversations.append((ucid, kept, {"agentIds": agents, "escalation": escalation, "resolution": resolution}))
+        self.pending_messages += len(kept)
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Score every queued message in one pass and return per-conversation results"""
+        texts = [content for _, kept, _ in self._conversations for _, _, content in kept]
+        scores = iter(self.scorer.score(texts))
+
+        results = []
+        for ucid, kept, flags in self._conversations:
+            by_role: Dict[str, List[float]] = {}
+            per_message = []
+            for message_id, role, _ in kept:
+                score = next(scores)
+                by_role.setdefault(role, []).append(score)
+                if self.include_messages:
+                    per_message.append({"messageId": message_id, "participantRole": role, "score": round(score, 4)})
+
+            # The conversation score follows the TypeScript analyzer: mean over customer messages
+            customer = by_role.get(CUSTOMER_ROLE, [])
+            score = sum(customer) / len(customer) if customer else 0.0
+            result = {
+                "ucid": ucid,
+                "score": round(score, 4),
+                "magnitude": round(sum(abs(s) for s in customer) / len(customer), 4) if customer else 0.0,
+                "label": label_for(score),
+                "customerSatisfaction": round(max(0.0, min(1.0, (score + 1) / 2)), 4),
+                "trendSlope": _role_summary(customer).get("trendSlope"),
+                "byRole": {role: _role_summary(values) for role, values in by_role.items()},
+                **flags,
+            }
+            if self.include_messages:
+                result["messages"] = per_message
+            results.append(result)
+
+        self._conversations = []
+        self.pending_messages = 0
+        return results
+
+
+def summarize(conversations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate per-conversation sentiment into overall and per-agent figures"""
+    def aggregate(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        count = len(items)
+        if not count:
+            return {"conversations": 0}
+        mean = sum(c["score"] for c in items) / count
+        slopes = [c["trendSlope"] for c in items if c["trendSlope"] is not None]
+        labels = [c["label"] for c in items]
+        return {
+            "conversations": count,
+            "meanScore": round(mean, 4),
+            "label": label_for(mean),
+            "customerSatisfaction": round(max(0.0, min(1.0, (mean + 1) / 2)), 4),
+            "meanTrendSlope": round(sum(slopes) / len(slopes), 5) if slopes else None,
+            "labels": {label: labels.count(label) for label in ("positive", "neutral", "negative")},
+            "escalationRate": round(sum(1 for c in items if c["escalation"]) / count, 4),
+            "resolutionRate": round(sum(1 for c in items if c["resolution"]) / count, 4),
+        }
+
+    by_agent: Dict[str, List[Dict[str, Any]]] = {}
+    for conversation in conversations:
+        for agent_id in conversation["agentIds"]:
+            by_agent.setdefault(agent_id, []).append(conversation)
+    return {
+        **aggregate(conversations),
+        "byAgent": {agent_id: aggregate(items) for agent_id, items in by_agent.items()},
+    }
+
+
+# Global lexicon scorer instance
+lexicon_scorer = LexiconScorer()
@@ -0,0 +1,232 @@
+"""
+SQLite state shared by the worker processes of one server: OAuth token, response cache and leases
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .fast_json import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    name TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cache_entries (
+    kind TEXT NOT NULL,
+    ucid TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    updated_at TEXT,
+    completed INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (kind, ucid, variant)
+);
+CREATE INDEX IF NOT EXISTS cache_entries_by_ucid ON cache_entries (ucid);
+CREATE INDEX IF NOT EXISTS cache_entries_by_expiry ON cache_entries (expires_at);
+"""
+
+# Cached entry as stored: (expires_at, updated_at, completed, value), expires_at in wall-clock seconds
+SharedEntry = Tuple[float, Optional[str], bool, Any]
+
+
+class SharedStateStore:
+    """Small SQLite (WAL) database that lets ``--workers`` processes share state
+
+    Holds the current OAuth token with its wall-clock expiry, a second-level response
+    cache behind each process's in-memory LRU, and named leases so that only one
+    process fetches a token or runs a background job at a time. The token and cached
+    conversations are sensitive, so the database and its -wal/-shm files are created
+    readable by the owner only. Disabled unless CSS_SHARED_STATE_PATH is set;
+    ``main.py --workers N`` sets it for its workers.
+    """
+
+    def __init__(self):
+        self.path = os.getenv("CSS_SHARED_STATE_PATH", "")
+        self.enabled = bool(self.path)
+        self.holder = f"{os.getpid()}"
+        self.max_cache_entries = int(os.getenv("CSS_SHARED_CACHE_MAX_ENTRIES", "20000"))
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._stats = {"cache_hits": 0, "cache_misses": 0, "cache_writes": 0, "token_reads": 0, "token_writes": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # Create the file owner-only before SQLite writes anything to it
+            os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+            os.chmod(self.path, 0o600)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            # SQLite gives -wal/-shm the database file's mode; make sure of it for files left by an older run
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.chmod(self.path + suffix, 0o600)
+            self._conn = conn
+            logger.info(f"Shared state opened at {self.path}")
+        return self._conn
+
+    def _run(self, fn, *args):
+        with self._lock:
+            conn = self._connect()
+            return fn(conn, *args)
+
+    async def _call(self, fn, *args):
+        return await asyncio.to_thread(self._run, fn, *args)
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # Leases
+
+    async def try_lease(self, name: str, seconds: float) -> bool:
+        """
+        Take or renew a named lease for this process
+
+        Args:
+            name: Lease name, e.g. "oauth-token"
+            seconds: How long the lease is held unless released or renewed
+
+        Returns:
+            True when this process holds the lease
+        """
+        return await self._call(self._try_lease, name, seconds)
+
+    def _try_lease(self, conn, name, seconds):
+        now = time.time()
+        conn.execute(
+            "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+            "WHERE leases.holder = excluded.holder OR leases.expires_at < ?",
+            (name, self.holder, now + seconds, now),
+        )
+        row = conn.execute("SELECT holder FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == self.holder
+
+    async def release_lease(self, name: str):
+        """Give up a lease held by this process"""
+        await self._call(
+            lambda conn: conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, self.holder))
+        )
+
+    # OAuth token
+
+    async def get_token(self, name: str) -> Tuple[Optional[str], Optional[float]]:
+        """Return the shared token and its wall-clock expiry, or (None, None)"""
+        self._stats["token_reads"] += 1
+        row = await self._call(
+            lambda conn: conn.execute("SELECT token, expires_at FROM tokens WHERE name = ?", (name,)).fetchone()
+        )
+        return (row[0], row[1]) if row else (None, None)
+
+    async def put_token(self, name: str, token: str, expires_at: float):
+        """Publish a freshly fetched token with its wall-clock expiry"""
+        self._stats["token_writes"] += 1
+        await self._call(
+            lambda conn: conn.execute(
+                "INSERT INTO tokens (name, token, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at",
+                (name, token, expires_at),
+            )
+        )
+
+    # Response cache
+
+    async def cache_get(self, kind: str, ucid: str, variant: str) -> Optional[SharedEntry]:
+        """Return an unexpired cache entry, decoded, or None"""
+        entry = await asyncio.to_thread(self._cache_get, kind, ucid, variant)
+        self._stats["cache_hits" if entry else "cache_misses"] += 1
+        return entry
+
+    def _cache_get(self, kind, ucid, variant):
+        row = self._run(
+            lambda conn: conn.execute(
+                "SELECT expires_at, updated_at, completed, value FROM cache_entries "
+                "WHERE kind = ? AND ucid = ? AND variant = ? AND expires_at > ?",
+                (kind, ucid, variant, time.time()),
+            ).fetchone()
+        )
+        if row is None:
+            return None
+        # Decoded outside the lock so other workers' threads are not held up by large transcripts
+        return row[0], row[1], bool(row[2]), loads(row[3])
+
+    async def cache_put(self, kind: str, ucid: str, variant: str, entry: SharedEntry):
+        """Store a cache entry; expired and then soonest-expiring entries are pruned past the size cap"""
+        self._stats["cache_writes"] += 1
+        self._puts += 1
+        # Encode outside the lock; large transcripts are the expensive part
+        expires_at, updated_at, completed, value = entry
+        encoded = await asyncio.to_thread(dumps, value)
+        await self._call(
+            self._cache_put, (kind, ucid, variant, expires_at, updated_at, int(completed), encoded),
+            self._puts % 100 == 0,
+        )
+
+    def _cache_put(self, conn, row, prune):
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries "
+            "(kind, ucid, variant, expires_at, updated_at, completed, value) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            row,
+        )
+        if prune:
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+            excess = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_cache_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE rowid IN "
+                    "(SELECT rowid FROM cache_entries ORDER BY expires_at LIMIT ?)",
+                    (excess,),
+                )
+
+    async def cache_invalidate(self, ucid: Optional[str] = None):
+        """Drop shared cache entries for one UCID, or all of them"""
+        if ucid is None:
+            await self._call(lambda conn: conn.execute("DELETE FROM cache_entries"))
+        else:
+            await self._call(lambda conn: conn.execute("DELETE FROM cache_entries WHERE ucid = ?", (ucid,)))
+
+    async def cache_invalidate_stale(self, observed: List[Tuple[str, str]]):
+        """Drop entries of each (ucid, updatedAt) pair that were stored with a different updatedAt"""
+        if observed:
+            await self._call(
+                lambda conn: conn.executemany(
+                    "DELETE FROM cache_entries WHERE ucid = ? AND updated_at IS NOT NULL AND updated_at != ?",
+                    observed,
+                )
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return shared state counters"""
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["enabled"] = self.enabled
+        stats["path"] = self.path
+        stats["pid"] = os.getpid()
+        if self.enabled and self._conn is not None:
+            stats["cache_entries"] = self._run(
+                lambda conn: conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            )
+        return stats
+
+
+# Global shared state instance
+shared_state = SharedStateStore()
@@ -0,0 +1,113 @@
+"""
+Startup warm-up and readiness state
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from .endpoints import conversation_endpoints
+from .oauth_client import oauth_client
+
+logger = logging.getLogger(__name__)
+
+
+class StartupWarmup:
+    """Does the first-call work of a fresh process before it reports ready
+
+    Fetches the OAuth token (retrying until it succeeds), resolves the Conversation
+    State Service host and opens CSS_WARMUP_CONNECTIONS pooled connections to it. Each
+    phase is timed; the breakdown, together with the import and server start phases
+    recorded by main.py, is logged once and served by the readiness route. DNS and
+    connection failures are logged but do not hold readiness back.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("CSS_WARMUP", "true").lower() in ("1", "true", "yes")
+        self.connections = int(os.getenv("CSS_WARMUP_CONNECTIONS", "4"))
+        self.token_retry_max = float(os.getenv("CSS_WARMUP_TOKEN_RETRY_MAX_SECONDS", "30"))
+        self.process_started = time.perf_counter()
+        self._imports_done = self.process_started
+        self.ready = False
+        self.phases: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def mark(self, phase: str, seconds: float):
+        """Record the duration of a startup phase"""
+        self.phases[phase] = round(seconds * 1000, 1)
+
+    def imports_done(self, started_at: float):
+        """Record module import time, measured from ``started_at`` (perf_counter at the top of main.py)"""
+        self.process_started = started_at
+        self._imports_done = time.perf_counter()
+        self.mark("imports", self._imports_done - started_at)
+
+    def start(self):
+        """Start warming up in the background; readiness flips when it finishes"""
+        self.mark("server_start", time.perf_counter() - self._imports_done)
+        if not self.enabled:
+            self.ready = True
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop an unfinished warm-up"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self):
+        started = time.perf_counter()
+
+        phase_started = time.perf_counter()
+        retry_delay = 1.0
+        while not await oauth_client.get_access_token():
+            self.errors["oauth_token"] = "token request failed"
+            logger.warning(f"Warm-up could not get an OAuth token, retrying in {retry_delay:.0f}s")
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, self.token_retry_max)
+        self.errors.pop("oauth_token", None)
+        self.mark("oauth_token", time.perf_counter() - phase_started)
+
+        phase_started = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().getaddrinfo(conversation_endpoints.host, conversation_endpoints.port)
+        except OSError as e:
+            self.errors["dns"] = str(e)
+            logger.warning(f"Warm-up could not resolve {conversation_endpoints.host}: {str(e)}")
+        self.mark("dns", time.perf_counter() - phase_started)
+
+        phase_started = time.perf_counter()
+        opened = await oauth_client.warm_connections(conversation_endpoints.base_url, self.connections)
+        if opened < self.connections:
+            self.errors["connections"] = f"{opened} of {self.connections} connections opened"
+        self.mark("connections", time.perf_counter() - phase_started)
+
+        self.mark("warmup", time.perf_counter() - started)
+        self.mark("total", time.perf_counter() - self.process_started)
+        self.ready = True
+        logger.info(
+            "Cold start: " + ", ".join(f"{phase}={ms:.1f}ms" for phase, ms in self.phases.items())
+            + (f" (errors: {self.errors})" if self.errors else "")
+        )
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return readiness, phase timings in milliseconds and warm-up errors"""
+        return {
+            "ready": self.ready,
+            "warmup": self.enabled,
+            "phasesMs": dict(self.phases),
+            "errors": dict(self.errors),
+            "endpoints": conversation_endpoints.describe(),
+        }
+
+
+# Global startup warm-up instance
+startup_warmup = StartupWarmup()
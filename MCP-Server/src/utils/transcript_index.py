@@ -0,0 +1,382 @@
+"""
+Full-text index of transcript message content (SQLite FTS5)
+"""
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from .conversation_store import to_epoch
+from .projection import is_boilerplate
+
+logger = logging.getLogger(__name__)
+
+AGENT_ROLE = "AGENT"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcript_messages (
+    id INTEGER PRIMARY KEY,
+    ucid TEXT NOT NULL,
+    message_id TEXT,
+    role TEXT NOT NULL,
+    agent_id TEXT,
+    participant_name TEXT,
+    sent_at REAL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcript_messages_by_ucid ON transcript_messages (ucid);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+    content,
+    content='transcript_messages',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS transcript_messages_ai AFTER INSERT ON transcript_messages BEGIN
+    INSERT INTO transcript_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS transcript_messages_ad AFTER DELETE ON transcript_messages BEGIN
+    INSERT INTO transcript_fts (transcript_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TABLE IF NOT EXISTS transcript_documents (
+    ucid TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    messages INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+"""
+
+SEARCH_MODES = ("all", "any", "phrase")
+
+_TOKEN = re.compile(r"\w+\*?", re.UNICODE)
+
+
+def build_match_query(query: str, mode: str = "all") -> Optional[str]:
+    """
+    Turn user input into an FTS5 MATCH expression
+
+    Every token is quoted, so FTS5 operators in the input are treated as text. A trailing
+    ``*`` keeps prefix matching (``refund*`` matches "refunded").
+
+    Args:
+        query: Keywords or phrase to look for
+        mode: "all" (every keyword), "any" (at least one keyword) or "phrase" (exact sequence)
+
+    Returns:
+        MATCH expression, or None when the query has no searchable tokens
+    """
+    tokens = _TOKEN.findall(query or "")
+    if not tokens:
+        return None
+    if mode == "phrase":
+        return '"' + " ".join(t.rstrip("*") for t in tokens) + '"'
+    terms = [f'"{t[:-1]}"*' if t.endswith("*") else f'"{t}"' for t in tokens]
+    return (" OR " if mode == "any" else " AND ").join(terms)
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class TranscriptIndex:
+    """SQLite FTS5 index over the ``content`` of fetched transcript messages
+
+    Every message row carries the UCID, the participant role, the agent handling the
+    conversation when it was sent (the participantId of the latest AGENT message) and
+    its time. System notices and boilerplate are not indexed. A conversation is
+    re-indexed only when its message count or last message changes.
+
+    Tools hand transcripts to ``schedule()``, which queues them for a background task so
+    fetches never wait on the index; when the queue (CSS_TRANSCRIPT_INDEX_QUEUE) is full
+    the transcript is not indexed. The index has no eviction, so it is only on by default
+    when it is backed by a file (CSS_TRANSCRIPT_INDEX_PATH or CSS_STORE_PATH).
+    """
+
+    def __init__(self):
+        path = os.getenv("CSS_TRANSCRIPT_INDEX_PATH") or os.getenv("CSS_STORE_PATH") or ""
+        self.path = path or ":memory:"
+        self.enabled = os.getenv("CSS_TRANSCRIPT_INDEX", "true" if path else "false").lower() in ("1", "true", "yes")
+        self.max_rows = int(os.getenv("CSS_TRANSCRIPT_SEARCH_MAX_ROWS", "10000"))
+        self.queue_size = int(os.getenv("CSS_TRANSCRIPT_INDEX_QUEUE", "256"))
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stats = {
+            "documents_indexed": 0,
+            "documents_unchanged": 0,
+            "documents_dropped": 0,
+            "messages_indexed": 0,
+            "searches": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            logger.info(f"Transcript index opened at {self.path}")
+        return self._conn
+
+    def _run(self, fn, *args):
+        with self._lock:
+            conn = self._connect()
+            return fn(conn, *args)
+
+    async def _call(self, fn, *args):
+        return await asyncio.to_thread(self._run, fn, *args)
+
+    def close(self):
+        """Stop background indexing and close the underlying database connection"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+            self._queue = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def schedule(self, ucid: str, messages: List[Dict[str, Any]], if_missing: bool = False):
+        """
+        Queue one complete transcript for indexing in the background
+
+        Args:
+            ucid: Conversation the transcript belongs to
+            messages: Transcript messages in time order
+            if_missing: Skip the transcript when the UCID is already indexed, whatever its content
+        """
+        if not self.enabled or not ucid:
+            return
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue(maxsize=max(1, self.queue_size))
+            self._worker = loop.create_task(self._drain(self._queue))
+        try:
+            self._queue.put_nowait((ucid, messages, if_missing))
+        except asyncio.QueueFull:
+            self._stats["documents_dropped"] += 1
+            logger.debug(f"Transcript index queue is full, not indexing {ucid}")
+
+    async def _drain(self, queue: asyncio.Queue):
+        while True:
+            ucid, messages, if_missing = await queue.get()
+            try:
+                await self.add(ucid, messages, if_missing)
+            except Exception as e:
+                logger.warning(f"Failed to index transcript for {ucid}: {str(e)}")
+            finally:
+                queue.task_done()
+
+    async def add(self, ucid: str, messages: List[Dict[str, Any]], if_missing: bool = False) -> bool:
+        """
+        Index (or re-index) the messages of one complete transcript now
+
+        Args:
+            ucid: Conversation the transcript belongs to
+            messages: Transcript messages in time order
+            if_missing: Skip the transcript when the UCID is already indexed, whatever its content
+
+        Returns:
+            True when the transcript was (re-)indexed, False when it was skipped or unchanged
+        """
+        if not self.enabled or not ucid:
+            return False
+        last = messages[-1] if messages else {}
+        signature = f"{len(messages)}:{last.get('messageId') or last.get('absoluteTime') or ''}"
+        indexed = await self._call(self._add, ucid, signature, messages, if_missing)
+        if indexed:
+            self._stats["documents_indexed"] += 1
+        else:
+            self._stats["documents_unchanged"] += 1
+        return indexed
+
+    def _add(self, conn, ucid, signature, messages, if_missing):
+        row = conn.execute("SELECT signature FROM transcript_documents WHERE ucid = ?", (ucid,)).fetchone()
+        if row is not None and (if_missing or row[0] == signature):
+            return False
+
+        rows = []
+        agent_id = None
+        for message in messages:
+            role = message.get("participantRole") or "NONE"
+            if role == AGENT_ROLE and message.get("participantId"):
+                agent_id = message.get("participantId")
+            content = message.get("content")
+            if not content or not isinstance(content, str) or is_boilerplate(message):
+                continue
+            rows.append((
+                ucid,
+                message.get("messageId"),
+                role,
+                agent_id,
+                message.get("participantName"),
+                to_epoch(message.get("absoluteTime")),
+                content,
+            ))
+
+        conn.execute("BEGIN")
+        conn.execute("DELETE FROM transcript_messages WHERE ucid = ?", (ucid,))
+        conn.executemany(
+            "INSERT INTO transcript_messages (ucid, message_id, role, agent_id, participant_name, sent_at, content) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute(
+            "INSERT INTO transcript_documents (ucid, signature, messages, indexed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(ucid) DO UPDATE SET signature = excluded.signature, messages = excluded.messages, "
+            "indexed_at = excluded.indexed_at",
+            (ucid, signature, len(rows), time.time()),
+        )
+        conn.execute("COMMIT")
+        self._stats["messages_indexed"] += len(rows)
+        return True
+
+    async def indexed_ucids(self, ucids: Sequence[str]) -> List[str]:
+        """Return the subset of ucids that are already indexed"""
+        ucids = list(ucids)
+        if not ucids:
+            return []
+        return await self._call(self._indexed_ucids, ucids)
+
+    @staticmethod
+    def _indexed_ucids(conn, ucids):
+        found = []
+        # Stay well below SQLite's bound parameter limit
+        for i in range(0, len(ucids), 500):
+            chunk = ucids[i:i + 500]
+            found.extend(
+                row[0] for row in conn.execute(
+                    f"SELECT ucid FROM transcript_documents WHERE ucid IN ({', '.join('?' for _ in chunk)})", chunk
+                )
+            )
+        return found
+
+    async def search(
+        self,
+        match: str,
+        ucids: Optional[Sequence[str]] = None,
+        roles: Optional[Sequence[str]] = None,
+        agent_ids: Optional[Sequence[str]] = None,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        limit: int = 50,
+        snippets_per_conversation: int = 3,
+    ) -> Dict[str, Any]:
+        """
+        Find conversations with messages matching an FTS5 expression
+
+        Args:
+            match: MATCH expression (see build_match_query)
+            ucids: Only search these conversations
+            roles: Only match messages from these participant roles
+            agent_ids: Only match messages sent while one of these agents handled the conversation
+            start_ts: Only match messages sent at or after this epoch time
+            end_ts: Only match messages sent at or before this epoch time
+            limit: Maximum number of conversations to return
+            snippets_per_conversation: Maximum number of snippets per conversation
+
+        Returns:
+            Dict with "conversations" (best match first), "matchedMessages" and "truncated"
+        """
+        self._stats["searches"] += 1
+        return await self._call(
+            self._search, match, list(ucids or []), list(roles or []), list(agent_ids or []),
+            start_ts, end_ts, limit, snippets_per_conversation,
+        )
+
+    def _search(self, conn, match, ucids, roles, agent_ids, start_ts, end_ts, limit, snippets_per_conversation):
+        conditions = ["transcript_fts MATCH ?"]
+        params: List[Any] = [match]
+        if ucids:
+            # A date range can resolve to more UCIDs than SQLite allows bound parameters,
+            # so they are joined from a temporary table (private to this connection)
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS search_ucids (ucid TEXT PRIMARY KEY)")
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM search_ucids")
+            conn.executemany("INSERT OR IGNORE INTO search_ucids (ucid) VALUES (?)", [(ucid,) for ucid in ucids])
+            conn.execute("COMMIT")
+            conditions.append("m.ucid IN (SELECT ucid FROM search_ucids)")
+        for column, values in (("m.role", roles), ("m.agent_id", agent_ids)):
+            if values:
+                conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+        if start_ts is not None:
+            conditions.append("m.sent_at >= ?")
+            params.append(start_ts)
+        if end_ts is not None:
+            conditions.append("m.sent_at <= ?")
+            params.append(end_ts)
+        params.append(self.max_rows + 1)
+
+        rows = conn.execute(
+            "SELECT m.ucid, m.message_id, m.role, m.agent_id, m.participant_name, m.sent_at, "
+            "snippet(transcript_fts, 0, '[', ']', '...', 16), bm25(transcript_fts) "
+            "FROM transcript_fts JOIN transcript_messages m ON m.id = transcript_fts.rowid "
+            f"WHERE {' AND '.join(conditions)} ORDER BY bm25(transcript_fts) LIMIT ?",
+            params,
+        ).fetchall()
+        truncated = len(rows) > self.max_rows
+        rows = rows[:self.max_rows]
+
+        # Rows arrive best match first, so conversations are ranked by their best message
+        conversations: Dict[str, Dict[str, Any]] = {}
+        for ucid, message_id, role, agent_id, participant_name, sent_at, snippet, _rank in rows:
+            conversation = conversations.get(ucid)
+            if conversation is None:
+                if len(conversations) >= limit:
+                    truncated = True
+                    continue
+                conversation = conversations[ucid] = {
+                    "ucid": ucid, "matchedMessages": 0, "agentIds": [], "firstMatchAt": None, "snippets": []
+                }
+            conversation["matchedMessages"] += 1
+            if agent_id and agent_id not in conversation["agentIds"]:
+                conversation["agentIds"].append(agent_id)
+            if sent_at is not None and (conversation["firstMatchAt"] is None or sent_at < conversation["firstMatchAt"]):
+                conversation["firstMatchAt"] = sent_at
+            if len(conversation["snippets"]) < snippets_per_conversation:
+                conversation["snippets"].append({
+                    "messageId": message_id,
+                    "participantRole": role,
+                    "participantName": participant_name,
+                    "agentId": agent_id,
+                    "absoluteTime": _iso(sent_at),
+                    "snippet": snippet,
+                })
+        for conversation in conversations.values():
+            conversation["firstMatchAt"] = _iso(conversation["firstMatchAt"])
+        return {
+            "conversations": list(conversations.values()),
+            "matchedMessages": len(rows),
+            "truncated": truncated,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return index counters and sizes"""
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["enabled"] = self.enabled
+        stats["path"] = self.path
+        stats["queued"] = self._queue.qsize() if self._queue is not None else 0
+        if self.enabled and self._conn is not None:
+            documents, messages = self._run(
+                lambda conn: conn.execute("SELECT COUNT(*), COALESCE(SUM(messages), 0) FROM transcript_documents").fetchone()
+            )
+            stats["documents"] = documents
+            stats["messages"] = messages
+        return stats
+
+
+# Global transcript index instance
+transcript_index = TranscriptIndex()
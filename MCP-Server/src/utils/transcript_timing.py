@@ -0,0 +1,128 @@
+"""
+Single-pass timing analytics over transcript messages
+"""
+from typing import Any, Dict, List, Optional
+
+from .projection import is_boilerplate
+from .stats import percentile
+
+AGENT_ROLE = "AGENT"
+CUSTOMER_ROLE = "CUSTOMER"
+
+
+def latency_summary(values: List[float]) -> Dict[str, Any]:
+    """Count, mean and p50/p90/p99/max of latency samples in seconds"""
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(percentile(ordered, 50), 3),
+        "p90": round(percentile(ordered, 90), 3),
+        "p99": round(percentile(ordered, 99), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+class ConversationTimer:
+    """Accumulates timing metrics for one conversation, one message at a time
+
+    - Agent latency: first unanswered customer message -> next substantive agent message,
+      once an agent is in the conversation
+    - Customer latency: first unanswered agent message -> next customer message
+    - Customer wait: first customer message -> first agent event (join or message)
+    - Each gap between consecutive messages is attributed to the role of the earlier
+      message, which gives the time spent in bot, SYSTEM, agent and customer segments
+    """
+
+    def __init__(self, idle_gap_seconds: float = 60.0):
+        self.idle_gap_seconds = idle_gap_seconds
+        self.message_count = 0
+        self.role_counts: Dict[str, int] = {}
+        self.time_by_role: Dict[str, float] = {}
+        self.agent_latencies: List[float] = []
+        self.agent_latencies_by_agent: Dict[str, List[float]] = {}
+        self.customer_latencies: List[float] = []
+        self.idle_count = 0
+        self.idle_total = 0.0
+        self.idle_max = 0.0
+        self._first_at: Optional[float] = None
+        self._last_at: Optional[float] = None
+        self._last_role = "NONE"
+        self._first_customer_at: Optional[float] = None
+        self._first_agent_event_at: Optional[float] = None
+        self._first_agent_reply_at: Optional[float] = None
+        self._pending_customer_since: Optional[float] = None
+        self._pending_agent_since: Optional[float] = None
+
+    def add(self, message: Dict[str, Any], sent_at: float):
+        """Feed the next message (in time order) with its timestamp in epoch seconds"""
+        role = message.get("participantRole") or "NONE"
+        boilerplate = is_boilerplate(message)
+        self.message_count += 1
+        self.role_counts[role] = self.role_counts.get(role, 0) + 1
+
+        if self._last_at is not None:
+            gap = max(0.0, sent_at - self._last_at)
+            self.time_by_role[self._last_role] = self.time_by_role.get(self._last_role, 0.0) + gap
+            if gap >= self.idle_gap_seconds:
+                self.idle_count += 1
+                self.idle_total += gap
+                self.idle_max = max(self.idle_max, gap)
+        else:
+            self._first_at = sent_at
+        self._last_at = sent_at
+        self._last_role = role
+
+        if role == AGENT_ROLE:
+            if self._first_agent_event_at is None:
+                self._first_agent_event_at = sent_at
+            if not boilerplate:
+                if self._first_agent_reply_at is None:
+                    self._first_agent_reply_at = sent_at
+                if self._pending_customer_since is not None:
+                    latency = sent_at - self._pending_customer_since
+                    self.agent_latencies.append(latency)
+                    agent_id = message.get("participantId") or "unknown"
+                    self.agent_latencies_by_agent.setdefault(agent_id, []).append(latency)
+                    self._pending_customer_since = None
+                if self._pending_agent_since is None:
+                    self._pending_agent_since = sent_at
+        elif role == CUSTOMER_ROLE and not boilerplate:
+            if self._first_customer_at is None:
+                self._first_customer_at = sent_at
+            if self._pending_agent_since is not None:
+                self.customer_latencies.append(sent_at - self._pending_agent_since)
+                self._pending_agent_since = None
+            if self._first_agent_event_at is not None and self._pending_customer_since is None:
+                self._pending_customer_since = sent_at
+
+    def result(self) -> Dict[str, Any]:
+        """Timing metrics for the messages seen so far"""
+        def since_first_customer(at: Optional[float]) -> Optional[float]:
+            if at is None or self._first_customer_at is None:
+                return None
+            return round(max(0.0, at - self._first_customer_at), 3)
+
+        agent_first_response = None
+        if self._first_agent_reply_at is not None and self._first_agent_event_at is not None:
+            agent_first_response = round(self._first_agent_reply_at - self._first_agent_event_at, 3)
+
+        return {
+            "messageCount": self.message_count,
+            "roleCounts": self.role_counts,
+            "durationSeconds": round((self._last_at or 0.0) - (self._first_at or 0.0), 3),
+            "customerWaitSeconds": since_first_customer(self._first_agent_event_at),
+            "firstResponseSeconds": since_first_customer(self._first_agent_reply_at),
+            "agentFirstResponseSeconds": agent_first_response,
+            "agentLatency": latency_summary(self.agent_latencies),
+            "customerLatency": latency_summary(self.customer_latencies),
+            "idleGaps": {
+                "thresholdSeconds": self.idle_gap_seconds,
+                "count": self.idle_count,
+                "totalSeconds": round(self.idle_total, 3),
+                "maxSeconds": round(self.idle_max, 3),
+            },
+            "timeByRoleSeconds": {role: round(seconds, 3) for role, seconds in self.time_by_role.items()},
+        }
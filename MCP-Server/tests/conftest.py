@@ -0,0 +1,57 @@
+"""
+Shared pytest setup: make the server's ``src`` package importable and run the benchmark stub for tests
+"""
+import os
+import socket
+import sys
+
+import pytest
+import pytest_asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web  # noqa: E402
+
+from benchmarks.stub_server import StubConfig, StubServer  # noqa: E402
+
+
+def free_port() -> int:
+    """Return a TCP port that is free on localhost"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def unused_port() -> int:
+    return free_port()
+
+
+@pytest_asyncio.fixture
+async def stub():
+    """Run the Conversation State Service stub on a free port; yields the StubServer with ``base_url`` set"""
+    server = StubServer(StubConfig(conversations=50, latency_ms=1, latency_jitter_ms=0, token_latency_ms=1))
+    runner = web.AppRunner(server.app(), access_log=None)
+    await runner.setup()
+    port = free_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    server.base_url = f"http://127.0.0.1:{port}"
+    yield server
+    await runner.cleanup()
+
+
+@pytest_asyncio.fixture
+async def upstream(stub, monkeypatch):
+    """Point the global endpoints and OAuth client at the stub; yields the StubServer"""
+    from src.utils.endpoints import conversation_endpoints
+    from src.utils.oauth_client import oauth_client
+
+    monkeypatch.setattr(conversation_endpoints, "base_url", stub.base_url)
+    monkeypatch.setattr(conversation_endpoints, "host", "127.0.0.1")
+    monkeypatch.setattr(conversation_endpoints, "port", int(stub.base_url.rsplit(":", 1)[1]))
+    monkeypatch.setattr(oauth_client, "oauth_url", f"{stub.base_url}/v2/oauth2/token")
+    oauth_client.clear_token_cache()
+    yield stub
+    # The pooled session belongs to this test's event loop
+    await oauth_client.close()
+    oauth_client.clear_token_cache()
@@ -0,0 +1,65 @@
+"""
+Test for the admin endpoints of ``main.py``: off without CSS_ADMIN_TOKEN, bearer-token protected with it
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _serve(stub, port, admin_token):
+    env = {
+        **os.environ,
+        "OAUTH_TOKEN_URL": f"{stub.base_url}/v2/oauth2/token",
+        "CONVERSATION_API_BASE_URL": stub.base_url,
+        "CSS_ADMIN_TOKEN": admin_token,
+    }
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "--port", str(port), "--log-level", "WARNING"],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"http://127.0.0.1:{port}/ready") as response:
+                    if response.status == 200:
+                        return process
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    process.kill()
+    raise AssertionError("server did not become ready")
+
+
+async def _flush(port, headers=None):
+    async with aiohttp.ClientSession() as session:
+        async with session.post(f"http://127.0.0.1:{port}/admin/cache/flush", headers=headers) as response:
+            return response.status
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("admin_token", ["", "s3cret"])
+async def test_admin_endpoints_require_the_token(stub, unused_port, admin_token):
+    process = await _serve(stub, unused_port, admin_token)
+    try:
+        statuses = [
+            await _flush(unused_port),
+            await _flush(unused_port, {"Authorization": "Bearer wrong"}),
+            await _flush(unused_port, {"Authorization": "Bearer s3cret"}),
+        ]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        await asyncio.to_thread(process.wait, 30)
+
+    if admin_token:
+        assert statuses == [401, 401, 200]
+    else:
+        assert statuses == [404, 404, 404]
@@ -0,0 +1,162 @@
+"""
+Tests for the local conversation store: synced range coverage, upserts, stale rows and store-served searches
+"""
+import sqlite3
+import time
+
+import pytest
+
+from src.tools import css_search_tool
+from src.tools.css_search_tool import CSSSearchTool
+from src.utils.conversation_store import ConversationStore, format_search_date, merge_ranges, to_epoch
+
+DAY = to_epoch("2025-10-15 00:00")
+
+
+def _item(ucid, created_at, updated_at="2025-10-15T12:00:00.000Z", completed=True):
+    info = {
+        "ucid": ucid,
+        "createdAt": created_at,
+        "updatedAt": updated_at,
+        "conversations": [{"state": "COMPLETED" if completed else "CONNECTED"}],
+    }
+    if completed:
+        info["conversationEndTimestamp"] = updated_at
+    return {"conversationInfo": info}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore()
+    store.path = str(tmp_path / "store.db")
+    store.enabled = True
+    yield store
+    store.close()
+
+
+def test_merge_ranges():
+    assert merge_ranges([(120, 180), (0, 60), (60, 150), (300, 360)]) == [(0, 180), (300, 360)]
+
+
+@pytest.mark.asyncio
+async def test_range_coverage(store):
+    assert await store.missing_ranges("cc", DAY, DAY + 3600) == [(DAY, DAY + 3600)]
+
+    await store.mark_synced("cc", DAY + 600, DAY + 1200)
+    await store.mark_synced("cc", DAY + 1200, DAY + 1800)
+    assert await store.missing_ranges("cc", DAY, DAY + 3600) == [(DAY, DAY + 600), (DAY + 1800, DAY + 3600)]
+    # Adjacent ranges were merged into one row
+    assert store.get_stats()["syncedRanges"]["cc"]["ranges"] == 1
+
+    # Other contact centers are tracked separately
+    assert await store.missing_ranges("other", DAY + 600, DAY + 1200) == [(DAY + 600, DAY + 1200)]
+
+    await store.mark_synced("cc", DAY, DAY + 3600)
+    assert await store.missing_ranges("cc", DAY, DAY + 3600) == []
+
+
+@pytest.mark.asyncio
+async def test_recent_edge_is_never_marked_synced(store):
+    now = time.time() - time.time() % 60
+    await store.mark_synced("cc", now - 2 * store.settle_seconds, now)
+    gaps = await store.missing_ranges("cc", now - 2 * store.settle_seconds, now)
+    assert len(gaps) == 1
+    assert gaps[0][1] == now
+    assert gaps[0][0] == pytest.approx(time.time() - store.settle_seconds, abs=5)
+
+
+@pytest.mark.asyncio
+async def test_upsert_replaces_by_ucid(store):
+    await store.upsert_conversations("cc", [
+        _item("u1", "2025-10-15T00:10:00Z"),
+        _item("u2", "2025-10-15T00:20:00Z"),
+        {"conversationInfo": {"ucid": "no-created-at"}},
+    ])
+    await store.upsert_conversations("cc", [_item("u1", "2025-10-15T00:30:00Z", updated_at="2025-10-15T13:00:00.000Z")])
+
+    results = await store.query_conversations("cc", DAY, DAY + 3600, 10)
+    assert [r["conversationInfo"]["ucid"] for r in results] == ["u1", "u2"]
+    assert results[0]["conversationInfo"]["updatedAt"] == "2025-10-15T13:00:00.000Z"
+
+    assert [r["conversationInfo"]["ucid"] for r in await store.query_conversations("cc", DAY, DAY + 3600, 1, 1)] == ["u2"]
+
+
+@pytest.mark.asyncio
+async def test_stale_rows_are_searched_again(store):
+    await store.upsert_conversations("cc", [
+        _item("done", "2025-10-15T00:10:30Z"),
+        _item("active", "2025-10-15T00:20:30Z", completed=False),
+    ])
+    await store.mark_synced("cc", DAY, DAY + 3600)
+
+    # Fresh rows are trusted
+    assert await store.missing_ranges("cc", DAY, DAY + 3600) == []
+
+    # Once the active row is older than the TTL its minute goes upstream again, the completed one does not
+    store.active_ttl = -1
+    assert await store.missing_ranges("cc", DAY, DAY + 3600) == [(DAY + 1200, DAY + 1260)]
+
+    # Re-syncing the minute makes its rows fresh, even one the search no longer returned
+    await store.mark_synced("cc", DAY + 1200, DAY + 1260)
+    store.active_ttl = 60
+    assert await store.missing_ranges("cc", DAY, DAY + 3600) == []
+
+
+@pytest.mark.asyncio
+async def test_recently_updated_rows_are_stale(store):
+    recent = format_search_date(time.time() - 120).replace(" ", "T") + ":00Z"
+    await store.upsert_conversations("cc", [_item("late-update", "2025-10-15T00:10:30Z", updated_at=recent)])
+    await store.mark_synced("cc", DAY, DAY + 3600)
+    store.active_ttl = -1
+    assert await store.missing_ranges("cc", DAY, DAY + 3600) == [(DAY + 600, DAY + 660)]
+
+
+@pytest.mark.asyncio
+async def test_store_created_before_freshness_columns(store):
+    conn = sqlite3.connect(store.path)
+    conn.execute(
+        "CREATE TABLE conversations (ucid TEXT PRIMARY KEY, contact_center_id TEXT NOT NULL, "
+        "created_at REAL NOT NULL, updated_at TEXT, payload TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO conversations VALUES ('old', 'cc', ?, NULL, '{}')", (DAY + 30,))
+    conn.commit()
+    conn.close()
+
+    await store.mark_synced("cc", DAY + 3600, DAY + 7200)
+    # The old row has never been checked, so its minute is fetched again
+    assert await store.missing_ranges("cc", DAY, DAY + 60) == [(DAY, DAY + 60)]
+
+
+@pytest.mark.asyncio
+async def test_search_from_store_pages_with_a_cursor(upstream, store, monkeypatch):
+    monkeypatch.setattr(css_search_tool, "conversation_store", store)
+    arguments = {
+        "contactCenterId": upstream.config.contact_center_id,
+        "startDate": "2025-10-15 00:00",
+        "endDate": "2025-10-15 23:59",
+        "autoPaginate": True,
+        "maxResults": 20,
+    }
+
+    pages = []
+    cursor = None
+    while True:
+        result = await CSSSearchTool().execute({**arguments, "cursor": cursor} if cursor else arguments)
+        assert result["pagination"]["source"] == "store"
+        pages.append([item["conversationInfo"]["ucid"] for item in result["data"]])
+        cursor = result["pagination"]["cursor"]
+        assert result["pagination"]["truncated"] == (cursor is not None)
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [20, 20, 10]
+    assert sorted(ucid for page in pages for ucid in page) == sorted(upstream.data.ucids)
+    # The window was synced once; later pages were served from the store
+    searches = upstream.counts["search"]
+    assert result["pagination"]["upstreamRanges"] == 0
+
+    # The last conversation is still active, so once the TTL passes its minute is searched again
+    store.active_ttl = -1
+    result = await CSSSearchTool().execute(arguments)
+    assert result["pagination"]["upstreamRanges"] == 1
+    assert upstream.counts["search"] == searches + 1
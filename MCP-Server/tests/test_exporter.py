@@ -0,0 +1,172 @@
+"""
+Tests for export row flattening, column types and the batched table writers
+"""
+import json
+import os
+
+import pytest
+
+from src.tools import css_transcripts_tool
+from src.tools.export_tool import ConversationExportTool
+from src.utils import exporter
+from src.utils.exporter import (
+    CONVERSATION_COLUMNS,
+    ExportWriter,
+    _coerce,
+    conversation_row,
+    leg_rows,
+    message_rows,
+    schema_description,
+)
+from src.utils.response_cache import ResponseCache
+
+
+def _info():
+    return {
+        "ucid": "u1",
+        "customerAuthenticated": "TRUE",
+        "durationSeconds": "300.0",
+        "createdAt": "2025-10-15T10:00:00.000Z",
+        "deviceInfo": {"os": "iOS"},
+        "surveyScore": 5,
+        "conversations": [
+            {"contactId": "c1", "state": "COMPLETED", "durationSeconds": "120", "queueName": "billing"},
+            {"contactId": "c2", "state": "COMPLETED", "durationSeconds": "", "transferReason": "escalation"},
+        ],
+    }
+
+
+def _read_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_values_are_coerced_to_the_column_type():
+    assert _coerce("12.0", "int64") == 12
+    assert _coerce(7, "int64") == 7
+    assert _coerce("TRUE", "bool") is True
+    assert _coerce("no", "bool") is False
+    assert _coerce(False, "bool") is False
+    # Unparseable and empty values become nulls rather than failing the export
+    assert _coerce("soon", "int64") is None
+    assert _coerce("", "int64") is None
+    assert _coerce(None, "string") is None
+    # An empty string is a value in a string column
+    assert _coerce("", "string") == ""
+    assert json.loads(_coerce({"os": "iOS"}, "string")) == {"os": "iOS"}
+    assert _coerce("2025-10-15T10:00:00.000Z", "timestamp") == "2025-10-15T10:00:00.000Z"
+
+
+def test_conversation_row_keeps_unknown_keys_in_extra():
+    row = conversation_row(_info())
+
+    assert list(row) == [name for name, _ in CONVERSATION_COLUMNS]
+    assert row["customerAuthenticated"] is True
+    assert row["durationSeconds"] == 300
+    assert json.loads(row["deviceInfo"]) == {"os": "iOS"}
+    assert row["legCount"] == 2
+    # Legs go to their own table and are not repeated in extra
+    assert json.loads(row["extra"]) == {"surveyScore": 5}
+    assert conversation_row({"ucid": "u2"})["extra"] is None
+
+
+def test_leg_and_message_rows_are_keyed_by_ucid():
+    legs = leg_rows(_info())
+
+    assert [(leg["ucid"], leg["legIndex"], leg["contactId"]) for leg in legs] == [("u1", 0, "c1"), ("u1", 1, "c2")]
+    assert [leg["durationSeconds"] for leg in legs] == [120, None]
+    assert legs[0]["extra"] is None
+    assert json.loads(legs[1]["extra"]) == {"transferReason": "escalation"}
+
+    messages = message_rows("u1", [
+        {"messageId": "m0", "content": "hi", "attachments": [{"name": "a.png"}]},
+        {"messageId": "m1", "content": "bye", "reaction": "thumbs-up"},
+    ])
+    assert [(m["ucid"], m["sequence"], m["messageId"]) for m in messages] == [("u1", 0, "m0"), ("u1", 1, "m1")]
+    assert json.loads(messages[0]["attachments"]) == [{"name": "a.png"}]
+    assert json.loads(messages[1]["extra"]) == {"reaction": "thumbs-up"}
+
+
+def test_schema_description_lists_every_table():
+    schema = schema_description()
+    assert set(schema) == {"conversations", "legs", "messages"}
+    assert schema["conversations"]["legCount"] == "int64"
+    assert schema["legs"]["conversationEndTimestamp"] == "timestamp"
+    assert schema["messages"]["sequence"] == "int64"
+
+
+def test_ndjson_rows_are_written_in_batches(tmp_path):
+    writer = ExportWriter(str(tmp_path / "out"), "ndjson", 2, ("conversations", "legs"))
+    writer.write("conversations", [conversation_row(_info()), conversation_row({"ucid": "u2"})])
+    writer.write("conversations", [conversation_row({"ucid": "u3"})])
+    writer.write("legs", leg_rows(_info()))
+    # Tables that are not exported are ignored
+    writer.write("messages", message_rows("u1", [{"messageId": "m0"}]))
+
+    files = writer.close()
+
+    assert set(files) == {"conversations", "legs"}
+    assert (files["conversations"]["rows"], files["conversations"]["batches"]) == (3, 2)
+    assert (files["legs"]["rows"], files["legs"]["batches"]) == (2, 1)
+    rows = _read_ndjson(files["conversations"]["path"])
+    assert [row["ucid"] for row in rows] == ["u1", "u2", "u3"]
+    assert rows[0]["durationSeconds"] == 300
+    assert files["conversations"]["bytes"] == os.path.getsize(files["conversations"]["path"])
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ExportWriter(str(tmp_path), "csv", 10, ("conversations",))
+
+
+def test_columnar_formats_need_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter, "pyarrow", None)
+    for file_format in ("parquet", "arrow"):
+        with pytest.raises(ValueError, match="requires pyarrow"):
+            ExportWriter(str(tmp_path), file_format, 10, ("conversations",))
+
+
+def test_parquet_columns_are_typed(tmp_path):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    writer = ExportWriter(str(tmp_path), "parquet", 1, ("conversations",))
+    writer.write("conversations", [conversation_row(_info()), conversation_row({"ucid": "u2"})])
+    files = writer.close()
+
+    table = pyarrow_parquet.read_table(files["conversations"]["path"])
+    assert files["conversations"]["batches"] == 2
+    assert str(table.schema.field("durationSeconds").type) == "int64"
+    assert str(table.schema.field("createdAt").type) == "timestamp[ms, tz=UTC]"
+    assert table.column("customerAuthenticated").to_pylist() == [True, None]
+
+
+@pytest.mark.asyncio
+async def test_export_writes_every_table(upstream, tmp_path, monkeypatch):
+    cache = ResponseCache()
+    monkeypatch.setattr(css_transcripts_tool, "response_cache", cache)
+    monkeypatch.setenv("CSS_EXPORT_DIR", str(tmp_path))
+
+    result = await ConversationExportTool().execute({
+        "contactCenterId": upstream.config.contact_center_id,
+        "startDate": "2025-10-15 00:00",
+        "endDate": "2025-10-15 23:59",
+        "windowMinutes": 720,
+        "includeTranscripts": True,
+        "name": "../day",
+    })
+
+    assert result["status"] == "success"
+    data = result["data"]
+    # The name cannot leave the export directory
+    assert data["directory"] == str(tmp_path / "day")
+    assert data["windows"] == 2
+    conversations = _read_ndjson(data["files"]["conversations"]["path"])
+    assert sorted(row["ucid"] for row in conversations) == sorted(upstream.data.ucids)
+    legs = _read_ndjson(data["files"]["legs"]["path"])
+    assert len(legs) == sum(row["legCount"] for row in conversations)
+    messages = _read_ndjson(data["files"]["messages"]["path"])
+    first = [m for m in messages if m["ucid"] == upstream.data.ucids[0]]
+    assert [m["messageId"] for m in first] == [m["messageId"] for m in upstream.data.transcript(0)]
+    assert [m["sequence"] for m in first] == list(range(len(first)))
+    assert set(data["schema"]) == {"conversations", "legs", "messages"}
+    # Bulk transcripts are not cached
+    assert cache.get_stats()["entries"] == 0
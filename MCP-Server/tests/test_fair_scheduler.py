@@ -0,0 +1,111 @@
+"""
+Tests for weighted fair queueing of upstream slots
+"""
+import asyncio
+
+import pytest
+
+from src.utils.fair_scheduler import (
+    BULK,
+    DEFAULT_TENANT,
+    INTERACTIVE,
+    FairScheduler,
+    batch_priority,
+    current_priority,
+    current_tenant,
+    scheduling,
+)
+
+
+async def _admission_order(scheduler, requests):
+    """Queue requests behind one held slot, release it and return the order they were admitted in"""
+    held = await scheduler.acquire(1)
+    order = []
+
+    async def request(name, tenant, priority):
+        with scheduling(tenant, priority):
+            ticket = await scheduler.acquire(1)
+        order.append(name)
+        scheduler.release(ticket)
+
+    tasks = [asyncio.create_task(request(*r)) for r in requests]
+    await asyncio.sleep(0)
+    assert scheduler.queued == len(requests)
+    scheduler.release(held)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_scheduling_context():
+    with scheduling("cc1", BULK):
+        assert (current_tenant.get(), current_priority.get()) == ("cc1", BULK)
+        # Work inside a bulk block stays bulk
+        with scheduling("cc2", INTERACTIVE):
+            assert (current_tenant.get(), current_priority.get()) == ("cc2", BULK)
+    assert (current_tenant.get(), current_priority.get()) == (DEFAULT_TENANT, INTERACTIVE)
+
+
+def test_batch_priority():
+    assert batch_priority(None) == BULK
+    assert batch_priority(["u1", "u2"]) == INTERACTIVE
+    assert batch_priority([f"u{i}" for i in range(50)]) == BULK
+
+
+@pytest.mark.asyncio
+async def test_interactive_overtakes_queued_bulk():
+    order = await _admission_order(FairScheduler(), [
+        ("bulk-1", "cc", BULK), ("bulk-2", "cc", BULK), ("bulk-3", "cc", BULK),
+        ("interactive-1", "cc", INTERACTIVE), ("interactive-2", "cc", INTERACTIVE),
+    ])
+    assert order == ["bulk-1", "interactive-1", "interactive-2", "bulk-2", "bulk-3"]
+
+
+@pytest.mark.asyncio
+async def test_tenants_share_slots_fairly():
+    order = await _admission_order(FairScheduler(), [
+        ("a-1", "a", BULK), ("a-2", "a", BULK), ("a-3", "a", BULK), ("b-1", "b", BULK),
+    ])
+    # Tenant b arrived last but is served before a's backlog
+    assert order == ["a-1", "b-1", "a-2", "a-3"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_share_leaves_slots_for_interactive():
+    scheduler = FairScheduler()
+    scheduler.bulk_max_share = 0.5
+    with scheduling("cc", BULK):
+        bulk = [scheduler.try_acquire(4), scheduler.try_acquire(4)]
+        assert all(bulk)
+        assert scheduler.try_acquire(4) is None
+    assert scheduler.try_acquire(4) is not None
+    assert scheduler.get_stats()["bulk_in_flight"] == 2
+
+
+@pytest.mark.asyncio
+async def test_tenant_budget():
+    scheduler = FairScheduler()
+    scheduler.tenant_budgets = {"a": 1}
+    with scheduling("a"):
+        ticket = scheduler.try_acquire(10)
+        assert ticket is not None
+        assert scheduler.try_acquire(10) is None
+    with scheduling("b"):
+        assert scheduler.try_acquire(10) is not None
+    scheduler.release(ticket)
+    with scheduling("a"):
+        assert scheduler.try_acquire(10) is not None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_skipped():
+    scheduler = FairScheduler()
+    held = await scheduler.acquire(1)
+    waiting = asyncio.create_task(scheduler.acquire(1))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    scheduler.release(held)
+    assert scheduler.in_flight == 0
+    assert scheduler.queued == 0
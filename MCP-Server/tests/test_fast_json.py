@@ -0,0 +1,57 @@
+"""
+Tests for the JSON helpers and decoding of upstream responses
+"""
+import pytest
+
+from src.tools import css_search_tool
+from src.tools.css_search_tool import CSSSearchTool
+from src.utils.fast_json import dumps, loads
+from src.utils.oauth_client import APIResponse
+from src.utils.projection import field_tree
+
+orjson = pytest.importorskip("orjson")
+
+TRANSCRIPTS = {
+    "status": "success",
+    "message": "ok",
+    "data": {
+        "ucid": "u1",
+        "transcripts": [
+            {"messageId": f"m{i}", "content": f"message {i} é☃", "absoluteTime": "2025-10-15T12:14:27.937Z"}
+            for i in range(50)
+        ],
+        "lastEvaluatedKey": "m49",
+    },
+}
+
+
+def test_codec_matches_orjson():
+    body = orjson.dumps(TRANSCRIPTS)
+    assert loads(body) == orjson.loads(body)
+    assert loads(dumps(TRANSCRIPTS)) == TRANSCRIPTS
+
+
+@pytest.mark.asyncio
+async def test_response_is_decoded_once():
+    response = APIResponse(200, {}, orjson.dumps(TRANSCRIPTS))
+    document = await response.json()
+    assert document == TRANSCRIPTS
+    assert await response.json() is document
+
+
+@pytest.mark.asyncio
+async def test_search_page_projection_leaves_the_shared_document_unchanged(monkeypatch):
+    body = {"status": "success", "data": [{"conversationInfo": {"ucid": "u1", "channel": "chat"}}], "pagination": {}}
+    response = APIResponse(200, {}, orjson.dumps(body))
+
+    async def make_authenticated_request(*args, **kwargs):
+        return response
+
+    monkeypatch.setattr(css_search_tool, "make_authenticated_request", make_authenticated_request)
+
+    data, error = await CSSSearchTool()._fetch_page("url", {}, field_tree(["conversationInfo.ucid"]))
+
+    assert error is None
+    assert data == {"status": "success", "data": [{"conversationInfo": {"ucid": "u1"}}], "pagination": {}}
+    # Coalesced callers share the decoded document, so projection must copy
+    assert await response.json() == body
@@ -0,0 +1,167 @@
+"""
+Tests for the OAuth client: the shared HTTP session, token acquisition and request coalescing
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from src.utils.oauth_client import GoDaddyOAuthClient
+
+
+@pytest_asyncio.fixture
+async def peers(unused_port):
+    """Token and echo endpoints that record the client port of every request"""
+    seen = []
+
+    async def token(request):
+        seen.append(request.transport.get_extra_info("peername")[1])
+        return web.json_response({"access_token": "t", "expires_in": 3600})
+
+    async def echo(request):
+        seen.append(request.transport.get_extra_info("peername")[1])
+        return web.json_response({"status": "success"})
+
+    app = web.Application()
+    app.router.add_post("/token", token)
+    app.router.add_get("/echo", echo)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", unused_port).start()
+    yield SimpleNamespace(base_url=f"http://127.0.0.1:{unused_port}", ports=seen)
+    await runner.cleanup()
+
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    monkeypatch.setenv("OAUTH_BACKGROUND_REFRESH", "false")
+    client = GoDaddyOAuthClient()
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_token_and_requests_share_one_keep_alive_connection(peers, client):
+    client.oauth_url = f"{peers.base_url}/token"
+
+    for i in range(5):
+        response = await client.make_authenticated_request("GET", f"{peers.base_url}/echo", params={"n": i})
+        assert response.status == 200
+        assert await response.json() == {"status": "success"}
+
+    # One token fetch and five requests, all over the same pooled connection
+    assert len(peers.ports) == 6
+    assert len(set(peers.ports)) == 1
+
+
+@pytest.mark.asyncio
+async def test_session_is_reopened_after_close(client):
+    session = client._get_session()
+    assert client._get_session() is session
+
+    await client.close()
+    assert session.closed
+    reopened = client._get_session()
+    assert reopened is not session and not reopened.closed
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_token_fetch(stub, client):
+    client.oauth_url = f"{stub.base_url}/v2/oauth2/token"
+
+    tokens = await asyncio.gather(*(client.get_access_token() for _ in range(20)))
+
+    assert set(tokens) == {"stub-token-1"}
+    assert stub.counts["token"] == 1
+    stats = client.get_token_stats()
+    assert stats["token_fetches"] == 1
+    assert stats["waits"] == 20
+
+    # Later callers use the cached token until a refresh is forced
+    assert await client.get_access_token() == "stub-token-1"
+    assert client.get_token_stats()["cache_hits"] == 1
+    assert await client.get_access_token(force_refresh=True) == "stub-token-2"
+
+
+@pytest.mark.asyncio
+async def test_failed_token_fetch_is_not_cached(stub, client):
+    client.oauth_url = f"{stub.base_url}/missing"
+    assert await client.get_access_token() is None
+    assert client.get_token_stats()["token_fetch_failures"] == 1
+
+    client.oauth_url = f"{stub.base_url}/v2/oauth2/token"
+    assert await client.get_access_token() == "stub-token-1"
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_renews_ahead_of_expiry(stub, client):
+    client.oauth_url = f"{stub.base_url}/v2/oauth2/token"
+    client.background_refresh = True
+    await client.get_access_token()
+    # The whole token lifetime is inside the refresh window, so renewal starts right away
+    client.refresh_ahead = 3600
+
+    await client.start()
+    for _ in range(100):
+        if stub.counts["token"] == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    assert stub.counts["token"] == 2
+    assert client.get_token_stats()["background_refreshes"] == 1
+    assert client.get_token_stats()["background_refresh_running"]
+    # Callers get the renewed token from the cache without fetching one themselves
+    hits = client.get_token_stats()["cache_hits"]
+    assert await client.get_access_token() == "stub-token-2"
+    assert client.get_token_stats()["cache_hits"] == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_gets_share_one_request(stub, client):
+    client.oauth_url = f"{stub.base_url}/v2/oauth2/token"
+    url = f"{stub.base_url}/conversation-state/{stub.data.ucids[0]}"
+
+    responses = await asyncio.gather(*(client.make_authenticated_request("GET", url) for _ in range(10)))
+
+    assert stub.counts["detail"] == 1
+    assert len({id(response) for response in responses}) == 1
+    # The body is decoded once for every caller
+    assert await responses[0].json() is await responses[9].json()
+    assert client.get_request_stats()["coalesced_requests"] == 9
+    assert client.get_request_stats()["in_flight_coalescable"] == 0
+
+    # Different parameters are different requests
+    await asyncio.gather(
+        client.make_authenticated_request("GET", url, params={"includeConversations": "true"}),
+        client.make_authenticated_request("GET", url, params={"includeConversations": "false"}),
+    )
+    assert stub.counts["detail"] == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_request(stub, client):
+    client.oauth_url = f"{stub.base_url}/v2/oauth2/token"
+    url = f"{stub.base_url}/conversation-state/{stub.data.ucids[0]}"
+
+    first = asyncio.create_task(client.make_authenticated_request("GET", url))
+    second = asyncio.create_task(client.make_authenticated_request("GET", url))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    response = await second
+    assert response.status == 200
+    assert stub.counts["detail"] == 1
+
+
+@pytest.mark.asyncio
+async def test_coalescing_can_be_disabled(stub, client):
+    client.oauth_url = f"{stub.base_url}/v2/oauth2/token"
+    client.coalesce_requests = False
+    url = f"{stub.base_url}/conversation-state/{stub.data.ucids[0]}"
+
+    await asyncio.gather(*(client.make_authenticated_request("GET", url) for _ in range(3)))
+
+    assert stub.counts["detail"] == 3
+    assert client.get_request_stats()["coalesced_requests"] == 0
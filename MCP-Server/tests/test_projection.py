@@ -0,0 +1,68 @@
+"""
+Tests for field projection, compact mode and short keys
+"""
+from src.utils.projection import compact, field_tree, project, shape_response
+
+
+def test_field_tree_nests_dotted_paths():
+    tree = field_tree(["conversationInfo.ucid", "conversationInfo.conversations.agentId"])
+    assert tree == {"conversationInfo": {"ucid": None, "conversations": {"agentId": None}}}
+
+
+def test_field_tree_keeps_whole_parent():
+    assert field_tree(["conversationInfo", "conversationInfo.ucid"]) == {"conversationInfo": None}
+    assert field_tree(None) is None
+
+
+def test_project_selects_fields_element_wise():
+    data = [
+        {"conversationInfo": {"ucid": "u1", "state": "ACTIVE", "conversations": [{"agentId": "a1", "state": "X"}]}},
+        {"conversationInfo": {"ucid": "u2"}},
+    ]
+    tree = field_tree(["conversationInfo.ucid", "conversationInfo.conversations.agentId"])
+    assert project(data, tree) == [
+        {"conversationInfo": {"ucid": "u1", "conversations": [{"agentId": "a1"}]}},
+        {"conversationInfo": {"ucid": "u2"}},
+    ]
+
+
+def test_project_without_tree_returns_value():
+    value = {"a": 1}
+    assert project(value, None) is value
+
+
+def test_compact_drops_empty_values():
+    value = {"a": None, "b": "", "c": [], "d": {}, "e": {"f": None}, "g": [{"h": ""}, 1], "i": 0, "j": False}
+    assert compact(value) == {"g": [{}, 1], "i": 0, "j": False}
+
+
+def test_shape_response_is_a_no_op_without_options():
+    result = {"status": "success", "data": {"ucid": "u1"}}
+    assert shape_response(result, {}) is result
+
+
+def test_shape_response_passes_errors_through():
+    result = {"status": "error", "message": "x", "error": "x"}
+    assert shape_response(result, {"compact": True, "shortKeys": True}) is result
+
+
+def test_shape_response_compacts_transcripts():
+    messages = [
+        {"messageId": "m1", "participantRole": "SYSTEM", "content": "Conversation rehydrated"},
+        {"messageId": "m2", "participantRole": "AGENT", "content": "Agent joined the conversation"},
+        {"messageId": "m3", "participantRole": "CUSTOMER", "content": "My site is down", "attachments": []},
+    ]
+    result = {"status": "success", "data": {"ucid": "u1", "transcripts": messages}}
+    shaped = shape_response(result, {"compact": True, "fields": ["messageId", "content", "attachments"]}, transcripts=True)
+
+    assert shaped["data"] == {"ucid": "u1", "transcripts": [{"messageId": "m3", "content": "My site is down"}]}
+    # The original result is not modified
+    assert len(result["data"]["transcripts"]) == 3
+
+
+def test_shape_response_short_keys():
+    result = {"status": "success", "data": [{"conversationInfo": {"ucid": "u1", "custom": 1}}]}
+    shaped = shape_response(result, {"shortKeys": True})
+
+    assert shaped["data"] == [{"ci": {"u": "u1", "custom": 1}}]
+    assert shaped["keys"] == {"ci": "conversationInfo", "u": "ucid"}
@@ -0,0 +1,128 @@
+"""
+Tests for the upstream request policy: AIMD limit, retries and hedging
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.utils.request_policy import RequestPolicy
+from src.utils.stats import percentile
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+
+def _policy(**settings):
+    policy = RequestPolicy()
+    policy.limit = 10.0
+    policy.hedge_enabled = False
+    policy.retry_base_delay = 0.0
+    for name, value in settings.items():
+        setattr(policy, name, value)
+    return policy
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) is None
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0], 100) == 4.0
+
+
+def test_limit_grows_additively_on_healthy_responses():
+    policy = _policy()
+    policy._record(FakeResponse(200), time.monotonic())
+    assert policy.limit == pytest.approx(10.1)
+
+
+def test_limit_backs_off_once_per_round_trip():
+    policy = _policy(backoff_ratio=0.5)
+    started = time.monotonic()
+    policy._record(FakeResponse(503), started)
+    assert policy.limit == 5.0
+    # A second failure of a request sent before the cut does not cut again
+    policy._record(None, started)
+    assert policy.limit == 5.0
+    policy._record(FakeResponse(429), time.monotonic())
+    assert policy.limit == 2.5
+    policy._record(FakeResponse(429), time.monotonic())
+    assert policy.limit == policy.min_limit
+
+
+def test_slow_responses_count_as_overload():
+    policy = _policy(latency_target=1.0)
+    policy._record(FakeResponse(200), time.monotonic() - 2.0)
+    assert policy.limit == pytest.approx(10 * policy.backoff_ratio)
+
+
+def test_retryable_results():
+    assert RequestPolicy.is_retryable(None)
+    assert RequestPolicy.is_retryable(FakeResponse(429))
+    assert RequestPolicy.is_retryable(FakeResponse(503))
+    assert not RequestPolicy.is_retryable(FakeResponse(200))
+    assert not RequestPolicy.is_retryable(FakeResponse(404))
+
+
+def test_backoff_honours_retry_after():
+    policy = _policy(retry_max_delay=5.0, retry_base_delay=0.2)
+    assert policy._backoff(0, FakeResponse(429, {"Retry-After": "2"})) == 2.0
+    assert policy._backoff(0, FakeResponse(429, {"Retry-After": "60"})) == 5.0
+    for retry in range(4):
+        assert 0.0 <= policy._backoff(retry, FakeResponse(503)) <= min(5.0, 0.2 * 2 ** retry)
+
+
+def test_hedge_delay_needs_samples():
+    policy = _policy(hedge_min_samples=5, hedge_min_delay=0.05, hedge_percentile=50)
+    policy._latencies.extend([0.1, 0.2, 0.3, 0.4])
+    assert policy.hedge_delay() is None
+    policy._latencies.append(0.5)
+    assert policy.hedge_delay() == pytest.approx(0.3)
+
+
+@pytest.mark.asyncio
+async def test_idempotent_requests_are_retried():
+    policy = _policy(max_retries=2)
+    responses = [FakeResponse(503), None, FakeResponse(200)]
+
+    async def attempt():
+        return responses.pop(0)
+
+    result = await policy.run("GET", attempt)
+    assert result.status == 200
+    assert policy.get_stats()["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_post_is_not_retried():
+    policy = _policy(max_retries=2)
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        return FakeResponse(503)
+
+    result = await policy.run("POST", attempt)
+    assert result.status == 503
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_get_is_hedged():
+    policy = _policy(hedge_enabled=True, hedge_min_samples=1, hedge_min_delay=0.01)
+    policy._latencies.append(0.01)
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+            return FakeResponse(200, {"attempt": "primary"})
+        return FakeResponse(200, {"attempt": "hedge"})
+
+    result = await policy.run("GET", attempt)
+    assert result.headers["attempt"] == "hedge"
+    assert policy.get_stats()["hedges"] == 1
+    assert policy.get_stats()["hedge_wins"] == 1
@@ -0,0 +1,114 @@
+"""
+Tests for the per-UCID response cache: TTLs, LRU eviction and updatedAt invalidation
+"""
+import pytest
+
+from src.tools import css_contact_detail_tool, css_transcripts_tool
+from src.tools.css_contact_detail_tool import CSSContactDetailTool
+from src.tools.css_transcripts_tool import CSSTranscriptsTool
+from src.utils.response_cache import ResponseCache, conversation_status
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache()
+
+
+def _detail(state="COMPLETED", ended=True, updated_at="v1"):
+    info = {"ucid": "u1", "updatedAt": updated_at, "conversations": [{"state": state}]}
+    if ended:
+        info["conversationEndTimestamp"] = "2025-10-15T11:00:00Z"
+    return [{"conversationInfo": info}]
+
+
+def test_conversation_status():
+    assert conversation_status(_detail()) == (True, "v1")
+    assert conversation_status(_detail(state="CONNECTED")) == (False, "v1")
+    assert conversation_status(_detail(ended=False)) == (False, "v1")
+    assert conversation_status([]) == (False, None)
+
+
+def test_active_conversations_expire_first(cache):
+    cache.active_ttl = -1
+    cache.put("detail", "done", {"a": 1}, completed=True)
+    cache.put("detail", "live", {"a": 2}, completed=False)
+
+    assert cache.get("detail", "done") == {"a": 1}
+    assert cache.get("detail", "live") is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.max_entries = 2
+    cache.put("detail", "u1", 1, completed=True)
+    cache.put("detail", "u2", 2, completed=True)
+    assert cache.get("detail", "u1") == 1
+    cache.put("detail", "u3", 3, completed=True)
+
+    assert cache.get("detail", "u2") is None
+    assert cache.get("detail", "u1") == 1
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_variants_are_cached_separately(cache):
+    cache.put("transcripts", "u1", "all", completed=True)
+    cache.put("transcripts", "u1", "first ten", completed=True, variant="10||")
+    assert cache.get("transcripts", "u1") == "all"
+    assert cache.get("transcripts", "u1", "10||") == "first ten"
+
+
+def test_moved_updated_at_invalidates(cache):
+    cache.put("detail", "u1", "detail", completed=True, updated_at="v1")
+    cache.put("transcripts", "u1", "transcript", completed=True, updated_at="v1")
+
+    # The same updatedAt, or none at all, keeps the entries
+    cache.observe("u1", "v1")
+    cache.observe("u1", None)
+    assert cache.get("detail", "u1") == "detail"
+
+    cache.observe_conversations([{"conversationInfo": {"ucid": "u1", "updatedAt": "v2"}}])
+    assert cache.get("detail", "u1") is None
+    assert cache.get("transcripts", "u1") is None
+    assert cache.get_stats()["invalidations"] == 2
+
+
+def test_invalidate_one_ucid_or_everything(cache):
+    for ucid in ("u1", "u2"):
+        cache.put("detail", ucid, ucid, completed=True)
+        cache.put("transcripts", ucid, ucid, completed=True)
+
+    assert cache.invalidate("u1") == 2
+    assert cache.get("detail", "u1") is None
+    assert cache.get("detail", "u2") == "u2"
+    assert cache.invalidate() == 2
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_disabled_cache_stores_nothing(cache):
+    cache.enabled = False
+    cache.put("detail", "u1", 1, completed=True)
+    assert cache.get("detail", "u1") is None
+
+
+@pytest.mark.asyncio
+async def test_repeated_lookups_are_served_from_the_cache(upstream, cache, monkeypatch):
+    monkeypatch.setattr(css_contact_detail_tool, "response_cache", cache)
+    monkeypatch.setattr(css_transcripts_tool, "response_cache", cache)
+    ucid = upstream.data.ucids[0]
+
+    first = await CSSContactDetailTool().execute({"ucid": ucid})
+    second = await CSSContactDetailTool().execute({"ucid": ucid})
+    assert first == second
+    assert upstream.counts["detail"] == 1
+    assert cache.is_completed(ucid)
+
+    await CSSTranscriptsTool().execute({"ucid": ucid})
+    transcript_pages = upstream.counts["transcripts"]
+    await CSSTranscriptsTool().execute({"ucid": ucid})
+    assert upstream.counts["transcripts"] == transcript_pages
+
+    # A newer updatedAt from a search drops both
+    cache.observe(ucid, "2099-01-01T00:00:00.000Z")
+    await CSSContactDetailTool().execute({"ucid": ucid})
+    assert upstream.counts["detail"] == 2
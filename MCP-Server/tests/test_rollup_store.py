@@ -0,0 +1,171 @@
+"""
+Tests for the incrementally maintained hourly rollups and their background ingestion
+"""
+import time
+
+import pytest
+
+from src.tools import hourly_rollup_tool
+from src.tools.hourly_rollup_tool import HourlyRollupTool, RollupMaterializer
+from src.utils.conversation_store import format_search_date, to_epoch
+from src.utils.rollup_store import RollupStore, duration_bucket
+
+HOUR = to_epoch("2025-10-15 10:00")
+
+
+def _item(ucid, updated_at, legs, created_at="2025-10-15T10:15:00Z", channel="chat"):
+    return {
+        "conversationInfo": {
+            "ucid": ucid,
+            "createdAt": created_at,
+            "updatedAt": updated_at,
+            "latestQueue": "billing",
+            "supportLevel": "L1",
+            "channel": channel,
+            "durationSeconds": sum(duration for _, duration in legs),
+            "conversationEndTimestamp": "2025-10-15T11:00:00Z",
+            "conversations": [
+                {"agentId": agent, "state": "COMPLETED", "durationSeconds": duration} for agent, duration in legs
+            ],
+        }
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RollupStore()
+    store.path = str(tmp_path / "rollups.db")
+    yield store
+    store.close()
+
+
+async def _query(store, group_by=("agent",)):
+    return await store.query("cc", HOUR, HOUR + 3600, group_by, {})
+
+
+def test_duration_bucket():
+    assert duration_bucket(0) == 0
+    assert duration_bucket(30) == 0
+    assert duration_bucket(31) == 1
+    assert duration_bucket(100000) == 8
+
+
+@pytest.mark.asyncio
+async def test_ingest_and_query(store):
+    counts = await store.ingest("cc", [_item("u1", "1", [("a1", 100)]), _item("u2", "1", [("a1", 20), ("a2", 700)])])
+    assert counts == {"ingested": 2, "updated": 0, "unchanged": 0}
+
+    result = await _query(store)
+    by_agent = {group["agent"]: group for group in result["groups"]}
+    assert by_agent["a1"]["totalInteractions"] == 2
+    assert by_agent["a1"]["totalConversations"] == 2
+    assert by_agent["a1"]["durationHistogram"] == {"le30": 1, "le120": 1}
+    assert by_agent["a2"]["totalDurationSeconds"] == 700
+    assert result["team"]["totalConversations"] == 2
+    assert result["team"]["totalDurationSeconds"] == 820
+
+
+@pytest.mark.asyncio
+async def test_reingest_replaces_the_old_contribution(store):
+    await store.ingest("cc", [_item("u1", "1", [("a1", 100)]), _item("u2", "1", [("a1", 20)])])
+    before = await _query(store, ())
+
+    # Same updatedAt: skipped
+    counts = await store.ingest("cc", [_item("u1", "1", [("a1", 100)])])
+    assert counts == {"ingested": 0, "updated": 0, "unchanged": 1}
+    assert await _query(store, ()) == before
+
+    # Moved updatedAt: a1's leg is taken out and a2's added, in another channel
+    counts = await store.ingest("cc", [_item("u1", "2", [("a2", 700)], channel="voice")])
+    assert counts == {"ingested": 0, "updated": 1, "unchanged": 0}
+
+    result = await _query(store, ("agent", "channel"))
+    assert [(g["agent"], g["channel"], g["totalInteractions"]) for g in result["groups"]] == [
+        ("a1", "chat", 1), ("a2", "voice", 1),
+    ]
+    assert result["team"]["totalConversations"] == 2
+    assert result["team"]["totalDurationSeconds"] == 720
+    assert result["team"]["durationHistogram"] == {"le30": 1, "le900": 1}
+
+    # Moving the conversation to another hour empties its old buckets
+    await store.ingest("cc", [_item("u1", "3", [("a2", 700)], created_at="2025-10-15T12:00:00Z")])
+    result = await _query(store)
+    assert [(g["agent"], g["totalInteractions"]) for g in result["groups"]] == [("a1", 1)]
+    assert result["team"]["totalConversations"] == 1
+
+
+class FakeSearch:
+    """Stands in for CSSSearchTool: serves conversations by createdAt and truncates at maxResults"""
+
+    def __init__(self, created_at, fail_after=None):
+        self.created_at = created_at
+        self.fail_after = fail_after
+        self.calls = []
+
+    def __call__(self):
+        return self
+
+    async def execute(self, arguments):
+        self.calls.append((arguments["startDate"], arguments["endDate"]))
+        if self.fail_after is not None and len(self.calls) > self.fail_after:
+            return {"status": "error", "message": "upstream down", "error": "upstream down"}
+        start, end = to_epoch(arguments["startDate"]), to_epoch(arguments["endDate"]) + 60
+        matches = [
+            _item(f"u{i}", "1", [("a1", 10)], created_at=format_search_date(ts).replace(" ", "T") + ":00Z")
+            for i, ts in enumerate(self.created_at) if start <= ts < end
+        ]
+        cap = arguments["maxResults"]
+        return {"status": "success", "data": matches[:cap], "pagination": {"truncated": len(matches) > cap}}
+
+
+@pytest.fixture
+def materializer(store, monkeypatch):
+    monkeypatch.setattr(hourly_rollup_tool, "rollup_store", store)
+    materializer = RollupMaterializer()
+    materializer.backfill_seconds = 4 * 3600
+    materializer.window_seconds = 3600
+    monkeypatch.setattr(hourly_rollup_tool, "rollup_materializer", materializer)
+    return materializer
+
+
+@pytest.mark.asyncio
+async def test_truncated_windows_are_split(store, materializer, monkeypatch):
+    now = time.time()
+    # A burst of 30 conversations two hours ago, spread over 30 minutes
+    burst = now - 2 * 3600
+    search = FakeSearch([burst - burst % 60 + 60 * i for i in range(30)])
+    monkeypatch.setattr(hourly_rollup_tool, "CSSSearchTool", search)
+    materializer.max_conversations = 10
+
+    result = (await materializer.run_once(["cc"]))["cc"]
+
+    assert result["ingested"] == 30
+    assert result["truncatedWindows"] == 0
+    state = await store.get_state("cc")
+    assert state["ingestedUntil"] >= now - now % 60
+    assert state["ingestedUntil"] - state["ingestedFrom"] == materializer.backfill_seconds
+
+
+@pytest.mark.asyncio
+async def test_failed_run_keeps_its_progress(store, materializer, monkeypatch):
+    monkeypatch.setattr(hourly_rollup_tool, "CSSSearchTool", FakeSearch([], fail_after=2))
+
+    result = (await materializer.run_once(["cc"]))["cc"]
+
+    assert result == {"error": "upstream down"}
+    state = await store.get_state("cc")
+    assert state["ingestedUntil"] - state["ingestedFrom"] == 2 * 3600
+
+
+@pytest.mark.asyncio
+async def test_query_does_not_repeat_a_failing_backfill(materializer, monkeypatch):
+    search = FakeSearch([], fail_after=0)
+    monkeypatch.setattr(hourly_rollup_tool, "CSSSearchTool", search)
+    arguments = {"contactCenterId": "cc", "startDate": "2025-10-15 00:00", "endDate": "2025-10-15 23:59"}
+
+    first = await HourlyRollupTool().execute(arguments)
+    second = await HourlyRollupTool().execute(arguments)
+
+    assert first["status"] == second["status"] == "error"
+    assert "recently" in second["error"]
+    assert len(search.calls) == 1
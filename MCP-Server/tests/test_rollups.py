@@ -0,0 +1,73 @@
+"""
+Tests for per-agent rollups
+"""
+import pytest
+
+from src.utils import rollups
+from src.utils.rollups import flatten_legs, summarize_by_agent
+
+
+def _item(ucid, channel, legs):
+    return {
+        "conversationInfo": {
+            "ucid": ucid,
+            "contactCenterId": "cc",
+            "channel": channel,
+            "supportLevel": "L1",
+            "conversations": [
+                {"agentId": agent, "agentDisplayName": agent.upper(), "queueName": queue, "state": state,
+                 "durationSeconds": duration, "disconnectReason": reason}
+                for agent, queue, state, duration, reason in legs
+            ],
+        }
+    }
+
+
+ITEMS = [
+    _item("u1", "chat", [("a1", "q1", "COMPLETED", 100, "AGENT"), ("CUSTOM_BOT", "bot", "COMPLETED", 5, "")]),
+    _item("u2", "voice", [("a1", "q2", "ACTIVE", "50", ""), ("a2", "q1", "COMPLETED", 30, "CUSTOMER")]),
+    _item("u3", "", [("a2", "", "COMPLETED", None, "CUSTOMER"), ("a2", "q1", "COMPLETED", 20, "CUSTOMER")]),
+]
+
+
+def test_flatten_legs_skips_bots_unless_asked():
+    assert [leg.agent_id for leg in flatten_legs(ITEMS)] == ["a1", "a1", "a2", "a2", "a2"]
+    assert len(flatten_legs(ITEMS, include_bots=True)) == 6
+
+
+def test_summarize_by_agent():
+    summary = summarize_by_agent(flatten_legs(ITEMS))
+
+    a2, a1 = summary["agentsSummary"]
+    assert a2["agentId"] == "a2"
+    assert a2["performanceStats"] == {
+        "totalInteractions": 3,
+        "totalConversations": 2,
+        "totalDurationSeconds": 50.0,
+        "averageDurationSeconds": 16.667,
+        "sessionCompletionRate": 1.0,
+    }
+    assert a2["queues"] == {"q1": 2, "unknown": 1}
+    assert a2["channels"] == {"voice": 1, "unknown": 2}
+    assert a2["disconnectReasons"] == {"CUSTOMER": 3}
+    assert a1["agentName"] == "A1"
+    assert a1["performanceStats"]["sessionCompletionRate"] == 0.5
+    # Empty disconnect reasons are not counted
+    assert a1["disconnectReasons"] == {"AGENT": 1}
+    assert summary["team"] == {
+        "agents": 2, "totalInteractions": 5, "totalConversations": 3, "totalDurationSeconds": 200.0,
+    }
+
+
+def test_summarize_filters_agents():
+    summary = summarize_by_agent(flatten_legs(ITEMS), agent_ids=["a1"])
+    assert [a["agentId"] for a in summary["agentsSummary"]] == ["a1"]
+    assert summary["team"]["totalInteractions"] == 2
+
+
+def test_numpy_and_python_aggregation_match(monkeypatch):
+    pytest.importorskip("numpy")
+    legs = flatten_legs(ITEMS * 3)
+    with_numpy = summarize_by_agent(legs)
+    monkeypatch.setattr(rollups, "numpy", None)
+    assert summarize_by_agent(legs) == with_numpy
@@ -0,0 +1,19 @@
+"""
+Tests for the conversation_state_search resume cursor
+"""
+from src.tools.css_search_tool import CSSSearchTool
+
+
+def test_cursor_round_trip():
+    cursor = CSSSearchTool._encode_cursor("token-123", 7)
+    assert CSSSearchTool._decode_cursor(cursor) == ("token-123", 7)
+
+
+def test_cursor_without_upstream_token():
+    cursor = CSSSearchTool._encode_cursor(None, 3)
+    assert CSSSearchTool._decode_cursor(cursor) == (None, 3)
+
+
+def test_plain_upstream_token_is_accepted():
+    assert CSSSearchTool._decode_cursor("eyJub3QiOiJqc29uIg") == ("eyJub3QiOiJqc29uIg", 0)
+    assert CSSSearchTool._decode_cursor("not base64!") == ("not base64!", 0)
@@ -0,0 +1,81 @@
+"""
+Tests for batched lexicon sentiment scoring
+"""
+import pytest
+
+from src.tools import css_transcripts_tool
+from src.tools.transcript_sentiment_tool import TranscriptSentimentTool
+from src.utils import sentiment
+from src.utils.response_cache import ResponseCache
+from src.utils.sentiment import LexiconScorer, SentimentBatch, label_for, summarize, trend_slope
+
+TEXTS = ["Great, thanks!", "This is broken", "", "hello there", "Very good", "BAD bad bad"]
+EXPECTED = [1.0, -1 / 3, 0.0, 0.0, 0.5, -1.0]
+
+
+def test_lexicon_scores():
+    assert LexiconScorer().score(TEXTS) == pytest.approx(EXPECTED)
+
+
+def test_python_scoring_matches(monkeypatch):
+    monkeypatch.setattr(sentiment, "numpy", None)
+    assert LexiconScorer().score(TEXTS) == pytest.approx(EXPECTED)
+    assert LexiconScorer().score([]) == []
+
+
+def test_intensifiers_do_not_change_scores():
+    # The TypeScript analyzer never applies its intensifier weight, so neither does the server
+    assert LexiconScorer().score(["very good", "good"]) == pytest.approx([0.5, 1.0])
+
+
+def test_labels_and_trend():
+    assert [label_for(s) for s in (0.5, 0.1, -0.1, -0.5)] == ["positive", "neutral", "neutral", "negative"]
+    assert trend_slope([0.0]) is None
+    assert trend_slope([0.0, 0.5, 1.0]) == pytest.approx(0.5)
+
+
+def test_batch_flush():
+    batch = SentimentBatch(LexiconScorer(), include_messages=True)
+    batch.add("u1", [
+        {"messageId": "m0", "participantRole": "SYSTEM", "content": "Conversation rehydrated"},
+        {"messageId": "m1", "participantRole": "CUSTOMER", "content": "My site is broken"},
+        {"messageId": "m2", "participantRole": "AGENT", "participantId": "a1", "content": "Let me check"},
+        {"messageId": "m3", "participantRole": "CUSTOMER", "content": "Great thank you"},
+    ])
+    batch.add("u2", [{"messageId": "m4", "participantRole": "CUSTOMER", "content": "I want a manager"}])
+    assert len(batch) == 2
+    assert batch.pending_messages == 4
+
+    first, second = batch.flush()
+    assert len(batch) == 0
+    assert [m["messageId"] for m in first["messages"]] == ["m1", "m2", "m3"]
+    # Mean over customer messages: (-0.25 + 2/3) / 2
+    assert first["score"] == pytest.approx(0.2083, abs=1e-4)
+    assert first["label"] == "positive"
+    assert first["agentIds"] == ["a1"]
+    assert first["resolution"] and not first["escalation"]
+    assert first["byRole"]["CUSTOMER"]["messages"] == 2
+    assert second["escalation"]
+    assert second["label"] == "neutral"
+
+    overall = summarize([first, second])
+    assert overall["conversations"] == 2
+    assert overall["escalationRate"] == 0.5
+    assert overall["byAgent"]["a1"]["conversations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_sentiment_bypasses_the_cache_and_keeps_input_order(upstream, monkeypatch):
+    cache = ResponseCache()
+    monkeypatch.setattr(css_transcripts_tool, "response_cache", cache)
+    # Small batches so conversations are scored in several flushes that finish out of order
+    monkeypatch.setenv("CSS_SENTIMENT_BATCH_MESSAGES", "50")
+    ucids = list(reversed(upstream.data.ucids[:12])) + ["missing"]
+
+    result = await TranscriptSentimentTool().execute({"ucids": ucids, "maxConcurrency": 3})
+
+    assert result["status"] == "partial"
+    assert list(result["data"]["errors"]) == ["missing"]
+    assert [c["ucid"] for c in result["data"]["conversations"]] == ucids[:-1]
+    assert result["data"]["scoring"]["batches"] > 1
+    assert cache.get_stats()["entries"] == 0
@@ -0,0 +1,102 @@
+"""
+Tests for time-sharded conversation search
+"""
+import pytest
+
+from src.tools.css_search_tool import CSSSearchTool
+from src.utils.conversation_store import format_search_date, to_epoch
+
+DAY = to_epoch("2025-10-15 00:00")
+
+
+class FakePages:
+    """Stands in for _fetch_page: serves conversations by createdAt minute, ``limit`` per page"""
+
+    def __init__(self, created_at, fail_minute=None):
+        self.created_at = created_at
+        self.fail_minute = fail_minute
+        self.calls = []
+
+    async def __call__(self, url, params, item_tree=None):
+        start, end = to_epoch(params["startDate"]), to_epoch(params["endDate"]) + 60
+        self.calls.append((params["startDate"], params["endDate"], params.get("nextToken")))
+        if self.fail_minute is not None and start <= self.fail_minute < end:
+            return None, {"status": "error", "message": "boom", "error": "API request failed with status 503: boom"}
+        matches = [
+            {"conversationInfo": {"ucid": f"u{i}", "createdAt": format_search_date(ts)}}
+            for i, ts in enumerate(self.created_at) if start <= ts < end
+        ]
+        offset = int(params.get("nextToken") or 0)
+        limit = int(params["limit"])
+        next_token = str(offset + limit) if offset + limit < len(matches) else None
+        return {"status": "success", "data": matches[offset:offset + limit], "pagination": {"nextToken": next_token}}, None
+
+
+def _arguments(**overrides):
+    return {
+        "contactCenterId": "cc",
+        "startDate": "2025-10-15 00:00",
+        "endDate": "2025-10-15 23:59",
+        "sharded": True,
+        "shardMinutes": 720,
+        "limit": 5,
+        **overrides,
+    }
+
+
+@pytest.mark.asyncio
+async def test_busy_shards_are_split(upstream):
+    result = await CSSSearchTool().execute({**_arguments(), "contactCenterId": upstream.config.contact_center_id})
+
+    assert result["status"] == "success"
+    assert sorted(item["conversationInfo"]["ucid"] for item in result["data"]) == sorted(upstream.data.ucids)
+    pagination = result["pagination"]
+    assert pagination["splits"] > 0
+    assert pagination["shards"] > 2
+    assert not pagination["truncated"] and not pagination["incomplete"]
+
+
+@pytest.mark.asyncio
+async def test_a_busy_minute_is_paginated(monkeypatch):
+    # Twelve conversations in one minute, three elsewhere in the day
+    pages = FakePages([DAY + 3600 + i for i in range(12)] + [DAY + 7200, DAY + 36000, DAY + 72000])
+    tool = CSSSearchTool()
+    monkeypatch.setattr(tool, "_fetch_page", pages)
+
+    result = await tool.execute(_arguments())
+
+    assert len(result["data"]) == 15
+    assert len({item["conversationInfo"]["ucid"] for item in result["data"]}) == 15
+    assert result["pagination"]["paginatedShards"] == 1
+    assert ("2025-10-15 01:00", "2025-10-15 01:00", "5") in pages.calls
+
+
+@pytest.mark.asyncio
+async def test_failed_shards_are_reported(monkeypatch):
+    pages = FakePages([DAY + 600, DAY + 50000], fail_minute=DAY + 50000)
+    tool = CSSSearchTool()
+    monkeypatch.setattr(tool, "_fetch_page", pages)
+
+    result = await tool.execute(_arguments())
+
+    assert result["status"] == "success"
+    assert [item["conversationInfo"]["ucid"] for item in result["data"]] == ["u0"]
+    assert result["pagination"]["incomplete"]
+    assert result["pagination"]["failedShards"][0]["startDate"] == "2025-10-15 12:00"
+
+
+@pytest.mark.asyncio
+async def test_results_are_capped(monkeypatch):
+    tool = CSSSearchTool()
+    monkeypatch.setattr(tool, "_fetch_page", FakePages([DAY + 60 * i for i in range(40)]))
+
+    result = await tool.execute(_arguments(maxResults=10))
+
+    assert len(result["data"]) == 10
+    assert result["pagination"]["truncated"]
+
+
+@pytest.mark.asyncio
+async def test_sharded_search_needs_a_window():
+    result = await CSSSearchTool().execute({"contactCenterId": "cc", "sharded": True})
+    assert result["status"] == "error"
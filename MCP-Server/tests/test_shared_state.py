@@ -0,0 +1,148 @@
+"""
+Tests for the state shared by worker processes: leases, the OAuth token and the second-level cache
+"""
+import asyncio
+import os
+import stat
+import time
+
+import pytest
+
+from src.utils import oauth_client as oauth_module
+from src.utils import response_cache as response_cache_module
+from src.utils.oauth_client import GoDaddyOAuthClient
+from src.utils.response_cache import ResponseCache
+from src.utils.shared_state import SharedStateStore
+
+
+def _store(path, holder):
+    store = SharedStateStore()
+    store.path = str(path)
+    store.enabled = True
+    store.holder = holder
+    return store
+
+
+@pytest.fixture
+def stores(tmp_path):
+    """Two handles on one database, as two worker processes would have"""
+    first, second = _store(tmp_path / "shared.db", "1"), _store(tmp_path / "shared.db", "2")
+    yield first, second
+    first.close()
+    second.close()
+
+
+@pytest.mark.asyncio
+async def test_database_files_are_owner_only(stores):
+    first, _ = stores
+    await first.cache_put("detail", "u1", "", (time.time() + 60, None, False, {"a": 1}))
+    for suffix in ("", "-wal", "-shm"):
+        path = first.path + suffix
+        if os.path.exists(path):
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+@pytest.mark.asyncio
+async def test_lease_is_held_by_one_process(stores):
+    first, second = stores
+    assert await first.try_lease("job", 60)
+    assert not await second.try_lease("job", 60)
+    # The holder can renew its own lease
+    assert await first.try_lease("job", 60)
+
+    await first.release_lease("job")
+    assert await second.try_lease("job", 60)
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_taken_over(stores):
+    first, second = stores
+    assert await first.try_lease("job", -1)
+    assert await second.try_lease("job", 60)
+    assert not await first.try_lease("job", 60)
+
+
+@pytest.mark.asyncio
+async def test_token_round_trip(stores):
+    first, second = stores
+    assert await second.get_token("oauth:x") == (None, None)
+    await first.put_token("oauth:x", "t1", 1000.0)
+    await first.put_token("oauth:x", "t2", 2000.0)
+    assert await second.get_token("oauth:x") == ("t2", 2000.0)
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_expiry_and_invalidation(stores):
+    first, second = stores
+    await first.cache_put("detail", "u1", "", (time.time() + 60, "v1", True, {"ucid": "u1"}))
+    await first.cache_put("detail", "u2", "", (time.time() - 1, "v1", True, {"ucid": "u2"}))
+    await first.cache_put("transcripts", "u3", "", (time.time() + 60, "v1", False, {"ucid": "u3"}))
+
+    entry = await second.cache_get("detail", "u1", "")
+    assert entry[1:] == ("v1", True, {"ucid": "u1"})
+    assert await second.cache_get("detail", "u2", "") is None
+
+    # Only entries stored with a different updatedAt are dropped
+    await second.cache_invalidate_stale([("u1", "v1"), ("u3", "v2")])
+    assert await first.cache_get("detail", "u1", "") is not None
+    assert await first.cache_get("transcripts", "u3", "") is None
+
+    await second.cache_invalidate()
+    assert await first.cache_get("detail", "u1", "") is None
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_is_pruned_to_its_cap(stores):
+    first, _ = stores
+    first.max_cache_entries = 10
+    for i in range(100):
+        await first.cache_put("detail", f"u{i}", "", (time.time() + 60 + i, None, False, i))
+    assert first.get_stats()["cache_entries"] <= 10
+    # The entries expiring soonest go first
+    assert await first.cache_get("detail", "u99", "") is not None
+
+
+@pytest.mark.asyncio
+async def test_response_cache_reads_through_to_other_workers(stores, monkeypatch):
+    first, second = stores
+    monkeypatch.setattr(response_cache_module, "shared_state", first)
+    writer = ResponseCache()
+    monkeypatch.setattr(response_cache_module, "shared_state", second)
+    reader = ResponseCache()
+
+    writer.put("detail", "u1", {"ucid": "u1"}, completed=True, updated_at="v1")
+    await asyncio.gather(*writer._background)
+    assert reader.get("detail", "u1") is None
+    assert await reader.lookup("detail", "u1") == {"ucid": "u1"}
+    assert reader.get_stats()["shared_hits"] == 1
+    # Local copies of shared entries only live for the local TTL
+    assert reader._entries[("detail", "u1", "")][0] <= time.monotonic() + reader.local_ttl
+
+    # A newer updatedAt seen by one worker drops the shared entry; the other loses it once its local copy is gone
+    writer.observe("u1", "v2")
+    await asyncio.gather(*writer._background)
+    reader._entries.clear()
+    reader._keys_by_ucid.clear()
+    assert await reader.lookup("detail", "u1") is None
+
+
+@pytest.mark.asyncio
+async def test_workers_share_one_token_fetch(stores, stub, monkeypatch):
+    monkeypatch.setenv("OAUTH_TOKEN_URL", f"{stub.base_url}/v2/oauth2/token")
+    first_store, second_store = stores
+    clients = [GoDaddyOAuthClient(), GoDaddyOAuthClient()]
+
+    # The clients look the module-level store up when they run, so each fetch is pointed at its worker's handle
+    try:
+        monkeypatch.setattr(oauth_module, "shared_state", first_store)
+        first_token = await clients[0].get_access_token()
+        monkeypatch.setattr(oauth_module, "shared_state", second_store)
+        second_token = await clients[1].get_access_token()
+    finally:
+        for client in clients:
+            await client.close()
+
+    assert first_token == second_token
+    assert stub.counts["token"] == 1
+    assert clients[1].get_token_stats()["shared_token_hits"] == 1
+    assert clients[1].get_token_stats()["token_fetches"] == 0
@@ -0,0 +1,89 @@
+"""
+Tests for the startup warm-up and the readiness state it reports
+"""
+import asyncio
+
+import pytest
+
+from src.utils.endpoints import conversation_endpoints
+from src.utils.oauth_client import oauth_client
+from src.utils.startup import StartupWarmup
+
+
+async def _wait_ready(warmup, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if warmup.ready:
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+@pytest.mark.asyncio
+async def test_warmup_fetches_the_token_and_opens_connections(upstream):
+    warmup = StartupWarmup()
+    warmup.connections = 3
+    assert not warmup.get_status()["ready"]
+
+    warmup.start()
+    assert await _wait_ready(warmup)
+
+    status = warmup.get_status()
+    assert status["errors"] == {}
+    assert {"server_start", "oauth_token", "dns", "connections", "warmup", "total"} <= set(status["phasesMs"])
+    assert status["endpoints"]["base_url"] == upstream.base_url
+    assert upstream.counts["token"] == 1
+    # The first tool call finds the token cached
+    assert await oauth_client.get_access_token() == "stub-token-1"
+    assert upstream.counts["token"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_token_keeps_the_server_unready(upstream, monkeypatch):
+    monkeypatch.setattr(oauth_client, "oauth_url", f"{upstream.base_url}/missing")
+    warmup = StartupWarmup()
+    warmup.start()
+    await asyncio.sleep(0.2)
+
+    assert not warmup.ready
+    assert "oauth_token" in warmup.get_status()["errors"]
+
+    # The next retry succeeds once the token endpoint answers
+    monkeypatch.setattr(oauth_client, "oauth_url", f"{upstream.base_url}/v2/oauth2/token")
+    assert await _wait_ready(warmup)
+    assert "oauth_token" not in warmup.errors
+    await warmup.close()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_host_does_not_hold_readiness_back(upstream, unused_port, monkeypatch):
+    monkeypatch.setattr(conversation_endpoints, "base_url", f"http://127.0.0.1:{unused_port}")
+    monkeypatch.setattr(conversation_endpoints, "port", unused_port)
+    warmup = StartupWarmup()
+    warmup.connections = 2
+    warmup.start()
+
+    assert await _wait_ready(warmup)
+    assert warmup.errors == {"connections": "0 of 2 connections opened"}
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_an_unfinished_warmup(upstream, monkeypatch):
+    monkeypatch.setattr(oauth_client, "oauth_url", f"{upstream.base_url}/missing")
+    warmup = StartupWarmup()
+    warmup.start()
+    await asyncio.sleep(0.05)
+
+    await warmup.close()
+    assert not warmup.ready
+    assert warmup._task is None
+
+
+@pytest.mark.asyncio
+async def test_disabled_warmup_is_ready_at_once(monkeypatch):
+    monkeypatch.setenv("CSS_WARMUP", "false")
+    warmup = StartupWarmup()
+    warmup.start()
+
+    assert warmup.ready
+    assert warmup.get_status()["warmup"] is False
+    assert "server_start" in warmup.phases
@@ -0,0 +1,130 @@
+"""
+Tests for the FTS5 transcript index and the keyword search tool
+"""
+import asyncio
+
+import pytest
+
+from src.tools import css_transcripts_tool, transcript_search_tool
+from src.tools.transcript_search_tool import TranscriptSearchTool
+from src.utils.conversation_store import to_epoch
+from src.utils.response_cache import ResponseCache
+from src.utils.transcript_index import TranscriptIndex, build_match_query
+
+
+def _message(i, role, content, participant="c1"):
+    return {
+        "messageId": f"m{i}",
+        "participantRole": role,
+        "participantId": participant,
+        "participantName": role.title() if role else None,
+        "content": content,
+        "absoluteTime": f"2025-10-15T10:{i:02d}:00.000Z",
+    }
+
+
+TRANSCRIPT = [
+    _message(0, "CUSTOMER", "Participant Jo has started a conversation"),
+    _message(1, "SYSTEM", "Please do not share your refund card number"),
+    _message(2, "CUSTOMER", "I was charged twice and want a refund"),
+    _message(3, "AGENT", "I can help with the refund", participant="ag1"),
+    _message(4, "CUSTOMER", "Can I talk to a supervisor?"),
+    _message(5, "AGENT", "Transferring you now", participant="ag2"),
+    _message(6, "CUSTOMER", "Thanks, the refunded amount arrived"),
+]
+
+
+@pytest.fixture
+def index():
+    index = TranscriptIndex()
+    index.path = ":memory:"
+    index.enabled = True
+    yield index
+    index.close()
+
+
+def test_build_match_query():
+    assert build_match_query("charged twice") == '"charged" AND "twice"'
+    assert build_match_query("refund* chargeback", "any") == '"refund"* OR "chargeback"'
+    assert build_match_query("charged twice", "phrase") == '"charged twice"'
+    # FTS5 syntax in the input is only text
+    assert build_match_query('NEAR(a b) OR "x') == '"NEAR" AND "a" AND "b" AND "OR" AND "x"'
+    assert build_match_query("  ...  ") is None
+
+
+@pytest.mark.asyncio
+async def test_search_filters_and_snippets(index):
+    assert await index.add("u1", TRANSCRIPT)
+    await index.add("u2", [_message(0, "CUSTOMER", "Where is my refund?")])
+
+    result = await index.search(build_match_query("refund"))
+    assert {c["ucid"] for c in result["conversations"]} == {"u1", "u2"}
+    # System notices and boilerplate are not indexed, and plain terms do not match other word forms
+    u1 = next(c for c in result["conversations"] if c["ucid"] == "u1")
+    assert u1["matchedMessages"] == 2
+    assert u1["firstMatchAt"] == "2025-10-15T10:02:00.000Z"
+    assert "[refund]" in u1["snippets"][0]["snippet"]
+
+    prefix = await index.search(build_match_query("refund*"), ucids=["u1"])
+    assert prefix["conversations"][0]["matchedMessages"] == 3
+
+    by_role = await index.search(build_match_query("refund"), ucids=["u1"], roles=["AGENT"])
+    assert [s["messageId"] for s in by_role["conversations"][0]["snippets"]] == ["m3"]
+    assert by_role["conversations"][0]["agentIds"] == ["ag1"]
+
+    # Messages carry the agent handling the conversation when they were sent
+    by_agent = await index.search(build_match_query("refunded"), agent_ids=["ag2"])
+    assert [c["ucid"] for c in by_agent["conversations"]] == ["u1"]
+
+    in_window = await index.search(build_match_query("refund"), ucids=["u1"], end_ts=to_epoch("2025-10-15T10:02:00Z"))
+    assert [s["messageId"] for s in in_window["conversations"][0]["snippets"]] == ["m2"]
+
+    phrase = await index.search(build_match_query("talk to a supervisor", "phrase"))
+    assert [c["ucid"] for c in phrase["conversations"]] == ["u1"]
+
+
+@pytest.mark.asyncio
+async def test_only_changed_transcripts_are_reindexed(index):
+    assert await index.add("u1", TRANSCRIPT[:3])
+    assert not await index.add("u1", TRANSCRIPT[:3])
+    assert not await index.add("u1", TRANSCRIPT, if_missing=True)
+
+    assert await index.add("u1", TRANSCRIPT)
+    assert index.get_stats()["documents"] == 1
+    assert (await index.search(build_match_query("supervisor")))["conversations"]
+    assert await index.indexed_ucids(["u1", "u2"]) == ["u1"]
+
+
+@pytest.mark.asyncio
+async def test_scheduled_transcripts_are_indexed_in_the_background(index):
+    index.schedule("u1", TRANSCRIPT)
+    await asyncio.wait_for(index._queue.join(), 5)
+    assert await index.indexed_ucids(["u1"]) == ["u1"]
+
+    # A full queue drops transcripts instead of blocking the caller
+    index.queue_size = 1
+    index.close()
+    index.enabled = True
+    for ucid in ("u2", "u3", "u4"):
+        index.schedule(ucid, TRANSCRIPT)
+    assert index.get_stats()["documents_dropped"] == 2
+
+
+@pytest.mark.asyncio
+async def test_keyword_search_indexes_missing_transcripts(upstream, index, monkeypatch):
+    monkeypatch.setattr(css_transcripts_tool, "transcript_index", index)
+    monkeypatch.setattr(transcript_search_tool, "transcript_index", index)
+    monkeypatch.setattr(css_transcripts_tool, "response_cache", ResponseCache())
+    ucids = upstream.data.ucids[:3]
+
+    result = await TranscriptSearchTool().execute({"query": "guide", "ucids": ucids})
+
+    assert result["status"] == "success"
+    assert result["data"]["fetched"] == 3
+    assert sorted(c["ucid"] for c in result["data"]["conversations"]) == sorted(ucids)
+
+    # Indexed conversations are not fetched again
+    pages = upstream.counts["transcripts"]
+    result = await TranscriptSearchTool().execute({"query": "guide", "ucids": ucids})
+    assert result["data"]["fetched"] == 0
+    assert upstream.counts["transcripts"] == pages
@@ -0,0 +1,105 @@
+"""
+Tests for transcript timing analytics
+"""
+import asyncio
+
+import pytest
+
+from src.tools import css_transcripts_tool
+from src.tools.css_transcripts_tool import CSSTranscriptsTool
+from src.tools.transcript_timing_tool import TranscriptTimingTool
+from src.utils.response_cache import ResponseCache
+from src.utils.transcript_timing import ConversationTimer, latency_summary
+
+
+def _timer(messages):
+    timer = ConversationTimer(idle_gap_seconds=60)
+    for sent_at, role, content in messages:
+        timer.add({"participantRole": role, "participantId": "ag1", "content": content}, sent_at)
+    return timer.result()
+
+
+def test_latency_summary():
+    assert latency_summary([]) == {"count": 0}
+    assert latency_summary([3.0, 1.0, 2.0]) == {"count": 3, "mean": 2.0, "p50": 2.0, "p90": 2.8, "p99": 2.98, "max": 3.0}
+
+
+def test_conversation_timer():
+    result = _timer([
+        (0, "CUSTOMER", "Hi"),
+        (10, "SYSTEM", "Conversation rehydrated"),
+        (20, "AGENT", "Agent joined the conversation"),
+        (50, "AGENT", "Hello, how can I help?"),
+        (80, "CUSTOMER", "My site is down"),
+        (200, "AGENT", "It is fixed now"),
+    ])
+
+    assert result["messageCount"] == 6
+    assert result["roleCounts"] == {"CUSTOMER": 2, "SYSTEM": 1, "AGENT": 3}
+    assert result["durationSeconds"] == 200
+    # The agent's join notice ends the wait; its first real message is the first response
+    assert result["customerWaitSeconds"] == 20
+    assert result["firstResponseSeconds"] == 50
+    assert result["agentFirstResponseSeconds"] == 30
+    # The customer's opening message came before any agent, so only the later reply counts
+    assert result["agentLatency"]["count"] == 1
+    assert result["agentLatency"]["max"] == 120
+    assert result["customerLatency"]["count"] == 1
+    assert result["customerLatency"]["max"] == 30
+    assert result["idleGaps"] == {"thresholdSeconds": 60, "count": 1, "totalSeconds": 120, "maxSeconds": 120}
+    assert result["timeByRoleSeconds"] == {"CUSTOMER": 130, "SYSTEM": 10, "AGENT": 60}
+
+
+def test_conversation_timer_without_agent():
+    result = _timer([(0, "CUSTOMER", "Hello?"), (30, "CUSTOMER", "Anyone there?")])
+
+    assert result["customerWaitSeconds"] is None
+    assert result["firstResponseSeconds"] is None
+    assert result["agentLatency"] == {"count": 0}
+    assert result["timeByRoleSeconds"] == {"CUSTOMER": 30}
+
+
+@pytest.fixture
+def quiet_cache(monkeypatch):
+    """A fresh response cache for the transcripts tool, and a transcript index that must not be used"""
+    cache = ResponseCache()
+    monkeypatch.setattr(css_transcripts_tool, "response_cache", cache)
+
+    async def no_index(self, *args, **kwargs):
+        raise AssertionError("bulk analytics must not index transcripts")
+
+    monkeypatch.setattr(CSSTranscriptsTool, "_index", no_index)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_bulk_timing_bypasses_the_cache_and_keeps_input_order(upstream, quiet_cache):
+    ucids = list(reversed(upstream.data.ucids[:12])) + ["missing"]
+
+    result = await TranscriptTimingTool().execute({"ucids": ucids, "maxConcurrency": 3})
+
+    assert result["status"] == "partial"
+    assert list(result["data"]["errors"]) == ["missing"]
+    assert [c["ucid"] for c in result["data"]["conversations"]] == ucids[:-1]
+    assert result["data"]["summary"]["conversations"] == 12
+    assert quiet_cache.get_stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_timing_is_bounded_by_max_concurrency(monkeypatch):
+    in_flight = peak = 0
+
+    async def fetch_transcript(self, ucid, *args):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return {"status": "success", "data": {"transcripts": []}}, True
+
+    monkeypatch.setattr(CSSTranscriptsTool, "fetch_transcript", fetch_transcript)
+
+    result = await TranscriptTimingTool().execute({"ucids": [f"u{i}" for i in range(50)], "maxConcurrency": 4})
+
+    assert result["status"] == "success"
+    assert peak == 4
@@ -0,0 +1,105 @@
+"""
+Tests for following transcript lastEvaluatedKey pages
+"""
+import pytest
+
+from src.tools.css_transcripts_tool import CSSTranscriptsTool
+
+
+def _message(i):
+    return {"messageId": f"m{i}", "content": f"message {i}", "absoluteTime": f"2025-10-15T10:{i:02d}:00.000Z"}
+
+
+class CannedPages:
+    """Stands in for _fetch_page, serving fixed pages keyed by the lastEvaluatedKey asked for"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.keys = []
+
+    async def __call__(self, url, params):
+        key = (params or {}).get("lastEvaluatedKey")
+        self.keys.append(key)
+        messages, next_key = self.pages[key]
+        return {"status": "success", "data": {"ucid": "u1", "transcripts": messages, "lastEvaluatedKey": next_key}}, None
+
+
+@pytest.mark.asyncio
+async def test_all_pages_are_followed(upstream):
+    ucid = upstream.data.ucids[0]
+    expected = upstream.data.transcript(0)
+
+    result, complete = await CSSTranscriptsTool().fetch_transcript(ucid)
+
+    assert complete
+    assert [m["messageId"] for m in result["data"]["transcripts"]] == [m["messageId"] for m in expected]
+    # Three pages of messages and the final page that only echoes the last key
+    assert result["data"]["pagesFetched"] == 4
+    assert not result["data"]["truncated"]
+    assert result["data"]["ucid"] == ucid
+
+
+@pytest.mark.asyncio
+async def test_messages_repeated_across_pages_are_dropped(monkeypatch):
+    pages = CannedPages({
+        None: ([_message(0), _message(1), _message(2)], "k1"),
+        "k1": ([_message(2), _message(3)], "k2"),
+        # Nothing new: paging stops even though a key came back
+        "k2": ([_message(3)], "k3"),
+    })
+    tool = CSSTranscriptsTool()
+    monkeypatch.setattr(tool, "_fetch_page", pages)
+
+    result, complete = await tool.fetch_transcript("u1")
+
+    assert complete
+    assert [m["messageId"] for m in result["data"]["transcripts"]] == ["m0", "m1", "m2", "m3"]
+    assert pages.keys == [None, "k1", "k2"]
+    assert result["data"]["lastEvaluatedKey"] == "k3"
+
+
+@pytest.mark.asyncio
+async def test_message_limit_and_time_window_stop_paging(monkeypatch):
+    pages = CannedPages({
+        None: ([_message(i) for i in range(5)], "k1"),
+        "k1": ([_message(i) for i in range(5, 10)], "k2"),
+        "k2": ([_message(i) for i in range(10, 15)], None),
+    })
+    tool = CSSTranscriptsTool()
+    monkeypatch.setattr(tool, "_fetch_page", pages)
+
+    result, _ = await tool.fetch_transcript("u1", message_limit=3)
+    assert [m["messageId"] for m in result["data"]["transcripts"]] == ["m0", "m1", "m2"]
+    assert result["data"]["truncated"]
+    assert pages.keys == [None]
+
+    pages.keys.clear()
+    result, _ = await tool.fetch_transcript(
+        "u1",
+        start_time=CSSTranscriptsTool._parse_time("2025-10-15T10:03:00Z"),
+        end_time=CSSTranscriptsTool._parse_time("2025-10-15T10:06:00Z"),
+    )
+    assert [m["messageId"] for m in result["data"]["transcripts"]] == ["m3", "m4", "m5", "m6"]
+    # The page holding the first message past the window is the last one fetched
+    assert pages.keys == [None, "k1"]
+
+
+@pytest.mark.asyncio
+async def test_error_after_the_first_page_returns_what_arrived(monkeypatch):
+    tool = CSSTranscriptsTool()
+    calls = []
+
+    async def fetch_page(url, params):
+        calls.append(params)
+        if params:
+            return None, {"status": "error", "message": "boom", "error": "API request failed with status 503: boom"}
+        return {"status": "success", "data": {"transcripts": [_message(0)], "lastEvaluatedKey": "k1"}}, None
+
+    monkeypatch.setattr(tool, "_fetch_page", fetch_page)
+
+    result, complete = await tool.fetch_transcript("u1")
+
+    assert not complete
+    assert result["status"] == "success"
+    assert result["data"]["truncated"]
+    assert [m["messageId"] for m in result["data"]["transcripts"]] == ["m0"]
@@ -0,0 +1,54 @@
+"""
+Test for ``main.py --workers``: several processes behind one port sharing one OAuth token
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.asyncio
+async def test_workers_start_and_share_the_token(stub, tmp_path, unused_port):
+    port = unused_port
+    env = {
+        **os.environ,
+        "OAUTH_TOKEN_URL": f"{stub.base_url}/v2/oauth2/token",
+        "CONVERSATION_API_BASE_URL": stub.base_url,
+        "TMPDIR": str(tmp_path),
+    }
+    env.pop("CSS_SHARED_STATE_PATH", None)
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "--workers", "2", "--port", str(port), "--log-level", "WARNING"],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    ready_pids = set()
+    try:
+        deadline = time.monotonic() + 60
+        async with aiohttp.ClientSession() as session:
+            while len(ready_pids) < 2 and time.monotonic() < deadline:
+                try:
+                    # A new connection per request, so the kernel spreads them across both workers
+                    async with session.get(f"http://127.0.0.1:{port}/stats", headers={"Connection": "close"}) as response:
+                        stats = await response.json()
+                    if stats["startup"]["ready"]:
+                        ready_pids.add(stats["sharedState"]["pid"])
+                        # The private state directory is created by the supervisor
+                        assert stats["sharedState"]["path"].startswith(str(tmp_path))
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.2)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        await asyncio.to_thread(process.wait, 30)
+
+    assert len(ready_pids) == 2
+    assert stub.counts["token"] == 1
+    # The temporary shared state is removed on shutdown
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("css-mcp-shared-")]